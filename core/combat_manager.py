@@ -153,7 +153,7 @@ class BattleManager:
         all_boss_templates = self.config_manager.boss_data
         now = time.time()
 
-        top_players = await self.db.get_top_players(self.config["VALUES"].get("WORLD_BOSS_TOP_PLAYERS_AVG", 5))
+        top_players = await self.db.get_ranking_summaries("realm", self.config["VALUES"].get("WORLD_BOSS_TOP_PLAYERS_AVG", 5))
         difficulty_multiplier = self.config["VALUES"].get("WORLD_BOSS_DIFFICULTY_MULTIPLIER", 3.0)
 
         for boss_id, template in all_boss_templates.items():
@@ -290,6 +290,8 @@ class BattleManager:
         total_damage_dealt = sum(p['total_damage'] for p in participants) or 1
         reward_report = ["\n--- 战利品结算 ---"]
         updated_players = []
+        gold_payouts = {}
+        first_place_user_id = None
         
         rank_bonus_gold = self.config["VALUES"].get("WORLD_BOSS_RANK_BONUS_GOLD", [2000, 1000, 500])
         rank_bonus_exp = self.config["VALUES"].get("WORLD_BOSS_RANK_BONUS_EXP", [5000, 2500, 1000])
@@ -315,7 +317,7 @@ class BattleManager:
                 
                 total_gold = gold_reward + bonus_gold
                 total_exp = exp_reward + bonus_exp
-                player_obj.gold += total_gold
+                gold_payouts[player_obj.user_id] = total_gold
                 player_obj.experience += total_exp
                 updated_players.append(player_obj)
                 
@@ -325,7 +327,7 @@ class BattleManager:
                 reward_report.append(reward_text)
                 
                 if rank == 0 and item_rewards:
-                    await self.db.add_items_to_inventory_in_transaction(player_obj.user_id, item_rewards)
+                    first_place_user_id = player_obj.user_id
                     item_names = []
                     for item_id, qty in item_rewards.items():
                         item_info = self.config_manager.item_data.get(item_id)
@@ -334,8 +336,13 @@ class BattleManager:
                     if item_names:
                         reward_report.append(f"  🎁 首功奖励: {', '.join(item_names)}")
         
-        if updated_players:
-            await self.db.update_players_in_transaction(updated_players)
+        # 修为、灵石（经账本批量发放）与首功物品在同一个事务内结算
+        async with self.db.unit_of_work():
+            if updated_players:
+                await self.db.update_players_in_transaction(updated_players)
+            await self.db.grant_gold(gold_payouts, reason=f"world_boss:{boss_instance.boss_id}")
+            if first_place_user_id:
+                await self.db.add_items_to_inventory_in_transaction(first_place_user_id, item_rewards)
         
         top_contributors = [{"user_name": p["user_name"], "damage": p["total_damage"]} for p in participants[:5]]
         await self.db.log_boss_kill(boss_instance.boss_id, boss_template.name, top_contributors)
@@ -64,7 +64,8 @@ class EventGenerator:
     
     @staticmethod
     def generate_event(realm_type: str, floor_num: int, total_floors: int, 
-                      player_level: int, config_manager: ConfigManager) -> FloorEvent:
+                      player_level: int, config_manager: ConfigManager,
+                      rng: Optional[random.Random] = None) -> FloorEvent:
         """
         根据秘境类型、楼层位置生成合适的事件
         
@@ -74,7 +75,11 @@ class EventGenerator:
             total_floors: 总楼层数
             player_level: 玩家等级
             config_manager: 配置管理器
+            rng: 随机数生成器，传入按种子构造的实例时结果可复现
         """
+        if rng is None:
+            rng = random.Random()
+
         # 获取权重配置
         weights = EventGenerator.REALM_TYPE_WEIGHTS.get(realm_type, EventGenerator.REALM_TYPE_WEIGHTS["trial"])
         
@@ -97,36 +102,36 @@ class EventGenerator:
         # 随机选择事件类型
         event_types = list(normalized_weights.keys())
         event_weights = list(normalized_weights.values())
-        event_type = random.choices(event_types, weights=event_weights, k=1)[0]
+        event_type = rng.choices(event_types, weights=event_weights, k=1)[0]
         
         # 生成对应事件
         if event_type == "monster":
-            return EventGenerator._create_monster_event(config_manager, player_level)
+            return EventGenerator._create_monster_event(config_manager, player_level, rng)
         elif event_type == "treasure":
-            return EventGenerator._create_treasure_event(player_level)
+            return EventGenerator._create_treasure_event(player_level, rng)
         elif event_type == "trap":
-            return EventGenerator._create_trap_event(player_level)
+            return EventGenerator._create_trap_event(player_level, rng)
         elif event_type == "choice":
-            return EventGenerator._create_choice_event(player_level, realm_type)
+            return EventGenerator._create_choice_event(player_level, realm_type, rng)
         elif event_type == "blessing":
-            return EventGenerator._create_blessing_event(player_level, realm_type)
+            return EventGenerator._create_blessing_event(player_level, realm_type, rng)
         elif event_type == "merchant":
-            return EventGenerator._create_merchant_event(player_level, config_manager)
+            return EventGenerator._create_merchant_event(player_level, config_manager, rng)
         elif event_type == "elite":
-            return EventGenerator._create_elite_event(config_manager, player_level)
+            return EventGenerator._create_elite_event(config_manager, player_level, rng)
         elif event_type == "mystery":
-            return EventGenerator._create_mystery_event(player_level)
+            return EventGenerator._create_mystery_event(player_level, rng)
         else:
-            return EventGenerator._create_treasure_event(player_level)
+            return EventGenerator._create_treasure_event(player_level, rng)
     
     @staticmethod
-    def _create_monster_event(config_manager: ConfigManager, player_level: int) -> FloorEvent:
+    def _create_monster_event(config_manager: ConfigManager, player_level: int, rng: random.Random) -> FloorEvent:
         """创建普通怪物事件"""
         monster_pool = list(config_manager.monster_data.keys())
         if not monster_pool:
-            return EventGenerator._create_treasure_event(player_level)
+            return EventGenerator._create_treasure_event(player_level, rng)
         
-        monster_id = random.choice(monster_pool)
+        monster_id = rng.choice(monster_pool)
         return FloorEvent(
             type="monster",
             data={"id": monster_id},
@@ -134,13 +139,13 @@ class EventGenerator:
         )
     
     @staticmethod
-    def _create_elite_event(config_manager: ConfigManager, player_level: int) -> FloorEvent:
+    def _create_elite_event(config_manager: ConfigManager, player_level: int, rng: random.Random) -> FloorEvent:
         """创建精英怪物事件 - 奖励更好"""
         monster_pool = list(config_manager.monster_data.keys())
         if not monster_pool:
-            return EventGenerator._create_treasure_event(player_level)
+            return EventGenerator._create_treasure_event(player_level, rng)
         
-        monster_id = random.choice(monster_pool)
+        monster_id = rng.choice(monster_pool)
         return FloorEvent(
             type="elite",
             data={"id": monster_id, "reward_multiplier": 1.5},
@@ -148,9 +153,9 @@ class EventGenerator:
         )
     
     @staticmethod
-    def _create_treasure_event(player_level: int) -> FloorEvent:
+    def _create_treasure_event(player_level: int, rng: random.Random) -> FloorEvent:
         """创建宝箱事件"""
-        base_gold = random.randint(80, 200)
+        base_gold = rng.randint(80, 200)
         gold_reward = int(base_gold * (1 + player_level * 0.5))
         
         descriptions = [
@@ -162,34 +167,34 @@ class EventGenerator:
         return FloorEvent(
             type="treasure",
             data={"rewards": {"gold": gold_reward}},
-            description=random.choice(descriptions)
+            description=rng.choice(descriptions)
         )
     
     @staticmethod
-    def _create_trap_event(player_level: int) -> FloorEvent:
+    def _create_trap_event(player_level: int, rng: random.Random) -> FloorEvent:
         """创建陷阱事件"""
         trap_types = [
             {
                 "name": "毒雾陷阱",
                 "desc": "💀 你触发了一个毒雾陷阱！",
-                "damage_percent": random.uniform(0.15, 0.30),
-                "gold_loss": random.randint(50, 150) * (1 + player_level)
+                "damage_percent": rng.uniform(0.15, 0.30),
+                "gold_loss": rng.randint(50, 150) * (1 + player_level)
             },
             {
                 "name": "落石陷阱",
                 "desc": "💀 天花板突然坍塌，巨石砸落！",
-                "damage_percent": random.uniform(0.20, 0.35),
+                "damage_percent": rng.uniform(0.20, 0.35),
                 "gold_loss": 0
             },
             {
                 "name": "灵力吸收阵",
                 "desc": "💀 你踏入了一个灵力吸收法阵！",
-                "damage_percent": random.uniform(0.10, 0.20),
-                "gold_loss": random.randint(100, 300) * (1 + player_level)
+                "damage_percent": rng.uniform(0.10, 0.20),
+                "gold_loss": rng.randint(100, 300) * (1 + player_level)
             }
         ]
         
-        trap = random.choice(trap_types)
+        trap = rng.choice(trap_types)
         return FloorEvent(
             type="trap",
             data={
@@ -201,7 +206,7 @@ class EventGenerator:
         )
     
     @staticmethod
-    def _create_choice_event(player_level: int, realm_type: str) -> FloorEvent:
+    def _create_choice_event(player_level: int, realm_type: str, rng: random.Random) -> FloorEvent:
         """创建选择事件 - 分岔路口"""
         choice_templates = [
             {
@@ -246,7 +251,7 @@ class EventGenerator:
             }
         ]
         
-        template = random.choice(choice_templates)
+        template = rng.choice(choice_templates)
         return FloorEvent(
             type="choice",
             data={"player_level": player_level},
@@ -256,11 +261,11 @@ class EventGenerator:
         )
     
     @staticmethod
-    def _create_blessing_event(player_level: int, realm_type: str) -> FloorEvent:
+    def _create_blessing_event(player_level: int, realm_type: str, rng: random.Random) -> FloorEvent:
         """创建祝福/诅咒事件"""
         # 幽冥鬼域更容易触发诅咒
         curse_chance = 0.3 if realm_type == "ghost" else 0.2
-        is_curse = random.random() < curse_chance
+        is_curse = rng.random() < curse_chance
         
         if is_curse:
             curses = [
@@ -275,7 +280,7 @@ class EventGenerator:
                     "effect": {"type": "defense_debuff", "value": -3, "duration": 3}
                 }
             ]
-            curse = random.choice(curses)
+            curse = rng.choice(curses)
             return FloorEvent(
                 type="blessing",
                 data={
@@ -303,7 +308,7 @@ class EventGenerator:
                     "effect": {"type": "heal", "percent": 0.3}
                 }
             ]
-            blessing = random.choice(blessings)
+            blessing = rng.choice(blessings)
             return FloorEvent(
                 type="blessing",
                 data={
@@ -315,7 +320,7 @@ class EventGenerator:
             )
     
     @staticmethod
-    def _create_merchant_event(player_level: int, config_manager: ConfigManager) -> FloorEvent:
+    def _create_merchant_event(player_level: int, config_manager: ConfigManager, rng: random.Random) -> FloorEvent:
         """创建商人事件"""
         # 商人提供的商品
         offerings = []
@@ -345,7 +350,7 @@ class EventGenerator:
             available_items = [item for item in config_manager.item_data.values() 
                              if item.rank in ["凡品", "珍品"] and item.type != "功法"]
             if available_items:
-                random_item = random.choice(available_items)
+                random_item = rng.choice(available_items)
                 item_cost = int(random_item.price * 0.8)  # 商人打8折
                 offerings.append({
                     "id": f"item_{random_item.id}",
@@ -363,7 +368,7 @@ class EventGenerator:
         )
     
     @staticmethod
-    def _create_mystery_event(player_level: int) -> FloorEvent:
+    def _create_mystery_event(player_level: int, rng: random.Random) -> FloorEvent:
         """创建神秘事件 - 随机好坏"""
         mystery_events = [
             {
@@ -374,7 +379,7 @@ class EventGenerator:
             {
                 "desc": "💎 墙壁上镶嵌着一颗发光的宝石...",
                 "good": True,
-                "result": {"type": "gold_bonus", "gold": random.randint(200, 500) * (1 + player_level)}
+                "result": {"type": "gold_bonus", "gold": rng.randint(200, 500) * (1 + player_level)}
             },
             {
                 "desc": "⚡ 你不小心触发了一个传送阵，被传送到了未知区域...",
@@ -388,7 +393,7 @@ class EventGenerator:
             }
         ]
         
-        event = random.choice(mystery_events)
+        event = rng.choice(mystery_events)
         return FloorEvent(
             type="mystery",
             data={"result": event["result"]},
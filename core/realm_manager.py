@@ -63,42 +63,61 @@ class RealmGenerator:
             logger.error("秘境生成失败：怪物池或Boss池为空，请检check monsters.json 和 bosses.json。")
             return None
 
-        floor_events: List[FloorEvent] = []
-
-        # 使用新的事件生成器生成各楼层事件
-        for floor_num in range(1, total_floors):
-            event = EventGenerator.generate_event(
-                realm_type=realm_type,
-                floor_num=floor_num,
-                total_floors=total_floors,
-                player_level=level_index,
-                config_manager=config_manager
-            )
-            floor_events.append(event)
-
-        # 最后一层必定是Boss
-        final_boss_id = random.choice(boss_pool)
-        boss_event = FloorEvent(
-            type="boss",
-            data={"id": final_boss_id},
-            description="⚔️ 前方传来强大的威压，最终Boss就在眼前！"
-        )
-        floor_events.append(boss_event)
-
         realm_id = f"{realm_type}_{difficulty}_{player.level_index}_{int(time.time())}"
 
-        # 创建秘境实例
+        # 只保存种子，各楼层事件在到达时由 get_floor_event 重新生成
         return RealmInstance(
             id=realm_id,
             total_floors=total_floors,
-            floors=floor_events,
+            floors=[],
             realm_type=realm_type,
             difficulty=difficulty,
             theme_modifiers={
                 "reward_multiplier": RealmGenerator.DIFFICULTIES[difficulty]["reward_mult"]
-            }
+            },
+            seed=random.getrandbits(32),
+            level_index=level_index
         )
 
+    @staticmethod
+    def generate_floor_event(instance: RealmInstance, floor_index: int,
+                             config_manager: ConfigManager) -> Optional[FloorEvent]:
+        """由种子重新生成某一层（0-based）的事件，相同的种子与配置总是得到相同的结果"""
+        rng = random.Random(f"{instance.seed}:{floor_index}")
+        if floor_index < instance.total_floors - 1:
+            return EventGenerator.generate_event(
+                realm_type=instance.realm_type,
+                floor_num=floor_index + 1,
+                total_floors=instance.total_floors,
+                player_level=instance.level_index,
+                config_manager=config_manager,
+                rng=rng
+            )
+
+        # 最后一层必定是Boss
+        boss_pool = list(config_manager.boss_data.keys())
+        if not boss_pool:
+            return None
+        return FloorEvent(
+            type="boss",
+            data={"id": rng.choice(boss_pool)},
+            description="⚔️ 前方传来强大的威压，最终Boss就在眼前！"
+        )
+
+    @staticmethod
+    def get_floor_event(instance: RealmInstance, floor_index: int,
+                        config_manager: ConfigManager) -> Optional[FloorEvent]:
+        """获取某一层（0-based）的事件：优先使用覆盖项，其次是旧格式保存的楼层，最后由种子生成"""
+        if not 0 <= floor_index < instance.total_floors:
+            return None
+        if floor_index in instance.overrides:
+            return instance.overrides[floor_index]
+        if floor_index < len(instance.floors):
+            return instance.floors[floor_index]
+        if instance.seed is None:
+            return None
+        return RealmGenerator.generate_floor_event(instance, floor_index, config_manager)
+
 class RealmManager:
     def __init__(self, db: DataBase, config: AstrBotConfig, config_manager: ConfigManager):
         self.db = db
@@ -173,14 +192,14 @@ class RealmManager:
         p.realm_floor += 1
         current_floor_index = p.realm_floor - 1
 
-        if not (0 <= current_floor_index < len(realm_instance.floors)):
+        event = RealmGenerator.get_floor_event(realm_instance, current_floor_index, self.config_manager)
+        if event is None:
             p.realm_id = None
             p.realm_floor = 0
             p.set_realm_instance(None)
             p.realm_pending_choice = None
             return False, "秘境探索数据异常，已将你传送出来。", p, {}
 
-        event = realm_instance.floors[current_floor_index]
         event_log = [f"--- 第 {p.realm_floor}/{realm_instance.total_floors} 层 ---"]
         
         # 添加事件描述
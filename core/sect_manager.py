@@ -52,7 +52,7 @@ class SectManager:
 
         sect = await self.db.get_sect_by_id(player.sect_id)
         if sect and sect['leader_id'] == player.user_id:
-            members = await self.db.get_sect_members(player.sect_id)
+            members = await self.db.get_sect_member_summaries(player.sect_id)
             if len(members) > 1:
                 return False, "道友身为一宗之主，身系宗门兴衰，不可轻易脱离！请先传位于他人或解散宗门。", None
             else:
@@ -2,5 +2,9 @@
 
 from .data_manager import DataBase
 from .migration import MigrationManager
+from .retention import RetentionJob
+from .log_archiver import LogArchiver
+from .backup import BackupJob
+from .shard_router import ShardRouter, GLOBAL_SHARD
 
-__all__ = ["DataBase", "MigrationManager"]
\ No newline at end of file
+__all__ = ["DataBase", "MigrationManager", "RetentionJob", "LogArchiver", "BackupJob", "ShardRouter", "GLOBAL_SHARD"]
\ No newline at end of file
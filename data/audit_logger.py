@@ -0,0 +1,106 @@
+# data/audit_logger.py
+
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from astrbot.api import logger
+
+LogBatch = Dict[str, List[tuple]]
+
+def _group(rows: List[Tuple[str, tuple]]) -> LogBatch:
+    grouped: LogBatch = {}
+    for sql, params in rows:
+        grouped.setdefault(sql, []).append(params)
+    return grouped
+
+class AuditLogger:
+    """只追加日志（交易、炼制、奇遇）的异步批量写入管道
+
+    调用方只把 (sql, params) 放入有界队列即返回；后台任务每 interval_ms 或攒够 batch_size 行
+    时按 SQL 分组 executemany 写入。队列满时 log() 会等待，形成背压。
+    写入失败的批次二分后重试，只丢弃本身无法写入的记录。
+    """
+
+    def __init__(self, writer: Callable[[LogBatch], Awaitable[None]], batch_size: int = 200,
+                 interval_ms: int = 200, max_queue_size: int = 10000):
+        self._writer = writer
+        self.batch_size = max(1, int(batch_size))
+        self.interval = max(1, int(interval_ms)) / 1000
+        self.max_queue_size = max(1, int(max_queue_size))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {"queued": 0, "written": 0, "batches": 0, "failed": 0,
+                                      "split_batches": 0, "backpressure_waits": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def log(self, sql: str, params: tuple):
+        """追加一条日志；未启动时直接写入"""
+        if self._task is None:
+            await self._write({sql: [params]}, 1)
+            return
+        if self._queue.full():
+            self.stats["backpressure_waits"] += 1
+        await self._queue.put((sql, params))
+        self.stats["queued"] += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, tuple]] = [await self._queue.get()]
+            deadline = loop.time() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write(_group(batch), len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, grouped: LogBatch, size: int):
+        try:
+            await self._writer(grouped)
+        except Exception as e:
+            if size > 1:
+                # 整批在一个事务内写入，一条坏记录（如外键不满足）会使整批回滚：二分后重试，只丢弃自身写入失败的记录
+                rows = [(sql, params) for sql, params_list in grouped.items() for params in params_list]
+                half = len(rows) // 2
+                self.stats["split_batches"] += 1
+                for part in (rows[:half], rows[half:]):
+                    await self._write(_group(part), len(part))
+                return
+            # 日志写入失败不影响游戏逻辑，只记录丢失数量
+            self.stats["failed"] += 1
+            logger.error(f"审计日志写入失败，丢弃 1 条: {e}")
+            return
+        self.stats["written"] += size
+        self.stats["batches"] += 1
+
+    async def drain(self):
+        """等待队列中的日志全部写入，然后停止后台任务"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": self._queue.qsize() if self._queue else 0}
@@ -0,0 +1,132 @@
+# data/backup.py
+
+import time
+import sqlite3
+import asyncio
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple, TYPE_CHECKING
+
+from astrbot.api import logger
+
+from .snapshot import backup_database
+
+if TYPE_CHECKING:
+    from .data_manager import DataBase
+
+def _integrity_check(path: Path) -> Tuple[bool, str]:
+    """在线程中执行 PRAGMA integrity_check，返回 (是否通过, 首条结果)"""
+    conn = sqlite3.connect(f"file:{path.as_posix()}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    first = rows[0][0] if rows else ""
+    return first == "ok", first
+
+class BackupJob:
+    """定时热备份：用在线备份 API 把数据库复制到 backups/ 目录，保留最近 keep 份
+
+    复制在后台线程中用独立连接按页分步进行，步与步之间休眠让出源库，游戏写入不会被长时间阻塞。
+    副本先以 .tmp 文件写入，integrity_check 通过后才改名为正式备份并轮换旧备份。
+    间隔为0时不定时运行，仍可由 GM 指令手动触发。
+    """
+
+    def __init__(self, db: "DataBase", backup_dir: Path, interval_hours: float = 24, keep: int = 7,
+                 pages_per_step: int = 256, step_sleep_ms: float = 5):
+        self.db = db
+        self.backup_dir = backup_dir
+        self.interval = max(0.0, float(interval_hours)) * 3600
+        self.keep = max(1, int(keep))
+        self.pages_per_step = max(1, int(pages_per_step))
+        self.step_sleep = max(0.0, float(step_sleep_ms)) / 1000
+        self._task: Optional[asyncio.Task] = None
+        # 定时与手动触发的备份互斥
+        self._lock = asyncio.Lock()
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"数据库定时备份失败: {e}", exc_info=True)
+
+    def _backup_files(self) -> List[Path]:
+        """按时间从旧到新排列的已有备份"""
+        stem, suffix = self.db.db_path.stem, self.db.db_path.suffix
+        return sorted(self.backup_dir.glob(f"{stem}-*{suffix}"))
+
+    def _next_target(self, db_path: Path) -> Tuple[Path, Path]:
+        """返回本次备份的正式文件与临时文件路径
+
+        文件名精确到微秒；同名文件已存在（时钟精度不足或回拨）时顺延一微秒，
+        既不会覆盖已有备份，也保持按文件名排序即按时间排序。
+        """
+        stamp = datetime.now()
+        while True:
+            target = self.backup_dir / f"{db_path.stem}-{stamp.strftime('%Y%m%d-%H%M%S-%f')}{db_path.suffix}"
+            tmp = target.with_name(target.name + ".tmp")
+            if not target.exists() and not tmp.exists():
+                return target, tmp
+            stamp += timedelta(microseconds=1)
+
+    async def run_once(self) -> Dict[str, Any]:
+        """执行一次备份，返回文件、大小、复制与校验耗时；校验失败时抛出 RuntimeError"""
+        async with self._lock:
+            # 延迟写回与内存计数器先落盘，备份才包含最新数据
+            await self.db.flush_dirty_players()
+            await self.db.flush_daily_counters()
+
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            db_path = self.db.db_path
+            target, tmp = self._next_target(db_path)
+
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(backup_database, db_path, tmp, self.pages_per_step, self.step_sleep)
+                copied = time.perf_counter()
+                ok, detail = await asyncio.to_thread(_integrity_check, tmp)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+            checked = time.perf_counter()
+            if not ok:
+                tmp.unlink(missing_ok=True)
+                raise RuntimeError(f"备份文件完整性校验未通过: {detail}")
+            tmp.replace(target)
+
+            backups = self._backup_files()
+            removed = backups[:max(0, len(backups) - self.keep)]
+            for path in removed:
+                path.unlink(missing_ok=True)
+
+            report = {
+                "path": target,
+                "size_bytes": target.stat().st_size,
+                "copy_ms": (copied - started) * 1000,
+                "check_ms": (checked - copied) * 1000,
+                "total_ms": (checked - started) * 1000,
+                "kept": min(len(backups), self.keep),
+                "removed": len(removed),
+            }
+            self.last_report = report
+            logger.info(
+                f"数据库备份完成: {target.name}，复制 {report['copy_ms']:.0f}ms，"
+                f"校验 {report['check_ms']:.0f}ms，清理旧备份 {len(removed)} 份"
+            )
+            return report
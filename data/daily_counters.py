@@ -0,0 +1,77 @@
+# data/daily_counters.py
+
+from typing import Optional, Dict, Tuple
+
+# 计数器作用域：原先各自一张表的每日限制统一存放在 daily_counters 中
+SCOPE_ADVENTURE = "adventure"
+SCOPE_BOUNTY = "bounty"
+SCOPE_SELL = "sell"
+SCOPE_PILL = "pill"
+SCOPE_TRIBULATION = "tribulation"
+SCOPE_REALM = "realm"
+SCOPE_ITEM_PURCHASE = "item_purchase"  # key = item_id
+SCOPE_SECT_SHOP = "sect_shop"          # key = item_id
+SCOPE_TASK = "task"                    # key = task_id，进度直接设置而非累加
+
+CounterKey = Tuple[str, str, str]          # (scope, user_id, key)
+DirtyKey = Tuple[str, str, str, str]       # (scope, user_id, key, date)
+
+class DailyCounterStore:
+    """当天每日计数器的内存副本
+
+    只缓存最新日期的计数，日期前进时整体丢弃；修改记为脏条目（保存的是绝对值），
+    由 DataBase 批量写回。旧日期的读写不经过缓存，直接访问数据库（访问前先写回该计数残留的脏值）。
+    """
+
+    def __init__(self):
+        self.date: Optional[str] = None
+        self._counts: Dict[CounterKey, int] = {}
+        self._dirty: Dict[DirtyKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    def accepts(self, counter_date: str) -> bool:
+        """该日期是否由内存负责；遇到更新的日期时切换到新的一天"""
+        if self.date is None or counter_date > self.date:
+            self.date = counter_date
+            self._counts.clear()
+        return counter_date == self.date
+
+    def get(self, scope: str, user_id: str, key: str) -> Optional[int]:
+        return self._counts.get((scope, user_id, key))
+
+    def load(self, scope: str, user_id: str, key: str, value: int):
+        """填充从数据库读到的值；读取期间已有并发修改时保留内存中的值"""
+        self._counts.setdefault((scope, user_id, key), value)
+
+    def set(self, scope: str, user_id: str, key: str, value: int) -> int:
+        self._counts[(scope, user_id, key)] = value
+        self._dirty[(scope, user_id, key, self.date)] = value
+        return value
+
+    def add(self, scope: str, user_id: str, key: str, amount: int) -> int:
+        return self.set(scope, user_id, key, self._counts.get((scope, user_id, key), 0) + amount)
+
+    def is_dirty(self, scope: str, user_id: str, key: str, counter_date: str) -> bool:
+        """该计数是否还有尚未写回的值（日期切换后旧日期的脏值仍保留到写回为止）"""
+        return (scope, user_id, key, counter_date) in self._dirty
+
+    def take_dirty(self) -> Dict[DirtyKey, int]:
+        dirty = self._dirty
+        self._dirty = {}
+        return dirty
+
+    def requeue(self, dirty: Dict[DirtyKey, int]):
+        """写回失败时放回，不覆盖期间产生的更新值"""
+        for dirty_key, value in dirty.items():
+            self._dirty.setdefault(dirty_key, value)
+
+    def clear(self):
+        self.date = None
+        self._counts.clear()
+        self._dirty.clear()
@@ -2,68 +2,397 @@
 
 import time
 import json
+import asyncio
+import sqlite3
 import aiosqlite
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
-from dataclasses import fields
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
 
 from astrbot.api import logger
 from astrbot.api.star import StarTools
 
 from ..config_manager import ConfigManager
-from ..models import Player, PlayerEffect, ActiveWorldBoss
+from ..models import Player, PlayerEffect, PlayerSummary, ActiveWorldBoss, PLAYER_FIELD_NAMES, PLAYER_SUMMARY_FIELDS
+from .player_cache import PlayerCache
+from .row_mapper import PlayerRowMapper
+from .inventory_cache import InventoryCache
+from .snapshot import SnapshotStore
+from .connection_pool import ReadConnectionPool, resolve_storage_profile, apply_connection_pragmas
+from .group_commit import GroupCommitScheduler
+from .leaderboard import LeaderboardSet
+from .audit_logger import AuditLogger, LogBatch
+from .daily_counters import (
+    DailyCounterStore, SCOPE_ADVENTURE, SCOPE_BOUNTY, SCOPE_SELL, SCOPE_PILL,
+    SCOPE_TRIBULATION, SCOPE_REALM, SCOPE_ITEM_PURCHASE, SCOPE_SECT_SHOP, SCOPE_TASK
+)
+
+class _TransactionScope:
+    """显式事务的作用域句柄，调用 rollback() 后退出时回滚而不是提交"""
+
+    __slots__ = ("rollback_only",)
+
+    def __init__(self):
+        self.rollback_only = False
+
+    def rollback(self):
+        self.rollback_only = True
+
+class _UnitOfWork(_TransactionScope):
+    """跨多次 DataBase 调用的外层事务，期间的写入与显式事务都并入同一个 BEGIN ... COMMIT"""
+
+    __slots__ = ("task", "savepoints", "touched", "requeue")
+
+    def __init__(self, task: Optional[asyncio.Task]):
+        super().__init__()
+        self.task = task
+        self.savepoints = 0
+        # 回滚时需要失效的缓存条目（玩家与背包）、需要放回写回队列的脏快照
+        self.touched: set = set()
+        self.requeue: Dict[str, Player] = {}
+
+def _chunked(rows: List[Any], size: int) -> List[List[Any]]:
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
 
 class DataBase:
     """数据库管理器，封装所有数据库操作"""
     
-    def __init__(self, db_file_name: str):
+    def __init__(self, db_file_name: str, player_cache_size: int = 1024,
+                 write_behind: bool = False, write_behind_interval_ms: int = 500,
+                 write_behind_batch_size: int = 64, storage_profile: str = "balanced",
+                 read_pool_size: int = 2, group_commit_window_ms: float = 5,
+                 config_manager: Optional[ConfigManager] = None, leaderboard_enabled: bool = True,
+                 daily_counter_flush_interval_ms: int = 1000, audit_log_batch_size: int = 200,
+                 audit_log_interval_ms: int = 200, audit_log_queue_size: int = 10000,
+                 inventory_cache_size: int = 1024, snapshot_interval_seconds: float = 0,
+                 snapshot_max_staleness_seconds: float = 300, snapshot_pages_per_step: int = 256,
+                 snapshot_rankings: bool = True):
         data_dir = StarTools.get_data_dir("xiuxian")
-        data_dir.mkdir(parents=True, exist_ok=True)
         self.db_path = data_dir / db_file_name
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.conn: Optional[aiosqlite.Connection] = None
+        # 用于在写回玩家时重新计算持久化的战力
+        self.config_manager = config_manager
+        self.storage_profile = resolve_storage_profile(storage_profile)
+        self._read_pool_size = read_pool_size
+        self.read_pool: Optional[ReadConnectionPool] = None
+        # 只读快照：排行榜 SQL 查询可在允许的陈旧时间内读取快照，不与写入竞争。
+        # 快照只服务排行榜，内存排行榜启用、排行榜不读快照或间隔为0时不生成，避免定期白白复制整库
+        self.snapshot = SnapshotStore(
+            self.db_path, interval_seconds=snapshot_interval_seconds,
+            max_staleness_seconds=snapshot_max_staleness_seconds, pages_per_step=snapshot_pages_per_step
+        ) if snapshot_interval_seconds > 0 and snapshot_rankings and not leaderboard_enabled else None
+        # 内存排行榜不可用时，排行榜查询是否读取快照（关闭则直接查询主库）
+        self.snapshot_rankings = snapshot_rankings
+        self.player_cache = PlayerCache(player_cache_size)
+        self._player_rows = PlayerRowMapper()
+        # 背包缓存：首次访问整包加载，背包写操作提交后按增量同步
+        self.inventory_cache = InventoryCache(inventory_cache_size)
+        self._update_sql_cache: Dict[Tuple[str, ...], str] = {}
+
+        # 延迟写回：update_player 只标记脏数据，由后台任务合并提交
+        self.write_behind = write_behind
+        self._flush_interval = max(10, int(write_behind_interval_ms)) / 1000
+        self._flush_batch_size = max(1, int(write_behind_batch_size))
+        self._dirty_players: Dict[str, Player] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.write_behind_stats = {"flushes": 0, "flushed_rows": 0, "deferred_writes": 0}
+        # 乐观并发：写回玩家时按 row_version 比较并交换，冲突时重载并重放变更
+        self.write_conflict_stats = {"writes": 0, "conflicts": 0, "failures": 0}
+
+        # 当前任务在本数据库上的工作单元；按实例区分，分片之间互不可见
+        self._current_uow: ContextVar[Optional[_UnitOfWork]] = ContextVar(
+            f"xiuxian_unit_of_work_{db_file_name}", default=None
+        )
+
+        # 组提交：窗口期内的单语句写入共享一次 commit
+        self._committer = GroupCommitScheduler(group_commit_window_ms)
+
+        # 内存排行榜：迁移完成后由 load_leaderboards 构建
+        self._leaderboard_enabled = leaderboard_enabled
+        self.leaderboards: Optional[LeaderboardSet] = None
+
+        # 每日计数器：当天数据常驻内存，定期批量写回；间隔为0时每次修改立即写回
+        self.daily_counters = DailyCounterStore()
+        self._counter_flush_interval = max(0, int(daily_counter_flush_interval_ms)) / 1000
+        self._counter_flush_lock = asyncio.Lock()
+        self._counter_flush_task: Optional[asyncio.Task] = None
+
+        # 交易/炼制/奇遇日志异步批量写入，命令路径不再等待日志提交
+        self.audit_log = AuditLogger(
+            self._write_log_batch, batch_size=audit_log_batch_size,
+            interval_ms=audit_log_interval_ms, max_queue_size=audit_log_queue_size
+        )
 
     async def connect(self):
         if self.conn is None:
             self.conn = await aiosqlite.connect(self.db_path)
             self.conn.row_factory = aiosqlite.Row
-            logger.info(f"数据库连接已创建: {self.db_path}")
+            self._committer.bind(self.conn)
+            # auto_vacuum 只能在建表前设置：新数据库启用增量回收，供过期数据清理后归还空间
+            async with self.conn.execute("PRAGMA page_count") as cursor:
+                if (await cursor.fetchone())[0] == 0:
+                    await self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            async with self.conn.execute(f"PRAGMA journal_mode = {self.storage_profile['journal_mode']}") as cursor:
+                journal_mode = (await cursor.fetchone())[0]
+            await apply_connection_pragmas(self.conn, self.storage_profile)
+            logger.info(f"数据库连接已创建: {self.db_path} (journal_mode={journal_mode})")
+            if str(journal_mode).lower() == "wal" and self._read_pool_size > 0:
+                self.read_pool = ReadConnectionPool(self.db_path, self._read_pool_size, self.storage_profile)
+                await self.read_pool.open()
+        if self.snapshot is not None:
+            self.snapshot.start()
+        if self.write_behind and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if self._counter_flush_interval > 0 and self._counter_flush_task is None:
+            self._counter_flush_task = asyncio.create_task(self._counter_flush_loop())
+        self.audit_log.start()
 
     async def close(self):
+        for task in (self._flush_task, self._counter_flush_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._flush_task = None
+        self._counter_flush_task = None
+        if self.snapshot is not None:
+            await self.snapshot.stop()
+        if self.read_pool:
+            await self.read_pool.close()
+            self.read_pool = None
         if self.conn:
+            await self.audit_log.drain()
+            await self.flush_dirty_players()
+            await self.flush_daily_counters()
+            async with self._committer.lock:
+                await self._committer.flush()
             await self.conn.close()
             self.conn = None
+            self._committer.bind(None)
+            self.player_cache.clear()
+            self.inventory_cache.clear()
+            self.leaderboards = None
+            self.daily_counters.clear()
             logger.info("数据库连接已关闭。")
 
+    @asynccontextmanager
+    async def _reader(self):
+        """获取用于重读查询的连接：有只读连接池时使用池，否则退回写连接"""
+        # 工作单元内需要读到尚未提交的写入
+        if self.read_pool is None or self._active_uow() is not None:
+            yield self.conn
+            return
+        async with self.read_pool.acquire() as conn:
+            yield conn
+
+    async def _write(self, sql: str, params: Any = ()) -> aiosqlite.Cursor:
+        """执行单条写语句，并等待其所在的组提交批次落盘"""
+        if self._active_uow() is not None:
+            return await self.conn.execute(sql, params)
+        async with self._committer.lock:
+            cursor = await self.conn.execute(sql, params)
+            if not self._committer.enabled:
+                await self.conn.commit()
+                return cursor
+            waiter = self._committer.join()
+        await waiter
+        return cursor
+
+    @asynccontextmanager
+    async def _transaction(self):
+        """显式事务：持有写锁，先提交尚未落盘的组提交批次，再 BEGIN ... COMMIT/ROLLBACK
+
+        在工作单元内调用时改用 SAVEPOINT，回滚只撤销本段操作。
+        """
+        uow = self._active_uow()
+        if uow is not None:
+            uow.savepoints += 1
+            name = f"sp_{uow.savepoints}"
+            await self.conn.execute(f"SAVEPOINT {name}")
+            scope = _TransactionScope()
+            try:
+                yield scope
+            except BaseException:
+                await self.conn.execute(f"ROLLBACK TO {name}")
+                await self.conn.execute(f"RELEASE {name}")
+                raise
+            if scope.rollback_only:
+                await self.conn.execute(f"ROLLBACK TO {name}")
+            await self.conn.execute(f"RELEASE {name}")
+            return
+        async with self._committer.lock:
+            await self._committer.flush()
+            await self.conn.execute("BEGIN")
+            scope = _TransactionScope()
+            try:
+                yield scope
+            except BaseException:
+                await self.conn.rollback()
+                raise
+            if scope.rollback_only:
+                await self.conn.rollback()
+            else:
+                await self._commit_or_rollback()
+
+    async def _commit_or_rollback(self):
+        """提交当前事务；提交失败时回滚后再抛出，避免事务悬空、后续写入并入其中"""
+        try:
+            await self.conn.commit()
+        except BaseException:
+            try:
+                await self.conn.rollback()
+            except Exception:
+                pass
+            raise
+
+    def _active_uow(self) -> Optional[_UnitOfWork]:
+        """当前任务所在的工作单元（子任务会继承 ContextVar，因此还要比对任务本身）"""
+        uow = self._current_uow.get()
+        if uow is not None and uow.task is asyncio.current_task():
+            return uow
+        return None
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        """工作单元：块内的所有 DataBase 调用并入一个事务，退出时只提交一次
+
+        块内抛出异常或调用 rollback() 时整体回滚。持有写锁期间其他写入会排队，
+        因此块内不要 yield 消息或等待用户输入。嵌套使用时直接并入外层工作单元。
+        """
+        uow = self._active_uow()
+        if uow is not None:
+            yield uow
+            return
+        # 与 flush_dirty_players 保持相同的加锁顺序，避免与后台写回互相等待
+        async with self._flush_lock, self._committer.lock:
+            await self._committer.flush()
+            await self.conn.execute("BEGIN")
+            uow = _UnitOfWork(asyncio.current_task())
+            token = self._current_uow.set(uow)
+            try:
+                yield uow
+            except BaseException:
+                await self._rollback_unit_of_work(uow)
+                raise
+            finally:
+                self._current_uow.reset(token)
+            if uow.rollback_only:
+                await self._rollback_unit_of_work(uow)
+                return
+            try:
+                await self.conn.commit()
+            except BaseException:
+                # 块内已同步到缓存的修改随提交失败一并作废
+                await self._rollback_unit_of_work(uow)
+                raise
+
+    async def _rollback_unit_of_work(self, uow: _UnitOfWork):
+        """回滚工作单元，并失效块内同步过的玩家与背包缓存（回滚本身失败时也照常失效）"""
+        try:
+            await self.conn.rollback()
+        finally:
+            for user_id in uow.touched:
+                self._invalidate_player(user_id)
+                self.inventory_cache.invalidate(user_id)
+            for user_id, player in uow.requeue.items():
+                self._dirty_players.setdefault(user_id, player)
+
+    def _invalidate_player(self, user_id: str):
+        """数据库侧直接修改玩家后调用：失效缓存，并让排行榜在下次查询前重新加载该玩家"""
+        self.player_cache.invalidate(user_id)
+        if self.leaderboards is not None:
+            self.leaderboards.mark_stale(user_id)
+
+    def _cache_player(self, player: Player):
+        """写入缓存并同步内存排行榜"""
+        self.player_cache.put(player)
+        if self.leaderboards is not None:
+            self.leaderboards.update(player)
+        uow = self._active_uow()
+        if uow is not None:
+            uow.touched.add(player.user_id)
+
+    def _apply_inventory_delta(self, user_id: str, deltas: Dict[str, int]):
+        """背包写入成功后同步缓存；工作单元内记录下来，整体回滚或提交失败时失效"""
+        self.inventory_cache.apply_delta(user_id, deltas)
+        uow = self._active_uow()
+        if uow is not None:
+            uow.touched.add(user_id)
+
+    def _set_inventory_quantities(self, user_id: str, quantities: Dict[str, int]):
+        """用批量写入返回的结果数量同步缓存，其余同 _apply_inventory_delta"""
+        self.inventory_cache.set_quantities(user_id, quantities)
+        uow = self._active_uow()
+        if uow is not None:
+            uow.touched.add(user_id)
+
+    async def _append_log(self, sql: str, params: tuple):
+        """写入一条只追加日志；工作单元内直接并入当前事务（队列背压会与其持有的写锁互相等待）"""
+        if self._active_uow() is not None:
+            await self.conn.execute(sql, params)
+            return
+        await self.audit_log.log(sql, params)
+
+    async def _write_log_batch(self, batches: LogBatch):
+        async with self._transaction():
+            for sql, params in batches.items():
+                await self.conn.executemany(sql, params)
+
+    async def drain_audit_log(self):
+        """等待所有排队中的审计日志写入数据库"""
+        await self.audit_log.drain()
+
+    def get_group_commit_stats(self) -> Dict[str, Any]:
+        """获取组提交的批次大小与提交耗时统计"""
+        return self._committer.get_stats()
+
+    def get_player_cache_stats(self) -> Dict[str, int]:
+        """获取玩家缓存的命中/未命中/淘汰统计"""
+        return self.player_cache.stats()
+
+    def get_write_conflict_stats(self) -> Dict[str, Any]:
+        stats = dict(self.write_conflict_stats)
+        stats["conflict_rate"] = stats["conflicts"] / stats["writes"] if stats["writes"] else 0.0
+        return stats
+
+    def get_snapshot_stats(self) -> Optional[Dict[str, Any]]:
+        return self.snapshot.get_stats() if self.snapshot is not None else None
+
+    def get_inventory_cache_stats(self) -> Dict[str, int]:
+        """获取背包缓存的命中/未命中统计"""
+        return self.inventory_cache.stats()
+
     async def get_active_bosses(self) -> List[ActiveWorldBoss]:
         async with self.conn.execute("SELECT * FROM active_world_bosses") as cursor:
             rows = await cursor.fetchall()
             return [ActiveWorldBoss(**dict(row)) for row in rows]
 
     async def create_active_boss(self, boss: ActiveWorldBoss):
-        await self.conn.execute(
+        await self._write(
             "INSERT INTO active_world_bosses (boss_id, current_hp, max_hp, spawned_at, level_index) VALUES (?, ?, ?, ?, ?)",
             (boss.boss_id, boss.current_hp, boss.max_hp, boss.spawned_at, boss.level_index)
         )
-        await self.conn.commit()
 
     async def update_active_boss_hp(self, boss_id: str, new_hp: int):
-        await self.conn.execute(
+        await self._write(
             "UPDATE active_world_bosses SET current_hp = ? WHERE boss_id = ?",
             (new_hp, boss_id)
         )
-        await self.conn.commit()
 
     async def delete_active_boss(self, boss_id: str):
-        await self.conn.execute("DELETE FROM active_world_bosses WHERE boss_id = ?", (boss_id,))
-        await self.conn.commit()
+        await self._write("DELETE FROM active_world_bosses WHERE boss_id = ?", (boss_id,))
 
     async def record_boss_damage(self, boss_id: str, user_id: str, user_name: str, damage: int):
         now = time.time()
-        await self.conn.execute("""
+        await self._write("""
             INSERT INTO world_boss_participants (boss_id, user_id, user_name, total_damage, last_attack_at) VALUES (?, ?, ?, ?, ?)
             ON CONFLICT(boss_id, user_id) DO UPDATE SET total_damage = total_damage + excluded.total_damage, last_attack_at = excluded.last_attack_at;
         """, (boss_id, user_id, user_name, damage, now))
-        await self.conn.commit()
 
     async def get_player_last_boss_attack(self, boss_id: str, user_id: str) -> Optional[float]:
         async with self.conn.execute(
@@ -81,26 +410,23 @@ class DataBase:
 
     async def clear_boss_data(self, boss_id: str):
         try:
-            await self.conn.execute("BEGIN")
-            await self.conn.execute("DELETE FROM active_world_bosses WHERE boss_id = ?", (boss_id,))
-            await self.conn.execute("DELETE FROM world_boss_participants WHERE boss_id = ?", (boss_id,))
-            await self.conn.commit()
+            async with self._transaction():
+                await self.conn.execute("DELETE FROM active_world_bosses WHERE boss_id = ?", (boss_id,))
+                await self.conn.execute("DELETE FROM world_boss_participants WHERE boss_id = ?", (boss_id,))
             logger.info(f"Boss {boss_id} 的数据已清理。")
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"清理Boss {boss_id} 数据失败: {e}")
 
     async def log_boss_kill(self, boss_id: str, boss_name: str, top_contributors: List[Dict[str, Any]]):
         now = time.time()
         contributors_json = json.dumps(top_contributors, ensure_ascii=False)
-        await self.conn.execute(
+        await self._write(
             "INSERT INTO world_boss_kill_logs (boss_id, boss_name, defeated_at, top_contributors) VALUES (?, ?, ?, ?)",
             (boss_id, boss_name, now, contributors_json)
         )
-        await self.conn.commit()
 
     async def get_boss_kill_logs(self, limit: int = 10) -> List[Dict[str, Any]]:
-        async with self.conn.execute(
+        async with self._reader() as conn, conn.execute(
             "SELECT * FROM world_boss_kill_logs ORDER BY defeated_at DESC LIMIT ?", (limit,)
         ) as cursor:
             rows = await cursor.fetchall()
@@ -120,195 +446,448 @@ class DataBase:
             row = await cursor.fetchone()
             return row[0] if row else None
 
-    async def get_top_players(self, limit: int) -> List[Player]:
-        async with self.conn.execute(
-            "SELECT * FROM players ORDER BY level_index DESC, experience DESC LIMIT ?", (limit,)
+    # ========== 内存排行榜 ==========
+
+    async def load_leaderboards(self):
+        """扫描一次 players 表构建内存排行榜（需在数据库迁移完成后调用）"""
+        if not self._leaderboard_enabled:
+            return
+        leaderboards = LeaderboardSet()
+        async with self._reader() as conn, conn.execute(
+            "SELECT user_id, level_index, experience, gold, combat_power, pvp_wins, pvp_losses FROM players"
         ) as cursor:
-            rows = await cursor.fetchall()
-            return [p for p in (self._safe_create_player(dict(row)) for row in rows) if p is not None]
+            row_to_player = self._player_rows.compile(cursor.description)
+            async for row in cursor:
+                leaderboards.stage(row_to_player(row))
+        leaderboards.build()
+        self.leaderboards = leaderboards
+        logger.info(f"内存排行榜已构建: {len(leaderboards.boards['realm'])} 名玩家")
+
+    async def _synced_leaderboards(self) -> Optional[LeaderboardSet]:
+        """返回已同步的内存排行榜；未启用时返回 None，由调用方走 SQL"""
+        leaderboards = self.leaderboards
+        if leaderboards is None:
+            return None
+        for user_id in list(leaderboards.stale):
+            player = await self.get_player_by_id(user_id)
+            if player is None:
+                for board in leaderboards.boards.values():
+                    board.remove(user_id)
+                leaderboards.stale.discard(user_id)
+            else:
+                leaderboards.update(player)
+        return leaderboards
 
     # ========== 排行榜相关方法 ==========
 
-    async def get_top_players_by_realm(self, limit: int = 10) -> List[Player]:
-        """获取境界排行榜（按境界等级和修为排序）"""
-        async with self.conn.execute(
-            "SELECT * FROM players ORDER BY level_index DESC, experience DESC LIMIT ?", (limit,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [p for p in (self._safe_create_player(dict(row)) for row in rows) if p is not None]
-
-    async def get_top_players_by_gold(self, limit: int = 10) -> List[Player]:
-        """获取财富排行榜（按灵石数量排序）"""
-        async with self.conn.execute(
-            "SELECT * FROM players ORDER BY gold DESC LIMIT ?", (limit,)
+    # 只读取 PlayerSummary 所需的列，不加载 realm_data 等 JSON 字段
+    _SUMMARY_COLUMNS = ", ".join(PLAYER_SUMMARY_FIELDS)
+    # 排行榜 SQL 回退时的筛选与排序，与内存排行榜的排序键一致
+    _RANKING_SQL = {
+        "realm": ("", "level_index DESC, experience DESC"),
+        "gold": ("", "gold DESC"),
+        "combat": ("", "combat_power DESC"),
+        "pvp": ("WHERE pvp_wins + pvp_losses > 0", "pvp_wins DESC, pvp_losses ASC"),
+    }
+
+    @asynccontextmanager
+    async def _ranking_reader(self):
+        """排行榜 SQL 查询使用的连接：允许时读取未超出陈旧时间的只读快照，否则同 _reader"""
+        if self.snapshot is not None and self.snapshot_rankings and self._active_uow() is None:
+            async with self.snapshot.acquire() as conn:
+                if conn is not None:
+                    yield conn
+                    return
+        async with self._reader() as conn:
+            yield conn
+
+    async def get_ranking_summaries(self, board: str, limit: int = 10) -> List[PlayerSummary]:
+        """获取某个排行榜（realm/gold/combat/pvp）前 limit 名的玩家摘要
+
+        依次使用内存排行榜、只读快照、主库查询。
+        """
+        leaderboards = await self._synced_leaderboards()
+        if leaderboards is not None:
+            return await self._load_summaries(leaderboards.top(board, limit))
+        where, order = self._RANKING_SQL[board]
+        async with self._ranking_reader() as conn, conn.execute(
+            f"SELECT {self._SUMMARY_COLUMNS} FROM players {where} ORDER BY {order} LIMIT ?", (limit,)
         ) as cursor:
-            rows = await cursor.fetchall()
-            return [p for p in (self._safe_create_player(dict(row)) for row in rows) if p is not None]
+            return [PlayerSummary(*row) for row in await cursor.fetchall()]
 
-    async def get_top_players_by_combat(self, limit: int = 10, config_manager: ConfigManager = None) -> List[tuple]:
-        """获取战力排行榜（按综合战力排序）"""
-        async with self.conn.execute("SELECT * FROM players") as cursor:
-            rows = await cursor.fetchall()
-            players = [p for p in (self._safe_create_player(dict(row)) for row in rows) if p is not None]
-
-        # 计算每个玩家的战力并排序
-        player_combat_list = []
-        for player in players:
-            combat_stats = player.get_combat_stats(config_manager) if config_manager else {
-                "attack": player.attack, "defense": player.defense, "max_hp": player.max_hp
-            }
-            # 战力公式：攻击*2 + 防御*1.5 + 生命*0.1
-            combat_power = int(combat_stats["attack"] * 2 + combat_stats["defense"] * 1.5 + combat_stats["max_hp"] * 0.1)
-            player_combat_list.append((player, combat_power))
-
-        # 按战力降序排序
-        player_combat_list.sort(key=lambda x: x[1], reverse=True)
-        return player_combat_list[:limit]
+    async def _load_summaries(self, user_ids: List[str]) -> List[PlayerSummary]:
+        """按给定顺序获取摘要：内存中已有的玩家直接投影，其余一次查询补齐"""
+        summaries: Dict[str, PlayerSummary] = {}
+        missing = []
+        for user_id in user_ids:
+            # 只读取字段做投影，不复制玩家，也不计入玩家缓存的命中统计
+            player = self._dirty_players.get(user_id) or self.player_cache.peek(user_id)
+            if player is not None:
+                summaries[user_id] = PlayerSummary.from_player(player)
+            else:
+                missing.append(user_id)
+        if missing:
+            placeholders = ", ".join("?" for _ in missing)
+            async with self._reader() as conn, conn.execute(
+                f"SELECT {self._SUMMARY_COLUMNS} FROM players WHERE user_id IN ({placeholders})", missing
+            ) as cursor:
+                for row in await cursor.fetchall():
+                    summaries[row[0]] = PlayerSummary(*row)
+        return [summaries[user_id] for user_id in user_ids if user_id in summaries]
+
+    # 快照上的排名查询：玩家自身的数值同样取自快照
+    _SNAPSHOT_RANK_SQL = {
+        "realm": """
+            SELECT (SELECT COUNT(*) FROM players WHERE level_index > p.level_index)
+                 + (SELECT COUNT(*) FROM players WHERE level_index = p.level_index AND experience > p.experience)
+                 + 1
+            FROM players p WHERE p.user_id = ?
+        """,
+        "gold": "SELECT (SELECT COUNT(*) FROM players WHERE gold > p.gold) + 1 FROM players p WHERE p.user_id = ?",
+        "combat": "SELECT (SELECT COUNT(*) FROM players WHERE combat_power > p.combat_power) + 1 FROM players p WHERE p.user_id = ?",
+        "pvp": """
+            SELECT CASE WHEN p.pvp_wins + p.pvp_losses = 0 THEN 0 ELSE
+                   (SELECT COUNT(*) FROM players WHERE pvp_wins > p.pvp_wins)
+                 + (SELECT COUNT(*) FROM players
+                    WHERE pvp_wins = p.pvp_wins AND pvp_losses < p.pvp_losses AND pvp_wins + pvp_losses > 0)
+                 + 1 END
+            FROM players p WHERE p.user_id = ?
+        """,
+    }
+
+    async def _snapshot_rank(self, board: str, user_id: str) -> Optional[int]:
+        """从快照查询排名；不读取快照、没有可用快照或快照中还没有该玩家时返回 None"""
+        if self.snapshot is None or not self.snapshot_rankings or self._active_uow() is not None:
+            return None
+        async with self.snapshot.acquire() as conn:
+            if conn is None:
+                return None
+            async with conn.execute(self._SNAPSHOT_RANK_SQL[board], (user_id,)) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
 
     async def get_player_realm_rank(self, user_id: str) -> int:
         """获取玩家的境界排名"""
-        async with self.conn.execute("""
-            SELECT COUNT(*) + 1 as rank FROM players p1
-            WHERE (p1.level_index > (SELECT level_index FROM players WHERE user_id = ?))
-            OR (p1.level_index = (SELECT level_index FROM players WHERE user_id = ?)
-                AND p1.experience > (SELECT experience FROM players WHERE user_id = ?))
-        """, (user_id, user_id, user_id)) as cursor:
+        leaderboards = await self._synced_leaderboards()
+        if leaderboards is not None:
+            return leaderboards.rank_of("realm", user_id)
+        rank = await self._snapshot_rank("realm", user_id)
+        if rank is not None:
+            return rank
+        player = await self.get_player_by_id(user_id)
+        if not player:
+            return 0
+        # 把 OR 条件拆成两段区间计数，均可在 idx_players_realm 上完成
+        async with self._reader() as conn, conn.execute("""
+            SELECT (SELECT COUNT(*) FROM players WHERE level_index > ?)
+                 + (SELECT COUNT(*) FROM players WHERE level_index = ? AND experience > ?)
+                 + 1 as rank
+        """, (player.level_index, player.level_index, player.experience)) as cursor:
             row = await cursor.fetchone()
             return row["rank"] if row else 0
 
     async def get_player_wealth_rank(self, user_id: str) -> int:
         """获取玩家的财富排名"""
-        async with self.conn.execute("""
-            SELECT COUNT(*) + 1 as rank FROM players
-            WHERE gold > (SELECT gold FROM players WHERE user_id = ?)
-        """, (user_id,)) as cursor:
+        leaderboards = await self._synced_leaderboards()
+        if leaderboards is not None:
+            return leaderboards.rank_of("gold", user_id)
+        rank = await self._snapshot_rank("gold", user_id)
+        if rank is not None:
+            return rank
+        player = await self.get_player_by_id(user_id)
+        if not player:
+            return 0
+        async with self._reader() as conn, conn.execute(
+            "SELECT COUNT(*) + 1 as rank FROM players WHERE gold > ?", (player.gold,)
+        ) as cursor:
             row = await cursor.fetchone()
             return row["rank"] if row else 0
 
-    async def get_player_combat_rank(self, user_id: str, config_manager: ConfigManager = None) -> int:
+    async def get_player_combat_rank(self, user_id: str) -> int:
         """获取玩家的战力排名"""
+        leaderboards = await self._synced_leaderboards()
+        if leaderboards is not None:
+            return leaderboards.rank_of("combat", user_id)
+        rank = await self._snapshot_rank("combat", user_id)
+        if rank is not None:
+            return rank
+        # 以 get_player_by_id 的结果为准，包含尚未写回的最新战力
         player = await self.get_player_by_id(user_id)
         if not player:
             return 0
-
-        combat_stats = player.get_combat_stats(config_manager) if config_manager else {
-            "attack": player.attack, "defense": player.defense, "max_hp": player.max_hp
-        }
-        player_power = int(combat_stats["attack"] * 2 + combat_stats["defense"] * 1.5 + combat_stats["max_hp"] * 0.1)
-
-        # 获取所有玩家并计算战力
-        async with self.conn.execute("SELECT * FROM players") as cursor:
-            rows = await cursor.fetchall()
-            players = [p for p in (self._safe_create_player(dict(row)) for row in rows) if p is not None]
-
-        rank = 1
-        for p in players:
-            p_stats = p.get_combat_stats(config_manager) if config_manager else {
-                "attack": p.attack, "defense": p.defense, "max_hp": p.max_hp
-            }
-            p_power = int(p_stats["attack"] * 2 + p_stats["defense"] * 1.5 + p_stats["max_hp"] * 0.1)
-            if p_power > player_power:
-                rank += 1
-
-        return rank
+        async with self._reader() as conn, conn.execute(
+            "SELECT COUNT(*) + 1 as rank FROM players WHERE combat_power > ?", (player.combat_power,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row["rank"] if row else 0
 
     async def get_all_players_count(self) -> int:
         """获取所有玩家数量"""
-        async with self.conn.execute("SELECT COUNT(*) as count FROM players") as cursor:
+        async with self._reader() as conn, conn.execute("SELECT COUNT(*) as count FROM players") as cursor:
             row = await cursor.fetchone()
             return row["count"] if row else 0
 
     async def get_player_by_id(self, user_id: str) -> Optional[Player]:
+        dirty = self._dirty_players.get(user_id)
+        if dirty is not None:
+            # 以快照为基准追踪之后的修改，写回冲突时只重放本次指令的增量
+            player = dirty.clone()
+            player.mark_clean()
+            return player
+        cached = self.player_cache.get(user_id)
+        if cached is not None:
+            return cached
+        player = await self._select_player(user_id)
+        if player is not None:
+            self._cache_player(player)
+        return player
+
+    async def _select_player(self, user_id: str) -> Optional[Player]:
         async with self.conn.execute("SELECT * FROM players WHERE user_id = ?", (user_id,)) as cursor:
             row = await cursor.fetchone()
             if not row:
                 return None
-            return self._safe_create_player(dict(row))
-
-    def _safe_create_player(self, row_dict: dict) -> Optional[Player]:
-        """安全创建Player对象，确保所有字段都有效并添加错误处理"""
-        try:
-            # 获取Player dataclass的所有有效字段名
-            valid_fields = {f.name for f in fields(Player)}
-            
-            # 只保留Player中定义的字段，过滤掉数据库中可能存在的额外列
-            filtered_dict = {k: v for k, v in row_dict.items() if k in valid_fields}
-            
-            # v2.3.0 新增字段的默认值
-            defaults = {
-                'learned_skills': '[]',
-                'active_buffs': '[]',
-                'pvp_wins': 0,
-                'pvp_losses': 0,
-                'last_pvp_time': 0.0,
-                'sect_contribution': 0,
-                # 其他可能缺失的旧字段
-                'equipped_weapon': None,
-                'equipped_armor': None,
-                'equipped_accessory': None,
-                'realm_id': None,
-                'realm_floor': 0,
-                'realm_data': None,
-                # v2.4.0 炼丹/炼器系统
-                'alchemy_level': 1,
-                'alchemy_exp': 0,
-                'smithing_level': 1,
-                'smithing_exp': 0,
-                'furnace_level': 1,
-                'forge_level': 1,
-                'unlocked_recipes': '[]',
-            }
-            
-            # 确保所有必需字段存在且有有效值
-            for field, default in defaults.items():
-                if field not in filtered_dict or filtered_dict[field] is None:
-                    filtered_dict[field] = default
-            
-            return Player(**filtered_dict)
-        except Exception as e:
-            from astrbot.api import logger
-            logger.error(f"创建Player对象失败: {e}, row_dict keys: {list(row_dict.keys())}")
-            return None
+            return self._player_rows.map_row(cursor.description, row)
+
+    def _player_update_sql(self, columns: Tuple[str, ...]) -> str:
+        """按列集合生成（并缓存）部分更新语句"""
+        sql = self._update_sql_cache.get(columns)
+        if sql is None:
+            set_clause = ", ".join([f"{c} = ?" for c in columns])
+            sql = f"UPDATE players SET {set_clause}, row_version = row_version + 1 WHERE user_id = ? AND row_version = ?"
+            self._update_sql_cache[columns] = sql
+        return sql
+
+    @staticmethod
+    def _player_update_params(player: Player, columns: Tuple[str, ...]) -> tuple:
+        return tuple(getattr(player, c) for c in columns) + (player.user_id, player.row_version)
+
+    # 写入冲突后重载、重放并重试的次数上限
+    WRITE_CONFLICT_RETRIES = 3
+
+    async def _write_player_row(self, player: Player, execute: Callable[[str, tuple], Awaitable[Any]]) -> bool:
+        """以 row_version 比较并交换的方式写入玩家的变更列
+
+        execute 为执行单条写语句的方法，调用方需持有写锁（事务、工作单元或 _write_player_committed）。
+        版本不一致说明该对象读取后有其他指令或进程写入过：重新读取最新行，重放本对象的修改后重试。
+        重载与重试都在同一把写锁内，进程内的其他写入无法插入，只有其他进程的写入会让重试再次冲突。
+        返回 False 表示玩家已被删除；无法合并时抛出 ValueError。
+        """
+        stats = self.write_conflict_stats
+        for _ in range(self.WRITE_CONFLICT_RETRIES + 1):
+            player.refresh_combat_power(self.config_manager)
+            columns = tuple(player.get_changed_fields())
+            if not columns:
+                return True
+            stats["writes"] += 1
+            cursor = await execute(self._player_update_sql(columns), self._player_update_params(player, columns))
+            if cursor.rowcount:
+                player.row_version += 1
+                return True
+            stats["conflicts"] += 1
+            latest = await self._select_player(player.user_id)
+            if latest is None:
+                return False
+            try:
+                player.rebase(latest)
+            except ValueError as e:
+                stats["failures"] += 1
+                logger.warning(f"玩家数据写入冲突且无法合并: {e}")
+                raise
+        stats["failures"] += 1
+        raise ValueError(f"玩家 {player.user_id} 连续 {self.WRITE_CONFLICT_RETRIES + 1} 次写入冲突")
+
+    async def _write_player_committed(self, player: Player) -> bool:
+        """在写锁内完成玩家行的比较并交换（含冲突重试），并等待其所在的组提交批次落盘"""
+        async with self._committer.lock:
+            written = await self._write_player_row(player, self.conn.execute)
+            if not self._committer.enabled:
+                await self.conn.commit()
+                return written
+            waiter = self._committer.join()
+        await waiter
+        return written
 
     async def create_player(self, player: Player):
-        player_fields = [f.name for f in fields(Player)]
-        columns = ", ".join(player_fields)
-        placeholders = ", ".join([f":{f}" for f in player_fields])
+        columns = ", ".join(PLAYER_FIELD_NAMES)
+        placeholders = ", ".join("?" for _ in PLAYER_FIELD_NAMES)
         sql = f"INSERT INTO players ({columns}) VALUES ({placeholders})"
-        await self.conn.execute(sql, player.__dict__)
-        await self.conn.commit()
+        player.refresh_combat_power(self.config_manager)
+        await self._write(sql, tuple(getattr(player, name) for name in PLAYER_FIELD_NAMES))
+        player.mark_clean()
+        self._cache_player(player)
 
     async def update_player(self, player: Player):
-        player_fields = [f.name for f in fields(Player) if f.name != 'user_id']
-        set_clause = ", ".join([f"{f} = :{f}" for f in player_fields])
-        sql = f"UPDATE players SET {set_clause} WHERE user_id = :user_id"
-        await self.conn.execute(sql, player.__dict__)
-        await self.conn.commit()
+        """只写回自加载以来发生变化的列"""
+        uow = self._active_uow()
+        if uow is not None:
+            await self._write_player_in_uow(player, uow)
+            return
+        if self.write_behind:
+            await self._mark_player_dirty(player)
+            return
+        if not await self._write_player_committed(player):
+            self._invalidate_player(player.user_id)
+            return
+        player.mark_clean()
+        self._cache_player(player)
+
+    async def _write_player_in_uow(self, player: Player, uow: _UnitOfWork):
+        """工作单元内直接写库，并把该玩家尚未刷新的脏列一并写入，保证原子性"""
+        pending = self._dirty_players.pop(player.user_id, None)
+        if pending is not None:
+            uow.requeue.setdefault(player.user_id, pending)
+            player.merge_changes(pending)
+        if not await self._write_player_row(player, self.conn.execute):
+            uow.touched.add(player.user_id)
+            return
+        player.mark_clean()
+        self._cache_player(player)
 
     async def update_players_in_transaction(self, players: List[Player]):
         if not players:
             return
-        player_fields = [f.name for f in fields(Player) if f.name != 'user_id']
-        set_clause = ", ".join([f"{f} = :{f}" for f in player_fields])
-        sql = f"UPDATE players SET {set_clause} WHERE user_id = :user_id"
-        try:
-            await self.conn.execute("BEGIN")
+        uow = self._active_uow()
+        if uow is not None:
             for player in players:
-                await self.conn.execute(sql, player.__dict__)
-            await self.conn.commit()
+                await self._write_player_in_uow(player, uow)
+            return
+        if self.write_behind:
+            for player in players:
+                await self._mark_player_dirty(player)
+            return
+        try:
+            async with self._transaction():
+                written = [await self._write_player_row(player, self.conn.execute) for player in players]
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"批量更新玩家事务失败: {e}")
             raise
+        for player, ok in zip(players, written):
+            if not ok:
+                self._invalidate_player(player.user_id)
+                continue
+            player.mark_clean()
+            self._cache_player(player)
+
+    # ========== 延迟写回（write-behind） ==========
+
+    async def _mark_player_dirty(self, player: Player):
+        """把玩家的变更列合并进待写回快照，批次写满时立即刷新"""
+        player.refresh_combat_power(self.config_manager)
+        pending = self._dirty_players.get(player.user_id)
+        if pending is None:
+            self._dirty_players[player.user_id] = player.clone()
+        else:
+            # 按列合并，避免基于旧快照的写入覆盖尚未刷新的其他列
+            for name in player.get_changed_fields():
+                setattr(pending, name, getattr(player, name))
+        player.mark_clean()
+        self._cache_player(player)
+        self.write_behind_stats["deferred_writes"] += 1
+        if len(self._dirty_players) >= self._flush_batch_size:
+            try:
+                await self.flush_dirty_players()
+            except aiosqlite.Error:
+                pass  # 数据已放回队列，由后台任务重试
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush_dirty_players()
+            except Exception as e:
+                logger.error(f"延迟写回刷新失败: {e}")
+
+    async def flush_dirty_players(self):
+        """将所有脏玩家数据在一个事务内写回数据库，相同列集合的行合并为一次 executemany"""
+        uow = self._active_uow()
+        if uow is not None:
+            # 工作单元已持有 _flush_lock；若外层回滚，这批快照需放回队列
+            await self._flush_dirty_players_locked(uow)
+            return
+        async with self._flush_lock:
+            await self._flush_dirty_players_locked(None)
+
+    async def _flush_dirty_players_locked(self, uow: Optional[_UnitOfWork]):
+        if not self._dirty_players or self.conn is None:
+            return
+        pending = self._dirty_players
+        self._dirty_players = {}
+        try:
+            async with self._transaction():
+                snapshots = await self._rebase_stale_snapshots(pending)
+                batches: Dict[Tuple[str, ...], List[tuple]] = {}
+                for player in snapshots.values():
+                    columns = tuple(player.get_changed_fields())
+                    if columns:
+                        batches.setdefault(columns, []).append(self._player_update_params(player, columns))
+                for columns, params in batches.items():
+                    cursor = await self.conn.executemany(self._player_update_sql(columns), params)
+                    if cursor.rowcount != len(params):
+                        raise sqlite3.OperationalError("玩家数据在写回期间被其他连接修改")
+        except aiosqlite.Error as e:
+            # 刷新失败时放回队列，但不覆盖期间产生的更新快照
+            for user_id, player in pending.items():
+                self._dirty_players.setdefault(user_id, player)
+            logger.error(f"延迟写回事务失败，{len(pending)} 条玩家数据将稍后重试: {e}")
+            raise
+        for user_id, player in pending.items():
+            snapshot = snapshots.get(user_id)
+            if snapshot is player:
+                self.player_cache.set_row_version(user_id, player.row_version, player.row_version + 1)
+            else:
+                # 重放合并过或未能写入的玩家，缓存与数据库已不一致
+                self._invalidate_player(user_id)
+        if uow is not None:
+            for user_id, player in pending.items():
+                uow.requeue.setdefault(user_id, player)
+        self.write_behind_stats["flushes"] += 1
+        self.write_behind_stats["flushed_rows"] += len(snapshots)
+
+    async def _rebase_stale_snapshots(self, pending: Dict[str, Player]) -> Dict[str, Player]:
+        """在写回事务内核对版本号，返回待写入的快照
+
+        版本号已变化的玩家（其他指令或进程写入过）重新读取最新行，在副本上重放快照中的修改，
+        原快照保留用于失败后放回队列。已删除或无法合并的玩家被丢弃。
+        """
+        stats = self.write_conflict_stats
+        versions: Dict[str, int] = {}
+        for chunk in _chunked(list(pending), 500):
+            placeholders = ", ".join("?" for _ in chunk)
+            async with self.conn.execute(
+                f"SELECT user_id, row_version FROM players WHERE user_id IN ({placeholders})", chunk
+            ) as cursor:
+                for row in await cursor.fetchall():
+                    versions[row[0]] = row[1]
+        snapshots: Dict[str, Player] = {}
+        for user_id, player in pending.items():
+            version = versions.get(user_id)
+            if version is None:
+                continue
+            stats["writes"] += 1
+            if version != player.row_version:
+                stats["conflicts"] += 1
+                latest = await self._select_player(user_id)
+                player = player.clone()
+                try:
+                    player.rebase(latest)
+                except ValueError as e:
+                    stats["failures"] += 1
+                    logger.error(f"延迟写回冲突且无法合并，丢弃该玩家的待写回数据: {e}")
+                    continue
+                player.refresh_combat_power(self.config_manager)
+            snapshots[user_id] = player
+        return snapshots
 
     async def create_sect(self, sect_name: str, leader_id: str) -> int:
-        async with self.conn.execute("INSERT INTO sects (name, leader_id) VALUES (?, ?)", (sect_name, leader_id)) as cursor:
-            await self.conn.commit()
-            return cursor.lastrowid
+        cursor = await self._write("INSERT INTO sects (name, leader_id) VALUES (?, ?)", (sect_name, leader_id))
+        return cursor.lastrowid
 
     async def delete_sect(self, sect_id: int):
-        await self.conn.execute("DELETE FROM sects WHERE id = ?", (sect_id,))
-        await self.conn.commit()
+        await self.flush_dirty_players()
+        await self._write("DELETE FROM sects WHERE id = ?", (sect_id,))
+        # 外键 ON DELETE SET NULL 会清空成员的 sect_id，缓存需同步失效
+        self.player_cache.invalidate_where(lambda p: p.sect_id == sect_id)
 
     async def get_sect_by_name(self, sect_name: str) -> Optional[Dict[str, Any]]:
         async with self.conn.execute("SELECT * FROM sects WHERE name = ?", (sect_name,)) as cursor:
@@ -323,92 +902,184 @@ class DataBase:
     async def get_sect_members(self, sect_id: int) -> List[Player]:
         async with self.conn.execute("SELECT * FROM players WHERE sect_id = ?", (sect_id,)) as cursor:
             rows = await cursor.fetchall()
-            return [p for p in (self._safe_create_player(dict(row)) for row in rows) if p is not None]
+            return self._player_rows.map_rows(cursor.description, rows)
 
-    async def update_player_sect(self, user_id: str, sect_id: Optional[int], sect_name: Optional[str]):
-        await self.conn.execute("UPDATE players SET sect_id = ?, sect_name = ? WHERE user_id = ?", (sect_id, sect_name, user_id))
-        await self.conn.commit()
+    async def get_sect_member_summaries(self, sect_id: int) -> List[PlayerSummary]:
+        """获取宗门成员摘要（用于成员列表、人数判断）"""
+        async with self.conn.execute(
+            f"SELECT {self._SUMMARY_COLUMNS} FROM players WHERE sect_id = ?", (sect_id,)
+        ) as cursor:
+            return [PlayerSummary(*row) for row in await cursor.fetchall()]
 
-    async def get_inventory_by_user_id(self, user_id: str, config_manager: ConfigManager) -> List[Dict[str, Any]]:
+    async def update_player_sect(self, user_id: str, sect_id: Optional[int], sect_name: Optional[str]):
+        await self.flush_dirty_players()
+        await self._write("UPDATE players SET sect_id = ?, sect_name = ? WHERE user_id = ?", (sect_id, sect_name, user_id))
+        self._invalidate_player(user_id)
+
+    async def _load_inventory(self, user_id: str) -> Dict[str, int]:
+        """获取玩家背包 item_id -> 数量（只读）；未缓存时整包读取一次"""
+        items = self.inventory_cache.get(user_id)
+        if items is not None:
+            return items
+        version = self.inventory_cache.version
         async with self.conn.execute("SELECT item_id, quantity FROM inventory WHERE user_id = ?", (user_id,)) as cursor:
             rows = await cursor.fetchall()
-            inventory_list = []
-            for row in rows:
-                item_id, quantity = row['item_id'], row['quantity']
-                item_info = config_manager.item_data.get(str(item_id))
-                if item_info:
-                     inventory_list.append({
-                        "item_id": item_id, "name": item_info.name,
-                        "quantity": quantity, "description": item_info.description,
-                        "rank": item_info.rank, "type": item_info.type
-                    })
-                else:
-                    inventory_list.append({
-                        "item_id": item_id, "name": f"未知物品(ID:{item_id})",
-                        "quantity": quantity, "description": "此物品信息已丢失",
-                        "rank": "未知", "type": "未知"
-                    })
-            return inventory_list
+        items = {row['item_id']: row['quantity'] for row in rows}
+        # 读取期间有背包写入提交时不填充，下次访问重新加载
+        if self.inventory_cache.version == version:
+            self.inventory_cache.put(user_id, items)
+        return items
+
+    async def get_inventory_by_user_id(self, user_id: str, config_manager: ConfigManager) -> List[Dict[str, Any]]:
+        inventory_list = []
+        for item_id, quantity in (await self._load_inventory(user_id)).items():
+            item_info = config_manager.item_data.get(str(item_id))
+            if item_info:
+                 inventory_list.append({
+                    "item_id": item_id, "name": item_info.name,
+                    "quantity": quantity, "description": item_info.description,
+                    "rank": item_info.rank, "type": item_info.type
+                })
+            else:
+                inventory_list.append({
+                    "item_id": item_id, "name": f"未知物品(ID:{item_id})",
+                    "quantity": quantity, "description": "此物品信息已丢失",
+                    "rank": "未知", "type": "未知"
+                })
+        return inventory_list
 
     async def get_item_from_inventory(self, user_id: str, item_id: str) -> Optional[Dict[str, Any]]:
-        async with self.conn.execute("SELECT item_id, quantity FROM inventory WHERE user_id = ? AND item_id = ?", (user_id, item_id)) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        quantity = (await self._load_inventory(user_id)).get(item_id)
+        return {"item_id": item_id, "quantity": quantity} if quantity else None
+
+    # 每条 VALUES 列表语句包含的行数（旧版 SQLite 单条语句最多绑定 999 个参数）
+    INVENTORY_BULK_ROWS = 300
+    # RETURNING 需要 SQLite 3.35+，更早的版本改为写入后再查询一次
+    _SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+    async def _bulk_change_inventory(self, user_id: str, consume: Dict[str, int],
+                                     produce: Dict[str, int]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """在当前事务内应用一整组背包增减，需由调用方包在 _transaction 中
+
+        consume 的充足性由一条集合查询校验，不足时不写入任何数据；净变化以一条 VALUES 列表 UPSERT
+        写入并通过 RETURNING 取回结果数量，归零的行最后一次删除。
+
+        Returns:
+            (不足的物品 -> 当前数量, 变化的物品 -> 结果数量)；第一项非空时未做修改
+        """
+        consume = {item_id: qty for item_id, qty in consume.items() if qty > 0}
+        missing: Dict[str, int] = {}
+        for chunk in _chunked(list(consume.items()), self.INVENTORY_BULK_ROWS):
+            values = ", ".join(["(?, ?)"] * len(chunk))
+            async with self.conn.execute(f"""
+                WITH need(item_id, quantity) AS (VALUES {values})
+                SELECT need.item_id, COALESCE(inventory.quantity, 0)
+                FROM need LEFT JOIN inventory ON inventory.user_id = ? AND inventory.item_id = need.item_id
+                WHERE COALESCE(inventory.quantity, 0) < need.quantity
+            """, (*[v for pair in chunk for v in pair], user_id)) as cursor:
+                missing.update({row[0]: row[1] for row in await cursor.fetchall()})
+        if missing:
+            return missing, {}
+
+        deltas = {item_id: -qty for item_id, qty in consume.items()}
+        for item_id, qty in produce.items():
+            if qty > 0:
+                deltas[item_id] = deltas.get(item_id, 0) + qty
+        rows = [(user_id, item_id, delta) for item_id, delta in deltas.items() if delta]
+
+        quantities: Dict[str, int] = {}
+        for chunk in _chunked(rows, self.INVENTORY_BULK_ROWS):
+            values = ", ".join(["(?, ?, ?)"] * len(chunk))
+            sql = f"""
+                INSERT INTO inventory (user_id, item_id, quantity) VALUES {values}
+                ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity
+            """
+            params = [v for row in chunk for v in row]
+            if self._SUPPORTS_RETURNING:
+                async with self.conn.execute(sql + " RETURNING item_id, quantity", params) as cursor:
+                    quantities.update({row[0]: row[1] for row in await cursor.fetchall()})
+            else:
+                await self.conn.execute(sql, params)
+                placeholders = ", ".join("?" for _ in chunk)
+                async with self.conn.execute(
+                    f"SELECT item_id, quantity FROM inventory WHERE user_id = ? AND item_id IN ({placeholders})",
+                    (user_id, *[row[1] for row in chunk])
+                ) as cursor:
+                    quantities.update({row[0]: row[1] for row in await cursor.fetchall()})
+
+        depleted = [item_id for item_id, qty in quantities.items() if qty <= 0]
+        for chunk in _chunked(depleted, self.INVENTORY_BULK_ROWS):
+            placeholders = ", ".join("?" for _ in chunk)
+            await self.conn.execute(
+                f"DELETE FROM inventory WHERE user_id = ? AND item_id IN ({placeholders})", (user_id, *chunk)
+            )
+        for item_id in depleted:
+            quantities[item_id] = 0
+        return {}, quantities
+
+    async def update_inventory(self, user_id: str, consume: Optional[Dict[str, int]] = None,
+                               produce: Optional[Dict[str, int]] = None) -> Tuple[bool, Dict[str, int]]:
+        """在一个事务内批量扣除 consume、增加 produce
+
+        Returns:
+            成功时为 (True, 变化物品的结果数量)，数量为0表示已移除；
+            材料不足时为 (False, 不足物品的当前数量)，背包不变
+        """
+        consume, produce = consume or {}, produce or {}
+        async with self._transaction() as tx:
+            missing, quantities = await self._bulk_change_inventory(user_id, consume, produce)
+            if missing:
+                tx.rollback()
+                return False, missing
+        self._set_inventory_quantities(user_id, quantities)
+        return True, quantities
 
     async def add_items_to_inventory_in_transaction(self, user_id: str, items: Dict[str, int]):
         try:
-            await self.conn.execute("BEGIN")
-            for item_id, quantity in items.items():
-                await self.conn.execute("""
-                    INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
-                    ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
-                """, (user_id, item_id, quantity))
-            await self.conn.commit()
+            await self.update_inventory(user_id, produce=items)
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"批量添加物品事务失败: {e}")
             raise
 
     async def remove_item_from_inventory(self, user_id: str, item_id: str, quantity: int = 1) -> bool:
         try:
-            await self.conn.execute("BEGIN")
-            cursor = await self.conn.execute("""
-                UPDATE inventory SET quantity = quantity - ?
-                WHERE user_id = ? AND item_id = ? AND quantity >= ?
-            """, (quantity, user_id, item_id, quantity))
+            async with self._transaction() as tx:
+                cursor = await self.conn.execute("""
+                    UPDATE inventory SET quantity = quantity - ?
+                    WHERE user_id = ? AND item_id = ? AND quantity >= ?
+                """, (quantity, user_id, item_id, quantity))
 
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False
+                if cursor.rowcount == 0:
+                    tx.rollback()
+                    return False
 
-            await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
-            await self.conn.commit()
-            return True
+                await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"移除物品事务失败: {e}")
             return False
+        self._apply_inventory_delta(user_id, {item_id: -quantity})
+        return True
 
     async def transactional_buy_item(self, user_id: str, item_id: str, quantity: int, total_cost: int) -> Tuple[bool, str]:
+        await self.flush_dirty_players()
         try:
-            await self.conn.execute("BEGIN")
-            cursor = await self.conn.execute(
-                "UPDATE players SET gold = gold - ? WHERE user_id = ? AND gold >= ?",
-                (total_cost, user_id, total_cost)
-            )
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False, "ERROR_INSUFFICIENT_FUNDS"
-
-            await self.conn.execute("""
-                INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
-                ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
-            """, (user_id, item_id, quantity))
+            async with self._transaction() as tx:
+                cursor = await self.conn.execute(
+                    "UPDATE players SET gold = gold - ? WHERE user_id = ? AND gold >= ?",
+                    (total_cost, user_id, total_cost)
+                )
+                if cursor.rowcount == 0:
+                    tx.rollback()
+                    return False, "ERROR_INSUFFICIENT_FUNDS"
 
-            await self.conn.commit()
+                await self.conn.execute("""
+                    INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
+                    ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
+                """, (user_id, item_id, quantity))
+            self._invalidate_player(user_id)
+            self._apply_inventory_delta(user_id, {item_id: quantity})
             return True, "SUCCESS"
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"购买物品事务失败: {e}")
             return False, "ERROR_DATABASE"
 
@@ -422,48 +1093,195 @@ class DataBase:
             effect: 物品效果
             actual_max_hp: 实际最大血量（包含装备/功法加成），如果为0则使用数据库中的max_hp
         """
+        await self.flush_dirty_players()
         try:
-            await self.conn.execute("BEGIN")
-            cursor = await self.conn.execute(
-                "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
-                (quantity, user_id, item_id, quantity)
-            )
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False
-
-            await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
-
-            # 如果提供了实际最大血量，使用它来限制恢复；否则使用数据库中的max_hp
-            if actual_max_hp > 0:
-                await self.conn.execute(
-                    """
-                    UPDATE players
-                    SET experience = experience + ?,
-                        gold = gold + ?,
-                        hp = MIN(?, hp + ?)
-                    WHERE user_id = ?
-                    """,
-                    (effect.experience, effect.gold, actual_max_hp, effect.hp, user_id)
-                )
-            else:
-                await self.conn.execute(
-                    """
-                    UPDATE players
-                    SET experience = experience + ?,
-                        gold = gold + ?,
-                        hp = MIN(max_hp, hp + ?)
-                    WHERE user_id = ?
-                    """,
-                    (effect.experience, effect.gold, effect.hp, user_id)
+            async with self._transaction() as tx:
+                cursor = await self.conn.execute(
+                    "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
+                    (quantity, user_id, item_id, quantity)
                 )
-            await self.conn.commit()
+                if cursor.rowcount == 0:
+                    tx.rollback()
+                    return False
+
+                await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
+
+                # 如果提供了实际最大血量，使用它来限制恢复；否则使用数据库中的max_hp
+                if actual_max_hp > 0:
+                    await self.conn.execute(
+                        """
+                        UPDATE players
+                        SET experience = experience + ?,
+                            gold = gold + ?,
+                            hp = MIN(?, hp + ?)
+                        WHERE user_id = ?
+                        """,
+                        (effect.experience, effect.gold, actual_max_hp, effect.hp, user_id)
+                    )
+                else:
+                    await self.conn.execute(
+                        """
+                        UPDATE players
+                        SET experience = experience + ?,
+                            gold = gold + ?,
+                            hp = MIN(max_hp, hp + ?)
+                        WHERE user_id = ?
+                        """,
+                        (effect.experience, effect.gold, effect.hp, user_id)
+                    )
+            self._invalidate_player(user_id)
+            self._apply_inventory_delta(user_id, {item_id: -quantity})
             return True
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"使用物品事务失败: {e}")
             return False
 
+    # ========== 每日计数器 ==========
+
+    # 同一批次内的脏计数达到此数量时立即写回
+    DAILY_COUNTER_BATCH_SIZE = 256
+
+    async def get_daily_counter(self, scope: str, user_id: str, counter_date: str, key: str = "") -> int:
+        """读取每日计数；当天的值命中内存时不访问数据库"""
+        store = self.daily_counters
+        if store.accepts(counter_date):
+            cached = store.get(scope, user_id, key)
+            if cached is not None:
+                return cached
+        else:
+            await self._settle_past_counter(scope, user_id, counter_date, key)
+        async with self.conn.execute(
+            "SELECT count FROM daily_counters WHERE scope = ? AND user_id = ? AND counter_key = ? AND counter_date = ?",
+            (scope, user_id, key, counter_date)
+        ) as cursor:
+            row = await cursor.fetchone()
+            value = row["count"] if row else 0
+        if store.accepts(counter_date):
+            store.load(scope, user_id, key, value)
+            return store.get(scope, user_id, key)
+        return value
+
+    async def increment_daily_counter(self, scope: str, user_id: str, counter_date: str,
+                                      amount: int = 1, key: str = "") -> int:
+        """累加每日计数并返回新值"""
+        await self.get_daily_counter(scope, user_id, counter_date, key)
+        if not self.daily_counters.accepts(counter_date):
+            # 跨天后才到达的旧日期请求，直接写库
+            await self._settle_past_counter(scope, user_id, counter_date, key)
+            await self._write("""
+                INSERT INTO daily_counters (scope, user_id, counter_key, counter_date, count) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(scope, user_id, counter_key, counter_date) DO UPDATE SET count = count + excluded.count
+            """, (scope, user_id, key, counter_date, amount))
+            return await self.get_daily_counter(scope, user_id, counter_date, key)
+        value = self.daily_counters.add(scope, user_id, key, amount)
+        await self._after_counter_change()
+        return value
+
+    async def set_daily_counter(self, scope: str, user_id: str, counter_date: str, value: int, key: str = ""):
+        """直接设置每日计数（用于任务进度等非累加场景）"""
+        if not self.daily_counters.accepts(counter_date):
+            await self._settle_past_counter(scope, user_id, counter_date, key)
+            await self._write("""
+                INSERT INTO daily_counters (scope, user_id, counter_key, counter_date, count) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(scope, user_id, counter_key, counter_date) DO UPDATE SET count = excluded.count
+            """, (scope, user_id, key, counter_date, value))
+            return
+        self.daily_counters.set(scope, user_id, key, value)
+        await self._after_counter_change()
+
+    async def _settle_past_counter(self, scope: str, user_id: str, counter_date: str, key: str):
+        """直接读写已过去的日期前，先写回该计数仍在内存中（或正在写回）的绝对值，
+        否则稍后的写回会覆盖直接写库的增量"""
+        if self._counter_flush_lock.locked() or self.daily_counters.is_dirty(scope, user_id, key, counter_date):
+            await self.flush_daily_counters()
+
+    async def _after_counter_change(self):
+        if self._counter_flush_interval == 0 or self.daily_counters.dirty_count >= self.DAILY_COUNTER_BATCH_SIZE:
+            await self.flush_daily_counters()
+
+    async def _counter_flush_loop(self):
+        while True:
+            await asyncio.sleep(self._counter_flush_interval)
+            try:
+                await self.flush_daily_counters()
+            except Exception as e:
+                logger.error(f"每日计数器写回失败: {e}")
+
+    async def flush_daily_counters(self):
+        """把内存中修改过的每日计数以绝对值批量写回"""
+        async with self._counter_flush_lock:
+            if self.conn is None or self.daily_counters.dirty_count == 0:
+                return
+            dirty = self.daily_counters.take_dirty()
+            params = [(scope, user_id, key, date, value) for (scope, user_id, key, date), value in dirty.items()]
+            try:
+                async with self._transaction():
+                    await self.conn.executemany("""
+                        INSERT INTO daily_counters (scope, user_id, counter_key, counter_date, count) VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(scope, user_id, counter_key, counter_date) DO UPDATE SET count = excluded.count
+                    """, params)
+            except aiosqlite.Error as e:
+                self.daily_counters.requeue(dirty)
+                logger.error(f"每日计数器写回失败，{len(dirty)} 条将稍后重试: {e}")
+                raise
+
+    # ========== 数据保留 ==========
+
+    async def table_exists(self, table: str) -> bool:
+        async with self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ) as cursor:
+            return await cursor.fetchone() is not None
+
+    async def purge_rows_before(self, table: str, date_column: str, row_key: str, cutoff: str, limit: int) -> int:
+        """删除一块日期早于 cutoff 的行（最多 limit 行），返回删除数量"""
+        cursor = await self._write(f"""
+            DELETE FROM {table} WHERE ({row_key}) IN (
+                SELECT {row_key} FROM {table} WHERE {date_column} < ? LIMIT ?
+            )
+        """, (cutoff, limit))
+        return cursor.rowcount
+
+    async def fetch_log_rows_before(self, table: str, ts_column: str, cutoff: float, limit: int) -> List[Dict[str, Any]]:
+        """按 id 顺序取出一块时间早于 cutoff 的日志行（供归档使用）"""
+        async with self.conn.execute(
+            f"SELECT * FROM {table} WHERE {ts_column} < ? ORDER BY id LIMIT ?", (cutoff, limit)
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def delete_log_rows(self, table: str, ids: List[int]):
+        if not ids:
+            return
+        placeholders = ", ".join("?" for _ in ids)
+        await self._write(f"DELETE FROM {table} WHERE id IN ({placeholders})", tuple(ids))
+
+    async def get_auto_vacuum_mode(self) -> str:
+        async with self.conn.execute("PRAGMA auto_vacuum") as cursor:
+            mode = (await cursor.fetchone())[0]
+        return {0: "none", 1: "full", 2: "incremental"}.get(mode, str(mode))
+
+    async def incremental_vacuum(self, max_pages: int) -> int:
+        """归还至多 max_pages 个空闲页，返回实际归还的页数"""
+        async with self._committer.lock:
+            await self._committer.flush()
+            async with self.conn.execute("PRAGMA freelist_count") as cursor:
+                before = (await cursor.fetchone())[0]
+            # incremental_vacuum 每一步只归还一页，execute 只会执行第一步，需用 executescript 跑完
+            await self.conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+            async with self.conn.execute("PRAGMA freelist_count") as cursor:
+                after = (await cursor.fetchone())[0]
+        return max(0, before - after)
+
+    async def enable_incremental_vacuum(self):
+        """把已有数据库转换为 auto_vacuum=INCREMENTAL
+
+        已建表的数据库修改 auto_vacuum 后必须完整 VACUUM 一次才生效，耗时与文件大小成正比，期间写入会排队等待。
+        """
+        async with self._committer.lock:
+            await self._committer.flush()
+            await self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            await self.conn.execute("VACUUM")
+
     # ========== 每日任务相关方法 ==========
 
     async def get_daily_task_progress(self, user_id: str, task_date: str) -> Dict[str, bool]:
@@ -477,12 +1295,11 @@ class DataBase:
 
     async def complete_daily_task(self, user_id: str, task_date: str, task_id: str):
         """标记每日任务为已完成"""
-        await self.conn.execute("""
+        await self._write("""
             INSERT INTO daily_task_progress (user_id, task_date, task_id, completed)
             VALUES (?, ?, ?, 1)
             ON CONFLICT(user_id, task_date, task_id) DO UPDATE SET completed = 1
         """, (user_id, task_date, task_id))
-        await self.conn.commit()
 
     async def get_claimed_daily_tasks(self, user_id: str, task_date: str) -> List[str]:
         """获取已领取奖励的任务列表"""
@@ -495,11 +1312,10 @@ class DataBase:
 
     async def mark_daily_task_claimed(self, user_id: str, task_date: str, task_id: str):
         """标记任务奖励已领取"""
-        await self.conn.execute("""
+        await self._write("""
             UPDATE daily_task_progress SET claimed = 1
             WHERE user_id = ? AND task_date = ? AND task_id = ?
         """, (user_id, task_date, task_id))
-        await self.conn.commit()
 
     async def is_daily_bonus_claimed(self, user_id: str, claim_date: str) -> bool:
         """检查全勤奖励是否已领取"""
@@ -511,29 +1327,18 @@ class DataBase:
 
     async def mark_daily_bonus_claimed(self, user_id: str, claim_date: str):
         """标记全勤奖励已领取"""
-        await self.conn.execute(
+        await self._write(
             "INSERT OR IGNORE INTO daily_bonus_claimed (user_id, claim_date) VALUES (?, ?)",
             (user_id, claim_date)
         )
-        await self.conn.commit()
 
     async def get_task_counter(self, user_id: str, task_date: str, task_id: str) -> int:
         """获取任务进度计数器（用于需要多次完成的任务）"""
-        async with self.conn.execute(
-            "SELECT progress FROM daily_task_counter WHERE user_id = ? AND task_date = ? AND task_id = ?",
-            (user_id, task_date, task_id)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["progress"] if row else 0
+        return await self.get_daily_counter(SCOPE_TASK, user_id, task_date, key=task_id)
 
     async def set_task_counter(self, user_id: str, task_date: str, task_id: str, progress: int):
         """设置任务进度计数器"""
-        await self.conn.execute("""
-            INSERT INTO daily_task_counter (user_id, task_date, task_id, progress)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user_id, task_date, task_id) DO UPDATE SET progress = ?
-        """, (user_id, task_date, task_id, progress, progress))
-        await self.conn.commit()
+        await self.set_daily_counter(SCOPE_TASK, user_id, task_date, progress, key=task_id)
 
     async def get_check_in_streak(self, user_id: str) -> int:
         """获取连续签到天数"""
@@ -546,12 +1351,11 @@ class DataBase:
 
     async def update_check_in_streak(self, user_id: str, streak: int, last_date: str):
         """更新连续签到记录"""
-        await self.conn.execute("""
+        await self._write("""
             INSERT INTO check_in_streak (user_id, streak, last_check_in_date)
             VALUES (?, ?, ?)
             ON CONFLICT(user_id) DO UPDATE SET streak = ?, last_check_in_date = ?
         """, (user_id, streak, last_date, streak, last_date))
-        await self.conn.commit()
 
     async def get_last_check_in_date(self, user_id: str) -> Optional[str]:
         """获取上次签到日期"""
@@ -572,60 +1376,38 @@ class DataBase:
 
     async def mark_streak_reward_claimed(self, user_id: str, streak: int):
         """标记连续签到奖励已领取"""
-        await self.conn.execute(
+        await self._write(
             "INSERT OR IGNORE INTO streak_reward_claimed (user_id, streak_milestone) VALUES (?, ?)",
             (user_id, streak)
         )
-        await self.conn.commit()
 
     # ========== 奇遇系统相关方法 ==========
 
     async def get_daily_adventure_count(self, user_id: str, adventure_date: str) -> int:
         """获取玩家当日奇遇次数"""
-        async with self.conn.execute(
-            "SELECT count FROM daily_adventure_count WHERE user_id = ? AND adventure_date = ?",
-            (user_id, adventure_date)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"] if row else 0
+        return await self.get_daily_counter(SCOPE_ADVENTURE, user_id, adventure_date)
 
     async def increment_adventure_count(self, user_id: str, adventure_date: str):
         """增加玩家当日奇遇次数"""
-        await self.conn.execute("""
-            INSERT INTO daily_adventure_count (user_id, adventure_date, count)
-            VALUES (?, ?, 1)
-            ON CONFLICT(user_id, adventure_date) DO UPDATE SET count = count + 1
-        """, (user_id, adventure_date))
-        await self.conn.commit()
+        await self.increment_daily_counter(SCOPE_ADVENTURE, user_id, adventure_date)
 
     async def add_adventure_log(self, user_id: str, adventure_date: str, adventure_type: str,
                                  result: str, reward_gold: int, reward_exp: int, created_at: float):
         """添加奇遇记录"""
-        await self.conn.execute("""
+        await self._append_log("""
             INSERT INTO adventure_log (user_id, adventure_date, adventure_type, result, reward_gold, reward_exp, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (user_id, adventure_date, adventure_type, result, reward_gold, reward_exp, created_at))
-        await self.conn.commit()
 
     # ========== 悬赏任务相关方法 ==========
 
     async def get_daily_bounty_count(self, user_id: str, bounty_date: str) -> int:
         """获取玩家当日悬赏任务完成次数"""
-        async with self.conn.execute(
-            "SELECT count FROM daily_bounty_count WHERE user_id = ? AND bounty_date = ?",
-            (user_id, bounty_date)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"] if row else 0
+        return await self.get_daily_counter(SCOPE_BOUNTY, user_id, bounty_date)
 
     async def increment_bounty_count(self, user_id: str, bounty_date: str):
         """增加玩家当日悬赏任务完成次数"""
-        await self.conn.execute("""
-            INSERT INTO daily_bounty_count (user_id, bounty_date, count)
-            VALUES (?, ?, 1)
-            ON CONFLICT(user_id, bounty_date) DO UPDATE SET count = count + 1
-        """, (user_id, bounty_date))
-        await self.conn.commit()
+        await self.increment_daily_counter(SCOPE_BOUNTY, user_id, bounty_date)
 
     # ========== 交易系统相关方法 ==========
 
@@ -633,35 +1415,103 @@ class DataBase:
                           item_id: str = None, quantity: int = None, gold_amount: int = 0):
         """记录交易日志"""
         import time
-        await self.conn.execute("""
+        await self._append_log("""
             INSERT INTO trade_log (from_user_id, to_user_id, trade_type, item_id, quantity, gold_amount, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (from_user_id, to_user_id, trade_type, item_id, quantity, gold_amount, time.time()))
-        await self.conn.commit()
 
-    # ========== PVP排行榜相关方法 ==========
+    # ========== 灵石账本 ==========
 
-    async def get_top_players_by_pvp(self, limit: int = 10) -> List[Player]:
-        """获取PVP排行榜（按胜场和胜率排序）"""
-        async with self.conn.execute(
-            "SELECT * FROM players WHERE pvp_wins + pvp_losses > 0 ORDER BY pvp_wins DESC, pvp_losses ASC LIMIT ?", 
-            (limit,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [p for p in (self._safe_create_player(dict(row)) for row in rows) if p is not None]
+    _LEDGER_INSERT_SQL = (
+        "INSERT INTO gold_ledger (from_user_id, to_user_id, amount, tax, reason, created_at) VALUES (?, ?, ?, ?, ?, ?)"
+    )
+
+    async def _move_gold_in_tx(self, from_user_id: Optional[str], to_user_id: Optional[str], amount: int,
+                               tax: int, reason: str) -> bool:
+        """在当前事务内执行一次灵石转移并记账，任一方余额更新失败返回 False（由调用方回滚）"""
+        if from_user_id is not None:
+            cursor = await self.conn.execute(
+                "UPDATE players SET gold = gold - ? WHERE user_id = ? AND gold >= ?",
+                (amount, from_user_id, amount)
+            )
+            if cursor.rowcount == 0:
+                return False
+        if to_user_id is not None and amount > tax:
+            cursor = await self.conn.execute(
+                "UPDATE players SET gold = gold + ? WHERE user_id = ?", (amount - tax, to_user_id)
+            )
+            if cursor.rowcount == 0:
+                return False
+        await self.conn.execute(self._LEDGER_INSERT_SQL, (from_user_id, to_user_id, amount, tax, reason, time.time()))
+        return True
+
+    async def move_gold(self, from_user_id: Optional[str], to_user_id: Optional[str], amount: int,
+                        tax: int = 0, reason: str = "") -> bool:
+        """原子转移灵石并写入账本，不需要写回整行玩家数据
+
+        from_user_id 为 None 表示系统发放，to_user_id 为 None 表示流出（消耗、捐献等）。
+        付款方扣除 amount，余额不足时失败；收款方到账 amount - tax，收款方不存在时整体回滚。
+        """
+        if amount <= 0 or not 0 <= tax <= amount:
+            raise ValueError(f"无效的灵石转移: amount={amount}, tax={tax}")
+        await self.flush_dirty_players()
+        try:
+            async with self._transaction() as tx:
+                if not await self._move_gold_in_tx(from_user_id, to_user_id, amount, tax, reason):
+                    tx.rollback()
+                    return False
+        except aiosqlite.Error as e:
+            logger.error(f"灵石转移事务失败: {e}")
+            return False
+        for user_id in (from_user_id, to_user_id):
+            if user_id is not None:
+                self._invalidate_player(user_id)
+        return True
+
+    async def grant_gold(self, payouts: Dict[str, int], reason: str = "") -> int:
+        """系统向多名玩家发放灵石（如世界Boss结算），余额与账本各一次批量执行，返回到账人数"""
+        rows = [(amount, user_id) for user_id, amount in payouts.items() if amount > 0]
+        if not rows:
+            return 0
+        await self.flush_dirty_players()
+        now = time.time()
+        try:
+            async with self._transaction():
+                cursor = await self.conn.executemany("UPDATE players SET gold = gold + ? WHERE user_id = ?", rows)
+                granted = cursor.rowcount
+                # 只为存在的玩家记账
+                await self.conn.executemany(
+                    "INSERT INTO gold_ledger (from_user_id, to_user_id, amount, tax, reason, created_at) "
+                    "SELECT NULL, user_id, ?, 0, ?, ? FROM players WHERE user_id = ?",
+                    [(amount, reason, now, user_id) for amount, user_id in rows]
+                )
+        except aiosqlite.Error as e:
+            logger.error(f"批量发放灵石事务失败: {e}")
+            raise
+        for _, user_id in rows:
+            self._invalidate_player(user_id)
+        return granted
+
+    # ========== PVP排行榜相关方法 ==========
 
     async def get_player_pvp_rank(self, user_id: str) -> int:
         """获取玩家的PVP排名"""
+        leaderboards = await self._synced_leaderboards()
+        if leaderboards is not None:
+            return leaderboards.rank_of("pvp", user_id)
+        rank = await self._snapshot_rank("pvp", user_id)
+        if rank is not None:
+            return rank
         player = await self.get_player_by_id(user_id)
         if not player or (player.pvp_wins + player.pvp_losses == 0):
             return 0
         
-        async with self.conn.execute("""
-            SELECT COUNT(*) + 1 as rank FROM players
-            WHERE pvp_wins > (SELECT pvp_wins FROM players WHERE user_id = ?)
-            OR (pvp_wins = (SELECT pvp_wins FROM players WHERE user_id = ?)
-                AND pvp_losses < (SELECT pvp_losses FROM players WHERE user_id = ?))
-        """, (user_id, user_id, user_id)) as cursor:
+        # 与境界排名相同，拆成两段 idx_players_pvp 上的区间计数
+        async with self._reader() as conn, conn.execute("""
+            SELECT (SELECT COUNT(*) FROM players WHERE pvp_wins > ?)
+                 + (SELECT COUNT(*) FROM players WHERE pvp_wins = ? AND pvp_losses < ? AND pvp_wins + pvp_losses > 0)
+                 + 1 as rank
+        """, (player.pvp_wins, player.pvp_wins, player.pvp_losses)) as cursor:
             row = await cursor.fetchone()
             return row["rank"] if row else 0
 
@@ -669,26 +1519,27 @@ class DataBase:
 
     async def donate_to_sect(self, user_id: str, sect_id: int, amount: int) -> bool:
         """捐献灵石给宗门，增加贡献度和宗门资金"""
+        await self.flush_dirty_players()
         try:
-            await self.conn.execute("BEGIN")
-            # 扣除玩家灵石
-            cursor = await self.conn.execute(
-                "UPDATE players SET gold = gold - ?, sect_contribution = sect_contribution + ? WHERE user_id = ? AND gold >= ?",
-                (amount, amount, user_id, amount)
-            )
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False
-            
-            # 增加宗门资金和经验
-            await self.conn.execute(
-                "UPDATE sects SET funds = funds + ?, exp = exp + ? WHERE id = ?",
-                (amount, amount // 10, sect_id)
-            )
-            await self.conn.commit()
+            async with self._transaction() as tx:
+                # 扣除玩家灵石
+                cursor = await self.conn.execute(
+                    "UPDATE players SET gold = gold - ?, sect_contribution = sect_contribution + ? WHERE user_id = ? AND gold >= ?",
+                    (amount, amount, user_id, amount)
+                )
+                if cursor.rowcount == 0:
+                    tx.rollback()
+                    return False
+
+                # 增加宗门资金和经验
+                await self.conn.execute(
+                    "UPDATE sects SET funds = funds + ?, exp = exp + ? WHERE id = ?",
+                    (amount, amount // 10, sect_id)
+                )
+                await self.conn.execute(self._LEDGER_INSERT_SQL, (user_id, None, amount, 0, f"sect_donate:{sect_id}", time.time()))
+            self._invalidate_player(user_id)
             return True
         except Exception as e:
-            await self.conn.rollback()
             logger.error(f"宗门捐献失败: {e}")
             return False
 
@@ -702,7 +1553,8 @@ class DataBase:
         exp = sect.get('exp', 0)
         level = 1 + exp // 10000
         
-        members = await self.get_sect_members(sect_id)
+        # 成员只需展示字段，读取摘要投影而不是整行玩家数据
+        members = await self.get_sect_member_summaries(sect_id)
         
         return {
             **sect,
@@ -717,51 +1569,41 @@ class DataBase:
                               success: bool, quality: str, output_count: int):
         """记录炼制日志"""
         import time
-        await self.conn.execute("""
+        await self._append_log("""
             INSERT INTO crafting_log (user_id, craft_type, recipe_id, success, quality, output_count, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (user_id, craft_type, recipe_id, 1 if success else 0, quality, output_count, time.time()))
-        await self.conn.commit()
 
     async def get_daily_sell_count(self, user_id: str, sell_date: str) -> int:
         """获取玩家当日回购次数"""
-        async with self.conn.execute(
-            "SELECT count FROM daily_sell_count WHERE user_id = ? AND sell_date = ?",
-            (user_id, sell_date)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"] if row else 0
+        return await self.get_daily_counter(SCOPE_SELL, user_id, sell_date)
 
     async def increment_sell_count(self, user_id: str, sell_date: str):
         """增加玩家当日回购次数"""
-        await self.conn.execute("""
-            INSERT INTO daily_sell_count (user_id, sell_date, count)
-            VALUES (?, ?, 1)
-            ON CONFLICT(user_id, sell_date) DO UPDATE SET count = count + 1
-        """, (user_id, sell_date))
-        await self.conn.commit()
+        await self.increment_daily_counter(SCOPE_SELL, user_id, sell_date)
 
     async def transactional_sell_item(self, user_id: str, item_id: str, quantity: int, total_price: int) -> Tuple[bool, str]:
         """出售物品事务"""
+        await self.flush_dirty_players()
         try:
-            await self.conn.execute("BEGIN")
-            cursor = await self.conn.execute(
-                "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
-                (quantity, user_id, item_id, quantity)
-            )
-            if cursor.rowcount == 0:
-                await self.conn.rollback()
-                return False, "ERROR_INSUFFICIENT_ITEMS"
+            async with self._transaction() as tx:
+                cursor = await self.conn.execute(
+                    "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
+                    (quantity, user_id, item_id, quantity)
+                )
+                if cursor.rowcount == 0:
+                    tx.rollback()
+                    return False, "ERROR_INSUFFICIENT_ITEMS"
 
-            await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
-            await self.conn.execute(
-                "UPDATE players SET gold = gold + ? WHERE user_id = ?",
-                (total_price, user_id)
-            )
-            await self.conn.commit()
+                await self.conn.execute("DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", (user_id, item_id))
+                await self.conn.execute(
+                    "UPDATE players SET gold = gold + ? WHERE user_id = ?",
+                    (total_price, user_id)
+                )
+            self._invalidate_player(user_id)
+            self._apply_inventory_delta(user_id, {item_id: -quantity})
             return True, "SUCCESS"
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"出售物品事务失败: {e}")
             return False, "ERROR_DATABASE"
 
@@ -769,71 +1611,37 @@ class DataBase:
                                         output_id: str, output_count: int) -> Tuple[bool, str]:
         """炼制物品事务 - 消耗材料，产出物品"""
         try:
-            await self.conn.execute("BEGIN")
-            
-            # 检查并消耗所有材料
-            for item_id, quantity in materials.items():
-                cursor = await self.conn.execute(
-                    "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
-                    (quantity, user_id, item_id, quantity)
-                )
-                if cursor.rowcount == 0:
-                    await self.conn.rollback()
-                    return False, f"ERROR_INSUFFICIENT_MATERIAL_{item_id}"
-                
-                await self.conn.execute(
-                    "DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", 
-                    (user_id, item_id)
-                )
-            
-            # 添加产出物品
-            await self.conn.execute("""
-                INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)
-                ON CONFLICT(user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity;
-            """, (user_id, output_id, output_count))
-            
-            await self.conn.commit()
+            async with self._transaction() as tx:
+                missing, quantities = await self._bulk_change_inventory(user_id, materials, {output_id: output_count})
+                if missing:
+                    tx.rollback()
+                    return False, f"ERROR_INSUFFICIENT_MATERIAL_{next(i for i in materials if i in missing)}"
+            self._set_inventory_quantities(user_id, quantities)
             return True, "SUCCESS"
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"炼制物品事务失败: {e}")
             return False, "ERROR_DATABASE"
 
     async def transactional_craft_fail(self, user_id: str, materials: Dict[str, int], 
                                         loss_ratio: float = 0.5) -> Tuple[bool, str]:
         """炼制失败事务 - 消耗部分材料"""
+        losses = {item_id: max(1, int(quantity * loss_ratio)) for item_id, quantity in materials.items()}
         try:
-            await self.conn.execute("BEGIN")
-            
-            for item_id, quantity in materials.items():
-                loss_count = max(1, int(quantity * loss_ratio))
-                cursor = await self.conn.execute(
-                    "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
-                    (loss_count, user_id, item_id, loss_count)
-                )
-                if cursor.rowcount == 0:
-                    await self.conn.rollback()
-                    return False, f"ERROR_INSUFFICIENT_MATERIAL_{item_id}"
-                
-                await self.conn.execute(
-                    "DELETE FROM inventory WHERE user_id = ? AND item_id = ? AND quantity <= 0", 
-                    (user_id, item_id)
-                )
-            
-            await self.conn.commit()
+            async with self._transaction() as tx:
+                missing, quantities = await self._bulk_change_inventory(user_id, losses, {})
+                if missing:
+                    tx.rollback()
+                    return False, f"ERROR_INSUFFICIENT_MATERIAL_{next(i for i in materials if i in missing)}"
+            self._set_inventory_quantities(user_id, quantities)
             return True, "SUCCESS"
         except aiosqlite.Error as e:
-            await self.conn.rollback()
             logger.error(f"炼制失败事务失败: {e}")
             return False, "ERROR_DATABASE"
 
     async def check_materials(self, user_id: str, materials: Dict[str, int]) -> Tuple[bool, List[str]]:
         """检查玩家是否拥有足够的材料"""
-        missing = []
-        for item_id, required in materials.items():
-            item = await self.get_item_from_inventory(user_id, item_id)
-            if not item or item['quantity'] < required:
-                missing.append(item_id)
+        inventory = await self._load_inventory(user_id)
+        missing = [item_id for item_id, required in materials.items() if inventory.get(item_id, 0) < required]
         return len(missing) == 0, missing
 
     # ========== 激活码系统相关方法 ==========
@@ -858,23 +1666,21 @@ class DataBase:
     async def record_redeem_code_use(self, user_id: str, code: str):
         """记录激活码使用"""
         import time
-        await self.conn.execute(
+        await self._write(
             "INSERT INTO redeem_code_usage (user_id, code, used_at) VALUES (?, ?, ?)",
             (user_id, code, time.time())
         )
-        await self.conn.commit()
 
     # ========== GM激活码管理方法 ==========
 
     async def add_gm_redeem_code(self, code: str, gold: int, exp: int, max_uses: int, description: str):
         """添加GM激活码"""
         import time
-        await self.conn.execute(
+        await self._write(
             """INSERT INTO gm_redeem_codes (code, gold, exp, max_uses, description, created_at)
                VALUES (?, ?, ?, ?, ?, ?)""",
             (code, gold, exp, max_uses, description, time.time())
         )
-        await self.conn.commit()
 
     async def get_gm_redeem_code(self, code: str) -> dict:
         """获取GM激活码配置"""
@@ -886,7 +1692,7 @@ class DataBase:
 
     async def get_all_gm_redeem_codes(self) -> list:
         """获取所有GM激活码"""
-        async with self.conn.execute(
+        async with self._reader() as conn, conn.execute(
             "SELECT * FROM gm_redeem_codes ORDER BY created_at DESC"
         ) as cursor:
             rows = await cursor.fetchall()
@@ -894,17 +1700,16 @@ class DataBase:
 
     async def delete_gm_redeem_code(self, code: str):
         """删除GM激活码"""
-        await self.conn.execute("DELETE FROM gm_redeem_codes WHERE code = ?", (code,))
-        await self.conn.execute("DELETE FROM gm_redeem_code_items WHERE code = ?", (code,))
-        await self.conn.commit()
+        async with self._transaction():
+            await self.conn.execute("DELETE FROM gm_redeem_codes WHERE code = ?", (code,))
+            await self.conn.execute("DELETE FROM gm_redeem_code_items WHERE code = ?", (code,))
 
     async def add_gm_redeem_code_item(self, code: str, item_name: str, quantity: int):
         """为GM激活码添加物品奖励"""
-        await self.conn.execute(
+        await self._write(
             "INSERT INTO gm_redeem_code_items (code, item_name, quantity) VALUES (?, ?, ?)",
             (code, item_name, quantity)
         )
-        await self.conn.commit()
 
     async def get_gm_redeem_code_items(self, code: str) -> list:
         """获取GM激活码的物品奖励列表"""
@@ -918,24 +1723,15 @@ class DataBase:
 
     async def get_daily_pill_count(self, user_id: str, pill_date: str) -> int:
         """获取玩家当日丹药服用次数"""
-        async with self.conn.execute(
-            "SELECT count FROM daily_pill_count WHERE user_id = ? AND pill_date = ?",
-            (user_id, pill_date)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"] if row else 0
+        return await self.get_daily_counter(SCOPE_PILL, user_id, pill_date)
 
     async def increment_pill_count(self, user_id: str, pill_date: str, amount: int = 1):
         """增加玩家当日丹药服用次数"""
-        await self.conn.execute("""
-            INSERT INTO daily_pill_count (user_id, pill_date, count)
-            VALUES (?, ?, ?)
-            ON CONFLICT(user_id, pill_date) DO UPDATE SET count = count + ?
-        """, (user_id, pill_date, amount, amount))
-        await self.conn.commit()
+        await self.increment_daily_counter(SCOPE_PILL, user_id, pill_date, amount)
 
     async def apply_poison_damage(self, user_id: str, damage_percent: float = 0.5) -> int:
         """应用中毒伤害，扣除玩家当前血量的指定百分比，返回扣除的血量"""
+        await self.flush_dirty_players()
         async with self.conn.execute(
             "SELECT hp FROM players WHERE user_id = ?", (user_id,)
         ) as cursor:
@@ -947,90 +1743,50 @@ class DataBase:
         damage = int(current_hp * damage_percent)
         new_hp = max(1, current_hp - damage)  # 至少保留1点血量
 
-        await self.conn.execute(
+        await self._write(
             "UPDATE players SET hp = ? WHERE user_id = ?",
             (new_hp, user_id)
         )
-        await self.conn.commit()
+        self._invalidate_player(user_id)
         return damage
 
     # ========== 每日限制系统相关方法 (v2.6.4) ==========
 
     async def get_daily_tribulation_count(self, user_id: str, tribulation_date: str) -> int:
         """获取玩家当日天劫次数"""
-        async with self.conn.execute(
-            "SELECT count FROM daily_tribulation_count WHERE user_id = ? AND tribulation_date = ?",
-            (user_id, tribulation_date)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"] if row else 0
+        return await self.get_daily_counter(SCOPE_TRIBULATION, user_id, tribulation_date)
 
     async def increment_tribulation_count(self, user_id: str, tribulation_date: str):
         """增加玩家当日天劫次数"""
-        await self.conn.execute("""
-            INSERT INTO daily_tribulation_count (user_id, tribulation_date, count)
-            VALUES (?, ?, 1)
-            ON CONFLICT(user_id, tribulation_date) DO UPDATE SET count = count + 1
-        """, (user_id, tribulation_date))
-        await self.conn.commit()
+        await self.increment_daily_counter(SCOPE_TRIBULATION, user_id, tribulation_date)
 
     async def get_daily_realm_count(self, user_id: str, realm_date: str) -> int:
         """获取玩家当日秘境次数"""
-        async with self.conn.execute(
-            "SELECT count FROM daily_realm_count WHERE user_id = ? AND realm_date = ?",
-            (user_id, realm_date)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"] if row else 0
+        return await self.get_daily_counter(SCOPE_REALM, user_id, realm_date)
 
     async def increment_realm_count(self, user_id: str, realm_date: str):
         """增加玩家当日秘境次数"""
-        await self.conn.execute("""
-            INSERT INTO daily_realm_count (user_id, realm_date, count)
-            VALUES (?, ?, 1)
-            ON CONFLICT(user_id, realm_date) DO UPDATE SET count = count + 1
-        """, (user_id, realm_date))
-        await self.conn.commit()
+        await self.increment_daily_counter(SCOPE_REALM, user_id, realm_date)
 
     # ========== 道具限购系统相关方法 (v2.6.5) ==========
 
     async def get_daily_item_purchase_count(self, user_id: str, item_id: str, purchase_date: str) -> int:
         """获取玩家当日某道具的购买次数"""
-        async with self.conn.execute(
-            "SELECT count FROM daily_item_purchase WHERE user_id = ? AND item_id = ? AND purchase_date = ?",
-            (user_id, item_id, purchase_date)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"] if row else 0
+        return await self.get_daily_counter(SCOPE_ITEM_PURCHASE, user_id, purchase_date, key=item_id)
 
     async def increment_item_purchase_count(self, user_id: str, item_id: str, purchase_date: str, quantity: int = 1):
         """增加玩家当日某道具的购买次数"""
-        await self.conn.execute("""
-            INSERT INTO daily_item_purchase (user_id, item_id, purchase_date, count)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user_id, item_id, purchase_date) DO UPDATE SET count = count + ?
-        """, (user_id, item_id, purchase_date, quantity, quantity))
-        await self.conn.commit()
+        await self.increment_daily_counter(SCOPE_ITEM_PURCHASE, user_id, purchase_date, quantity, key=item_id)
 
     # ========== 宗门系统 v2.7.0 ==========
     
     async def get_sect_shop_purchase_count(self, user_id: str, item_id: str, purchase_date: str) -> int:
         """获取宗门商品今日购买次数"""
-        async with self.conn.execute(
-            "SELECT count FROM sect_shop_daily_limit WHERE user_id = ? AND item_id = ? AND purchase_date = ?",
-            (user_id, item_id, purchase_date)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"] if row else 0
+        return await self.get_daily_counter(SCOPE_SECT_SHOP, user_id, purchase_date, key=item_id)
 
     async def increment_sect_shop_purchase(self, user_id: str, item_id: str, purchase_date: str, quantity: int = 1):
         """增加宗门商品购买次数"""
-        await self.conn.execute("""
-            INSERT INTO sect_shop_daily_limit (user_id, item_id, purchase_date, count)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user_id, item_id, purchase_date) DO UPDATE SET count = count + ?
-        """, (user_id, item_id, purchase_date, quantity, quantity))
-        await self.conn.commit()
+        await self.increment_daily_counter(SCOPE_SECT_SHOP, user_id, purchase_date, quantity, key=item_id)
 
     # ========== 宗门建筑系统 ==========
 
@@ -1053,19 +1809,17 @@ class DataBase:
 
     async def create_sect_building(self, sect_id: int, building_id: str):
         """创建宗门建筑"""
-        await self.conn.execute(
+        await self._write(
             "INSERT INTO sect_buildings (sect_id, building_id, level, created_at) VALUES (?, ?, 1, datetime('now'))",
             (sect_id, building_id)
         )
-        await self.conn.commit()
 
     async def upgrade_sect_building(self, sect_id: int, building_id: str, new_level: int):
         """升级宗门建筑"""
-        await self.conn.execute(
+        await self._write(
             "UPDATE sect_buildings SET level = ? WHERE sect_id = ? AND building_id = ?",
             (new_level, sect_id, building_id)
         )
-        await self.conn.commit()
 
     async def get_sect_building_buff_count(self, sect_id: int, building_id: str, date_str: str) -> int:
         """获取建筑今日激活次数"""
@@ -1078,11 +1832,10 @@ class DataBase:
 
     async def add_sect_building_buff(self, sect_id: int, building_id: str, expires_at: str):
         """记录建筑Buff激活"""
-        await self.conn.execute(
+        await self._write(
             "INSERT INTO sect_building_buffs (sect_id, building_id, activated_at, expires_at) VALUES (?, ?, datetime('now'), ?)",
             (sect_id, building_id, expires_at)
         )
-        await self.conn.commit()
 
     async def get_active_sect_building_buffs(self, sect_id: int) -> List[dict]:
         """获取当前有效的宗门建筑Buff"""
@@ -1101,9 +1854,8 @@ class DataBase:
             row = await cursor.fetchone()
             if not row or row["funds"] < amount:
                 return False
-        await self.conn.execute(
+        await self._write(
             "UPDATE sects SET funds = funds - ? WHERE id = ?",
             (amount, sect_id)
         )
-        await self.conn.commit()
         return True
\ No newline at end of file
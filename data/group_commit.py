@@ -0,0 +1,92 @@
+# data/group_commit.py
+
+import time
+import asyncio
+import aiosqlite
+from typing import Optional, Dict, Any
+
+from astrbot.api import logger
+
+class GroupCommitScheduler:
+    """写连接上的组提交调度器
+
+    在窗口期内到达的单语句写入共享同一个隐式事务，由一次 commit 统一落盘；
+    每个调用方都要等到这次提交完成后才返回，因此不会削弱持久性。
+    lock 同时保护写连接的事务状态，显式事务必须持有它。
+    """
+
+    def __init__(self, window_ms: float = 0):
+        self.window = max(0.0, float(window_ms)) / 1000
+        self.lock = asyncio.Lock()
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._waiter: Optional[asyncio.Future] = None
+        self._batch_size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats: Dict[str, Any] = {
+            "commits": 0, "writes": 0, "max_batch_size": 0,
+            "total_commit_ms": 0.0, "max_commit_ms": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def bind(self, conn: Optional[aiosqlite.Connection]):
+        self._conn = conn
+
+    def join(self) -> asyncio.Future:
+        """把一次已执行的写入加入当前批次（调用方需持有 lock），返回等待提交的 Future"""
+        if self._waiter is None:
+            loop = asyncio.get_running_loop()
+            self._waiter = loop.create_future()
+            self._timer = loop.call_later(self.window, self._on_timer)
+        self._batch_size += 1
+        return self._waiter
+
+    def _on_timer(self):
+        self._timer = None
+        asyncio.ensure_future(self._flush_from_timer())
+
+    async def _flush_from_timer(self):
+        async with self.lock:
+            await self.flush()
+
+    async def flush(self):
+        """提交当前批次（调用方需持有 lock）"""
+        waiter = self._waiter
+        if waiter is None:
+            return
+        size = self._batch_size
+        self._waiter = None
+        self._batch_size = 0
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        started = time.perf_counter()
+        try:
+            await self._conn.commit()
+        except Exception as e:
+            logger.error(f"组提交失败，本批 {size} 次写入已回滚: {e}")
+            try:
+                await self._conn.rollback()
+            except Exception:
+                pass
+            waiter.set_exception(e)
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        waiter.set_result(None)
+
+        self.stats["commits"] += 1
+        self.stats["writes"] += size
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], size)
+        self.stats["total_commit_ms"] += elapsed_ms
+        self.stats["max_commit_ms"] = max(self.stats["max_commit_ms"], elapsed_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        commits = self.stats["commits"]
+        return {
+            **self.stats,
+            "avg_batch_size": round(self.stats["writes"] / commits, 2) if commits else 0,
+            "avg_commit_ms": round(self.stats["total_commit_ms"] / commits, 3) if commits else 0,
+        }
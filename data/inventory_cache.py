@@ -0,0 +1,75 @@
+# data/inventory_cache.py
+
+from collections import OrderedDict
+from typing import Optional, Dict
+
+class InventoryCache:
+    """按玩家缓存背包（item_id -> 数量）的有界LRU
+
+    首次访问时整包加载，之后由 DataBase 的背包写操作在提交成功后按增量同步；
+    工作单元内的修改先行同步，工作单元回滚或提交失败时由 DataBase 失效涉及的玩家。
+    返回的字典属于缓存本身，调用方只读不写。
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = max(0, int(capacity))
+        self._entries: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # 每次写入变化递增；加载期间发生过写入时放弃填充，避免缓存读取前的旧数据
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str) -> Optional[Dict[str, int]]:
+        items = self._entries.get(user_id)
+        if items is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return items
+
+    def put(self, user_id: str, items: Dict[str, int]):
+        if self.capacity == 0:
+            return
+        self._entries[user_id] = items
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def apply_delta(self, user_id: str, deltas: Dict[str, int]):
+        """把已提交的数量变化应用到缓存（未缓存的玩家忽略），数量归零的条目移除"""
+        self.version += 1
+        items = self._entries.get(user_id)
+        if items is None:
+            return
+        for item_id, delta in deltas.items():
+            quantity = items.get(item_id, 0) + delta
+            if quantity > 0:
+                items[item_id] = quantity
+            else:
+                items.pop(item_id, None)
+
+    def set_quantities(self, user_id: str, quantities: Dict[str, int]):
+        """用数据库返回的结果数量覆盖缓存中的对应条目（未缓存的玩家忽略）"""
+        self.version += 1
+        items = self._entries.get(user_id)
+        if items is None:
+            return
+        for item_id, quantity in quantities.items():
+            if quantity > 0:
+                items[item_id] = quantity
+            else:
+                items.pop(item_id, None)
+
+    def invalidate(self, user_id: str):
+        self.version += 1
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,217 @@
+# data/leaderboard.py
+
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Optional, Dict, List, Callable, Iterable, Iterator, Any
+
+from ..models import Player
+
+class SortedBlockList:
+    """分块有序表：元素分布在若干个有序小块中，块长度之和由树状数组（Fenwick）维护
+
+    插入与删除先在各块最大值上二分定位块，块内移动最多 2 * BLOCK_SIZE 个元素，
+    再以 O(log B) 更新树状数组；按值求位置为块定位加一次前缀和。块长度有上限，
+    因此各操作相对元素总数都是 O(log N)。块分裂或清空时重建树状数组，摊还到每次插入的开销很小。
+    """
+
+    BLOCK_SIZE = 512
+
+    def __init__(self, values: Iterable[Any] = ()):
+        """values 为初始元素（无需有序），一次排序后切块，比逐个 add 快得多"""
+        ordered = sorted(values)
+        size = self.BLOCK_SIZE
+        self._blocks: List[List[Any]] = [ordered[i:i + size] for i in range(0, len(ordered), size)]
+        self._maxes: List[Any] = [block[-1] for block in self._blocks]
+        self._len = len(ordered)
+        self._rebuild_index()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        for block in self._blocks:
+            yield from block
+
+    def _rebuild_index(self):
+        tree = [0] * (len(self._blocks) + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _index_add(self, block_index: int, delta: int):
+        tree = self._tree
+        i = block_index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, block_index: int) -> int:
+        """前 block_index 个块的元素总数"""
+        tree = self._tree
+        total = 0
+        i = block_index
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def add(self, value: Any):
+        self._len += 1
+        if not self._blocks:
+            self._blocks.append([value])
+            self._maxes.append(value)
+            self._rebuild_index()
+            return
+        i = bisect_left(self._maxes, value)
+        if i == len(self._blocks):
+            i -= 1
+            self._blocks[i].append(value)
+            self._maxes[i] = value
+        else:
+            insort(self._blocks[i], value)
+        block = self._blocks[i]
+        if len(block) > 2 * self.BLOCK_SIZE:
+            half = len(block) // 2
+            self._blocks[i:i + 1] = [block[:half], block[half:]]
+            self._maxes[i:i + 1] = [block[half - 1], block[-1]]
+            self._rebuild_index()
+        else:
+            self._index_add(i, 1)
+
+    def remove(self, value: Any) -> bool:
+        """删除一个等于 value 的元素，不存在时返回 False"""
+        i = bisect_left(self._maxes, value)
+        if i == len(self._blocks):
+            return False
+        block = self._blocks[i]
+        j = bisect_left(block, value)
+        if j == len(block) or block[j] != value:
+            return False
+        del block[j]
+        self._len -= 1
+        if block:
+            self._maxes[i] = block[-1]
+            self._index_add(i, -1)
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+            self._rebuild_index()
+        return True
+
+    def bisect_left(self, value: Any) -> int:
+        """小于 value 的元素个数"""
+        i = bisect_left(self._maxes, value)
+        if i == len(self._blocks):
+            return self._len
+        return self._prefix(i) + bisect_left(self._blocks[i], value)
+
+    def head(self, limit: int) -> List[Any]:
+        return list(islice(self, max(0, limit)))
+
+class Leaderboard:
+    """单一维度的内存排行榜（分块有序表，插入、删除与求排名均为 O(log N)）
+
+    条目按 (排序键, user_id) 升序保存，排序键已取反，越靠前排名越高。
+    排名语义与 SQL 版本一致：严格优于该玩家的人数 + 1。
+    """
+
+    def __init__(self, key: Callable[[Player], tuple], include: Optional[Callable[[Player], bool]] = None):
+        self._key = key
+        self._include = include
+        self._entries = SortedBlockList()
+        self._keys: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entry_for(self, player: Player) -> Optional[tuple]:
+        """玩家在本榜的条目 (排序键, user_id)，不上榜时为 None"""
+        if self._include is not None and not self._include(player):
+            return None
+        return self._key(player), player.user_id
+
+    def reset(self, entries: List[tuple]):
+        """以一组条目整体替换榜单内容"""
+        self._entries = SortedBlockList(entries)
+        self._keys = {user_id: key for key, user_id in entries}
+
+    def update(self, player: Player):
+        """插入或移动一个玩家的位置；排序键未变化时不做任何操作"""
+        if self._include is not None and not self._include(player):
+            self.remove(player.user_id)
+            return
+        key = self._key(player)
+        old = self._keys.get(player.user_id)
+        if old == key:
+            return
+        if old is not None:
+            self._entries.remove((old, player.user_id))
+        self._entries.add((key, player.user_id))
+        self._keys[player.user_id] = key
+
+    def remove(self, user_id: str):
+        old = self._keys.pop(user_id, None)
+        if old is not None:
+            self._entries.remove((old, user_id))
+
+    def rank_of(self, user_id: str) -> int:
+        """返回玩家排名，未上榜返回 0"""
+        key = self._keys.get(user_id)
+        if key is None:
+            return 0
+        # "" 小于任何 user_id，因此得到的是排序键严格更小（即更优）的条目数
+        return self._entries.bisect_left((key, "")) + 1
+
+    def top(self, limit: int) -> List[str]:
+        return [user_id for _, user_id in self._entries.head(limit)]
+
+class LeaderboardSet:
+    """境界、财富、战力、PVP 四个维度的排行榜，启动时全量构建，之后随玩家写入增量更新"""
+
+    def __init__(self):
+        self.boards: Dict[str, Leaderboard] = {
+            "realm": Leaderboard(lambda p: (-p.level_index, -p.experience)),
+            "gold": Leaderboard(lambda p: (-p.gold,)),
+            "combat": Leaderboard(lambda p: (-p.combat_power,)),
+            "pvp": Leaderboard(
+                lambda p: (-p.pvp_wins, p.pvp_losses),
+                include=lambda p: p.pvp_wins + p.pvp_losses > 0
+            ),
+        }
+        # 被 SQL 侧直接修改过、需要在下次查询前重新加载的玩家
+        self.stale: set = set()
+        self._staged: Dict[str, List[tuple]] = {name: [] for name in self.boards}
+
+    def stage(self, player: Player):
+        """全量构建：先收集各维度的条目，build() 时一次排序建表"""
+        for name, board in self.boards.items():
+            entry = board.entry_for(player)
+            if entry is not None:
+                self._staged[name].append(entry)
+
+    def build(self):
+        for name, entries in self._staged.items():
+            self.boards[name].reset(entries)
+        self._staged = {name: [] for name in self.boards}
+
+    def load(self, players: Iterable[Player]):
+        for player in players:
+            self.stage(player)
+        self.build()
+
+    def update(self, player: Player):
+        for board in self.boards.values():
+            board.update(player)
+        self.stale.discard(player.user_id)
+
+    def mark_stale(self, user_id: str):
+        self.stale.add(user_id)
+
+    def rank_of(self, dimension: str, user_id: str) -> int:
+        return self.boards[dimension].rank_of(user_id)
+
+    def top(self, dimension: str, limit: int) -> List[str]:
+        return self.boards[dimension].top(limit)
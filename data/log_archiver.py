@@ -0,0 +1,198 @@
+# data/log_archiver.py
+
+import os
+import gzip
+import json
+import time
+import asyncio
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterator, AsyncIterator, TYPE_CHECKING
+
+from astrbot.api import logger
+
+if TYPE_CHECKING:
+    from .data_manager import DataBase
+
+# 只按时间读取的日志表 -> 时间戳列（Unix 秒）
+ARCHIVE_TABLES: Dict[str, str] = {
+    "trade_log": "created_at",
+    "crafting_log": "created_at",
+    "adventure_log": "created_at",
+    "world_boss_kill_logs": "defeated_at",
+    "gold_ledger": "created_at",
+}
+
+def _partition_of(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m")
+
+def _fsync_dir(directory: Path):
+    """让目录项（新建/重命名的文件）落盘；Windows 不支持打开目录，跳过"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _marker_of(path: Path) -> Path:
+    return path.with_name(path.name + ".size")
+
+def _write_marker(marker: Path, size: int):
+    """原子地更新分段的已提交长度：写临时文件并 fsync 后重命名"""
+    tmp = marker.with_name(marker.name + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(str(size))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, marker)
+    _fsync_dir(marker.parent)
+
+def _append_segment(path: Path, rows: List[Dict[str, Any]]):
+    """以新的 gzip 成员追加到分段文件末尾（多成员 gzip 可被连续读取）
+
+    追加内容 fsync 后再更新旁边的 .size 标记记录已提交的长度，函数返回即表示这批行已持久化；
+    上次追加中途退出留下的未提交内容会先按标记长度截掉。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    marker = _marker_of(path)
+    if marker.exists():
+        committed = int(marker.read_text())
+    elif path.exists():
+        # 没有标记的旧分段视为完整
+        committed = path.stat().st_size
+    else:
+        committed = 0
+        _write_marker(marker, committed)
+    with open(path, "ab") as raw:
+        raw.truncate(committed)
+        with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+            for row in rows:
+                gz.write(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+                gz.write(b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+        size = os.fstat(raw.fileno()).st_size
+    _write_marker(marker, size)
+
+class LogArchiver:
+    """把早于保留期的日志行移到数据库旁的按月分段文件（archive/<表名>/<YYYY-MM>.jsonl.gz）
+
+    先把分段写入并落盘，再删除数据库中的行：若两步之间进程退出，下次运行会把同一批行再追加一次，
+    读取方可按 id 去重。
+    """
+
+    def __init__(self, db: "DataBase", archive_dir: Path, horizon_days: int = 90,
+                 interval_hours: float = 6, chunk_size: int = 1000):
+        self.db = db
+        self.archive_dir = Path(archive_dir)
+        self.horizon_days = max(1, int(horizon_days))
+        self.interval = max(0.1, float(interval_hours)) * 3600
+        self.chunk_size = max(1, int(chunk_size))
+        self._task: Optional[asyncio.Task] = None
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"日志归档失败: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> Dict[str, Any]:
+        """归档一轮，返回各表归档的行数"""
+        cutoff = time.time() - self.horizon_days * 86400
+        archived: Dict[str, int] = {}
+        for table, ts_column in ARCHIVE_TABLES.items():
+            if not await self.db.table_exists(table):
+                continue
+            total = 0
+            while True:
+                rows = await self.db.fetch_log_rows_before(table, ts_column, cutoff, self.chunk_size)
+                if not rows:
+                    break
+                partitions: Dict[str, List[Dict[str, Any]]] = {}
+                for row in rows:
+                    partitions.setdefault(_partition_of(row[ts_column]), []).append(row)
+                for partition, part_rows in partitions.items():
+                    path = self.archive_dir / table / f"{partition}.jsonl.gz"
+                    await asyncio.to_thread(_append_segment, path, part_rows)
+                await self.db.delete_log_rows(table, [row["id"] for row in rows])
+                total += len(rows)
+                if len(rows) < self.chunk_size:
+                    break
+            if total:
+                archived[table] = total
+
+        report = {"cutoff": cutoff, "archived": archived, "archived_rows": sum(archived.values())}
+        self.last_report = report
+        if archived:
+            logger.info(f"日志归档完成: {archived}")
+        return report
+
+    # ========== 读取 ==========
+
+    def list_segments(self, table: str) -> List[Path]:
+        """按时间顺序列出某表的归档分段"""
+        table_dir = self.archive_dir / table
+        if not table_dir.exists():
+            return []
+        return sorted(table_dir.glob("*.jsonl.gz"))
+
+    def iter_rows(self, table: str, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """逐行流式读取归档（同步生成器），按 [since, until) 过滤时间戳"""
+        ts_column = ARCHIVE_TABLES[table]
+        first = _partition_of(since) if since is not None else None
+        last = _partition_of(until) if until is not None else None
+        for path in self.list_segments(table):
+            partition = path.name.split(".", 1)[0]
+            if (first and partition < first) or (last and partition > last):
+                continue
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                try:
+                    for line in f:
+                        row = json.loads(line)
+                        ts = row.get(ts_column, 0)
+                        if since is not None and ts < since:
+                            continue
+                        if until is not None and ts >= until:
+                            continue
+                        yield row
+                except EOFError:
+                    # 追加中途退出留下的半个成员，这些行仍在数据库中，下次归档时会被截掉重写
+                    logger.warning(f"归档分段 {path} 末尾不完整，已跳过")
+
+    async def stream_rows(self, table: str, since: Optional[float] = None, until: Optional[float] = None,
+                          batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """iter_rows 的异步版本：在线程中按批解压读取，不阻塞事件循环"""
+        iterator = self.iter_rows(table, since, until)
+
+        def next_batch() -> List[Dict[str, Any]]:
+            batch = []
+            for row in iterator:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    break
+            return batch
+
+        while True:
+            batch = await asyncio.to_thread(next_batch)
+            if not batch:
+                return
+            for row in batch:
+                yield row
@@ -4,8 +4,11 @@ import aiosqlite
 from typing import Dict, Callable, Awaitable
 from astrbot.api import logger
 from ..config_manager import ConfigManager
+from ..models import Player
 
-LATEST_DB_VERSION = 23 # v2.7.1 世界Boss系统增强
+LATEST_DB_VERSION = 32 # v2.8.4 激活码使用记录跨分片共享
+# 全新安装时建表函数对应的版本，之后的结构由迁移任务补齐，保证与升级得到的结构一致
+BASELINE_DB_VERSION = 13
 
 MIGRATION_TASKS: Dict[int, Callable[[aiosqlite.Connection, ConfigManager], Awaitable[None]]] = {}
 
@@ -30,12 +33,11 @@ class MigrationManager:
             if await cursor.fetchone() is None:
                 logger.info("未检测到数据库版本，将进行全新安装...")
                 await self.conn.execute("BEGIN")
-                # 使用最新的建表函数
+                # 先建立基线版本的表结构，再与升级一样依次执行之后的迁移
                 await _create_all_tables_v11(self.conn)
-                await self.conn.execute("INSERT INTO db_info (version) VALUES (?)", (LATEST_DB_VERSION,))
+                await self.conn.execute("INSERT INTO db_info (version) VALUES (?)", (BASELINE_DB_VERSION,))
                 await self.conn.commit()
-                logger.info(f"数据库已初始化到最新版本: v{LATEST_DB_VERSION}")
-                return
+                logger.info(f"数据库已初始化到基线版本: v{BASELINE_DB_VERSION}")
 
         async with self.conn.execute("SELECT version FROM db_info") as cursor:
             row = await cursor.fetchone()
@@ -635,7 +637,10 @@ async def _upgrade_v12_to_v13(conn: aiosqlite.Connection, config_manager: Config
     logger.info("v12 -> v13 数据库迁移完成！")
 
 async def _create_all_tables_v11(conn: aiosqlite.Connection):
-    """创建所有表（v13版本）- 包含功法、buff、PVP、交易、炼丹/炼器系统"""
+    """创建所有表（v13版本）- 包含功法、buff、PVP、交易、炼丹/炼器系统
+
+    全新安装的基线（BASELINE_DB_VERSION），之后新增的结构只写在对应的迁移任务中，不要补到这里。
+    """
     await conn.execute("CREATE TABLE IF NOT EXISTS db_info (version INTEGER NOT NULL)")
     await conn.execute("""
         CREATE TABLE IF NOT EXISTS sects (
@@ -1164,3 +1169,211 @@ async def _upgrade_v22_to_v23(conn: aiosqlite.Connection, config_manager: Config
     logger.info("✅ 已创建 world_boss_kill_logs 表")
 
     logger.info("v22 -> v23 数据库迁移完成！世界Boss系统增强已就绪。")
+
+@migration(24)
+async def _upgrade_v23_to_v24(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v23 -> v24: 持久化战力列，排行榜改为索引查询"""
+    logger.info("开始 v23 -> v24 数据库迁移：持久化战力...")
+
+    try:
+        await conn.execute("ALTER TABLE players ADD COLUMN combat_power INTEGER NOT NULL DEFAULT 0")
+        logger.info("✅ 已为 players 添加 combat_power 字段")
+    except aiosqlite.OperationalError:
+        logger.info("⏭️ players.combat_power 字段已存在，跳过")
+
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_players_combat_power ON players (combat_power)")
+
+    # 回填现有玩家的战力
+    async with conn.execute("""
+        SELECT user_id, max_hp, attack, defense, equipped_weapon, equipped_armor,
+               equipped_accessory, learned_skills, active_buffs
+        FROM players
+    """) as cursor:
+        rows = await cursor.fetchall()
+    updates = []
+    for row in rows:
+        player = Player(
+            user_id=row[0], max_hp=row[1], attack=row[2], defense=row[3],
+            equipped_weapon=row[4], equipped_armor=row[5], equipped_accessory=row[6],
+            learned_skills=row[7] or "[]", active_buffs=row[8] or "[]"
+        )
+        updates.append((player.calculate_combat_power(config_manager), player.user_id))
+    await conn.executemany("UPDATE players SET combat_power = ? WHERE user_id = ?", updates)
+    logger.info(f"✅ 已回填 {len(updates)} 名玩家的战力")
+
+    logger.info("v23 -> v24 数据库迁移完成！")
+
+async def _create_player_ranking_indexes(conn: aiosqlite.Connection):
+    """排行榜与宗门成员查询使用的二级索引"""
+    # 境界榜：ORDER BY level_index DESC, experience DESC / 排名按区间计数
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_players_realm ON players (level_index, experience)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_players_gold ON players (gold)")
+    # PVP榜：ORDER BY pvp_wins DESC, pvp_losses ASC，索引方向与排序一致
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_players_pvp ON players (pvp_wins DESC, pvp_losses)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_players_sect ON players (sect_id)")
+
+@migration(25)
+async def _upgrade_v24_to_v25(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v24 -> v25: 为排行榜和宗门成员查询添加索引"""
+    logger.info("开始 v24 -> v25 数据库迁移：排行榜索引...")
+    await _create_player_ranking_indexes(conn)
+    await conn.execute("ANALYZE players")
+    logger.info("v24 -> v25 数据库迁移完成！已创建境界/财富/PVP/宗门索引。")
+
+async def _create_daily_counters_table(conn: aiosqlite.Connection):
+    """统一的每日计数器表，counter_key 用于区分同一作用域下的物品/任务"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_counters (
+            scope TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            counter_key TEXT NOT NULL DEFAULT '',
+            counter_date TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, user_id, counter_key, counter_date)
+        ) WITHOUT ROWID
+    """)
+
+# 旧计数表 -> (作用域, counter_key 来源列, 日期列, 计数列)
+_LEGACY_DAILY_COUNTER_TABLES = [
+    ("daily_adventure_count", "adventure", "''", "adventure_date", "count"),
+    ("daily_bounty_count", "bounty", "''", "bounty_date", "count"),
+    ("daily_sell_count", "sell", "''", "sell_date", "count"),
+    ("daily_pill_count", "pill", "''", "pill_date", "count"),
+    ("daily_tribulation_count", "tribulation", "''", "tribulation_date", "count"),
+    ("daily_realm_count", "realm", "''", "realm_date", "count"),
+    ("daily_item_purchase", "item_purchase", "item_id", "purchase_date", "count"),
+    ("sect_shop_daily_limit", "sect_shop", "item_id", "purchase_date", "count"),
+    ("daily_task_counter", "task", "task_id", "task_date", "progress"),
+]
+
+@migration(26)
+async def _upgrade_v25_to_v26(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v25 -> v26: 各类每日次数表合并为 daily_counters"""
+    logger.info("开始 v25 -> v26 数据库迁移：统一每日计数器...")
+    await _create_daily_counters_table(conn)
+
+    for table, scope, key_column, date_column, count_column in _LEGACY_DAILY_COUNTER_TABLES:
+        async with conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)) as cursor:
+            if await cursor.fetchone() is None:
+                logger.info(f"⏭️ {table} 表不存在，跳过")
+                continue
+        cursor = await conn.execute(f"""
+            INSERT OR REPLACE INTO daily_counters (scope, user_id, counter_key, counter_date, count)
+            SELECT ?, user_id, {key_column}, {date_column}, COALESCE({count_column}, 0) FROM {table}
+        """, (scope,))
+        await conn.execute(f"DROP TABLE {table}")
+        logger.info(f"✅ 已迁移 {table}（{cursor.rowcount} 行）-> daily_counters[{scope}]")
+
+    logger.info("v25 -> v26 数据库迁移完成！每日计数器已统一。")
+
+@migration(27)
+async def _upgrade_v26_to_v27(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v26 -> v27: 为过期数据清理添加日期索引"""
+    logger.info("开始 v26 -> v27 数据库迁移：过期数据清理索引...")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_counters_date ON daily_counters (counter_date)")
+    logger.info("v26 -> v27 数据库迁移完成！")
+
+@migration(28)
+async def _upgrade_v27_to_v28(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v27 -> v28: 秘境改为种子存储，旧数据只保留尚未到达的楼层"""
+    logger.info("开始 v27 -> v28 数据库迁移：压缩秘境数据...")
+
+    async with conn.execute(
+        "SELECT user_id, realm_floor, realm_data FROM players WHERE realm_data IS NOT NULL"
+    ) as cursor:
+        rows = await cursor.fetchall()
+    updates = []
+    for row in rows:
+        player = Player(user_id=row[0], realm_data=row[2])
+        instance = player.get_realm_instance()
+        if instance is None or instance.seed is not None or not instance.floors:
+            continue
+        # realm_floor 为已完成的层数，即下一层的 0-based 索引
+        instance.overrides = {i: floor for i, floor in enumerate(instance.floors) if i >= (row[1] or 0)}
+        instance.floors = []
+        player.set_realm_instance(instance)
+        updates.append((player.realm_data, player.user_id))
+    await conn.executemany("UPDATE players SET realm_data = ? WHERE user_id = ?", updates)
+    logger.info(f"✅ 已压缩 {len(updates)} 名玩家的秘境数据")
+
+    logger.info("v27 -> v28 数据库迁移完成！")
+
+async def _create_player_row_version_trigger(conn: aiosqlite.Connection):
+    """未显式修改 row_version 的 UPDATE（直接用 SQL 修改灵石等）由触发器递增版本号"""
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_players_row_version AFTER UPDATE ON players
+        FOR EACH ROW WHEN NEW.row_version = OLD.row_version
+        BEGIN
+            UPDATE players SET row_version = OLD.row_version + 1 WHERE user_id = NEW.user_id;
+        END
+    """)
+
+@migration(29)
+async def _upgrade_v28_to_v29(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v28 -> v29: players 添加 row_version，写回玩家时按版本号比较并交换"""
+    logger.info("开始 v28 -> v29 数据库迁移：玩家行版本号...")
+
+    try:
+        await conn.execute("ALTER TABLE players ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0")
+        logger.info("✅ 已为 players 添加 row_version 字段")
+    except aiosqlite.OperationalError:
+        logger.info("⏭️ players.row_version 字段已存在，跳过")
+    await _create_player_row_version_trigger(conn)
+
+    logger.info("v28 -> v29 数据库迁移完成！")
+
+async def _create_gold_ledger_table(conn: aiosqlite.Connection):
+    """灵石流水：from/to 为 NULL 表示系统发放/流出，与余额变动在同一事务内写入"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS gold_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            from_user_id TEXT,
+            to_user_id TEXT,
+            amount INTEGER NOT NULL,
+            tax INTEGER NOT NULL DEFAULT 0,
+            reason TEXT NOT NULL DEFAULT '',
+            created_at REAL NOT NULL
+        )
+    """)
+
+@migration(30)
+async def _upgrade_v29_to_v30(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v29 -> v30: 新增灵石账本"""
+    logger.info("开始 v29 -> v30 数据库迁移：灵石账本...")
+    await _create_gold_ledger_table(conn)
+    logger.info("v29 -> v30 数据库迁移完成！")
+
+@migration(31)
+async def _upgrade_v30_to_v31(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v30 -> v31: 删除未使用的 daily_task_claimed 表
+
+    领取状态一直记录在 daily_task_progress.claimed，该表只由早期迁移创建、从未读写，
+    全新安装的基线也没有它；删除后升级与全新安装得到相同的结构。
+    """
+    logger.info("开始 v30 -> v31 数据库迁移：清理未使用的表...")
+    await conn.execute("DROP TABLE IF EXISTS daily_task_claimed")
+    logger.info("v30 -> v31 数据库迁移完成！")
+
+@migration(32)
+async def _upgrade_v31_to_v32(conn: aiosqlite.Connection, config_manager: ConfigManager):
+    """v31 -> v32: 激活码使用记录去掉对 players 的外键
+
+    按群分片时使用记录统一写在全局分片，领取者的玩家数据在各自的群分片中，外键无法成立。
+    """
+    logger.info("开始 v31 -> v32 数据库迁移：激活码使用记录...")
+    await conn.execute("""
+        CREATE TABLE redeem_code_usage_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            code TEXT NOT NULL,
+            used_at REAL NOT NULL,
+            UNIQUE(user_id, code)
+        )
+    """)
+    await conn.execute("""
+        INSERT INTO redeem_code_usage_new (id, user_id, code, used_at)
+        SELECT id, user_id, code, used_at FROM redeem_code_usage
+    """)
+    await conn.execute("DROP TABLE redeem_code_usage")
+    await conn.execute("ALTER TABLE redeem_code_usage_new RENAME TO redeem_code_usage")
+    logger.info("v31 -> v32 数据库迁移完成！")
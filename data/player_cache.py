@@ -0,0 +1,79 @@
+# data/player_cache.py
+
+from collections import OrderedDict
+from typing import Optional, Dict, Callable
+
+from ..models import Player
+
+class PlayerCache:
+    """玩家对象的有界LRU身份映射缓存
+
+    缓存中保存的是与数据库一致的 Player 快照（已标记为无变更）。读取时返回副本，
+    避免调用方在未写回数据库前修改缓存内容。
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = max(0, int(capacity))
+        self._entries: "OrderedDict[str, Player]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._entries
+
+    def get(self, user_id: str) -> Optional[Player]:
+        """命中时返回缓存玩家的副本，并将其移动到最近使用端"""
+        player = self._entries.get(user_id)
+        if player is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return player.clone()
+
+    def peek(self, user_id: str) -> Optional[Player]:
+        """返回缓存中的快照本身（只读），不复制、不调整淘汰顺序、不计入命中统计"""
+        return self._entries.get(user_id)
+
+    def put(self, player: Player):
+        """写入（或覆盖）一个玩家快照，超出容量时淘汰最久未使用的条目"""
+        if self.capacity == 0:
+            return
+        snapshot = player.clone()
+        snapshot.mark_clean()
+        self._entries[player.user_id] = snapshot
+        self._entries.move_to_end(player.user_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set_row_version(self, user_id: str, expected: int, version: int):
+        """延迟写回提交后同步快照的版本号（快照已被替换为其他版本时不处理）"""
+        player = self._entries.get(user_id)
+        if player is not None and player.row_version == expected:
+            player.row_version = version
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
+    def invalidate_where(self, predicate: Callable[[Player], bool]):
+        """移除所有满足条件的缓存条目（用于数据库侧级联修改）"""
+        stale = [uid for uid, p in self._entries.items() if predicate(p)]
+        for uid in stale:
+            del self._entries[uid]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
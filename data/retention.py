@@ -0,0 +1,114 @@
+# data/retention.py
+
+import asyncio
+from datetime import date, timedelta
+from typing import Optional, Dict, Any, List, Tuple, TYPE_CHECKING
+
+from astrbot.api import logger
+
+if TYPE_CHECKING:
+    from .data_manager import DataBase
+
+# 按日期字符串(YYYY-MM-DD)增长的表：(表名, 日期列, 删除时定位行的键列)
+RETENTION_TABLES: List[Tuple[str, str, str]] = [
+    ("daily_counters", "counter_date", "scope, user_id, counter_key, counter_date"),
+    ("daily_task_progress", "task_date", "rowid"),
+    ("daily_bonus_claimed", "claim_date", "rowid"),
+    ("sect_daily_tasks", "task_date", "rowid"),
+    ("sect_farm_harvest", "harvest_date", "rowid"),
+]
+
+class RetentionJob:
+    """定期清理过期的按日记录，并通过 incremental_vacuum 归还空闲页
+
+    每次只删除 chunk_size 行，块与块之间让出事件循环，写连接不会被长时间占用。
+    incremental_vacuum 只对以 auto_vacuum=INCREMENTAL 建立的数据库有效；旧数据库需开启
+    convert_auto_vacuum，在首轮清理前执行一次完整 VACUUM 完成转换。
+    """
+
+    # 单次 incremental_vacuum 归还的页数上限
+    VACUUM_PAGES_PER_STEP = 1000
+
+    def __init__(self, db: "DataBase", horizon_days: int = 30, interval_hours: float = 6, chunk_size: int = 500,
+                 convert_auto_vacuum: bool = False):
+        # 至少保留昨天的数据，避免与内存中尚未写回的计数冲突
+        self.horizon_days = max(2, int(horizon_days))
+        self.interval = max(0.1, float(interval_hours)) * 3600
+        self.chunk_size = max(1, int(chunk_size))
+        self.convert_auto_vacuum = bool(convert_auto_vacuum)
+        self.db = db
+        self._task: Optional[asyncio.Task] = None
+        self._vacuum_hint_logged = False
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"过期数据清理失败: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> Dict[str, Any]:
+        """执行一轮清理，返回各表删除行数与归还的页数"""
+        cutoff = (date.today() - timedelta(days=self.horizon_days)).isoformat()
+        deleted: Dict[str, int] = {}
+        for table, date_column, row_key in RETENTION_TABLES:
+            if not await self.db.table_exists(table):
+                continue
+            total = 0
+            while True:
+                count = await self.db.purge_rows_before(table, date_column, row_key, cutoff, self.chunk_size)
+                total += count
+                if count < self.chunk_size:
+                    break
+                await asyncio.sleep(0)
+            if total:
+                deleted[table] = total
+
+        freed_pages = 0
+        mode = await self.db.get_auto_vacuum_mode()
+        if mode != "incremental" and self.convert_auto_vacuum:
+            # 只尝试一次：失败（如磁盘空间不足）时不在每轮清理中反复执行完整 VACUUM
+            self.convert_auto_vacuum = False
+            logger.info("正在把数据库转换为 auto_vacuum=INCREMENTAL（执行一次完整 VACUUM）...")
+            try:
+                await self.db.enable_incremental_vacuum()
+                mode = await self.db.get_auto_vacuum_mode()
+                logger.info(f"数据库 auto_vacuum 转换完成，当前模式: {mode}")
+            except Exception as e:
+                logger.error(f"数据库 auto_vacuum 转换失败: {e}", exc_info=True)
+        if mode == "incremental":
+            while True:
+                freed = await self.db.incremental_vacuum(self.VACUUM_PAGES_PER_STEP)
+                freed_pages += freed
+                if freed < self.VACUUM_PAGES_PER_STEP:
+                    break
+                await asyncio.sleep(0)
+        elif not self._vacuum_hint_logged:
+            self._vacuum_hint_logged = True
+            logger.info("数据库未启用 auto_vacuum=INCREMENTAL：清理出的空闲页会被复用，但文件不会缩小。如需缩小可开启“转换为增量回收”配置，或在维护时执行一次 VACUUM。")
+
+        report = {
+            "cutoff": cutoff,
+            "deleted": deleted,
+            "deleted_rows": sum(deleted.values()),
+            "freed_pages": freed_pages,
+        }
+        self.last_report = report
+        if report["deleted_rows"] or freed_pages:
+            logger.info(f"过期数据清理完成（{cutoff} 之前）: 删除 {report['deleted_rows']} 行 {deleted}，归还 {freed_pages} 页")
+        return report
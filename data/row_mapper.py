@@ -0,0 +1,102 @@
+# data/row_mapper.py
+
+from dataclasses import fields, MISSING
+from typing import Optional, List, Dict, Any, Tuple, Sequence, Callable
+
+from astrbot.api import logger
+
+from ..models import Player
+
+# 旧版本数据库中可能为 NULL 的列（早期迁移新增时未设默认值），读取时替换为默认值
+NULL_DEFAULTS: Dict[str, Any] = {
+    # v2.3.0 新增字段
+    "learned_skills": "[]",
+    "active_buffs": "[]",
+    "pvp_wins": 0,
+    "pvp_losses": 0,
+    "last_pvp_time": 0.0,
+    "sect_contribution": 0,
+    # 其他可能缺失的旧字段
+    "realm_floor": 0,
+    # v2.4.0 炼丹/炼器系统
+    "alchemy_level": 1,
+    "alchemy_exp": 0,
+    "smithing_level": 1,
+    "smithing_exp": 0,
+    "furnace_level": 1,
+    "forge_level": 1,
+    "unlocked_recipes": "[]",
+}
+
+RowToPlayer = Callable[[Sequence[Any]], Player]
+
+class PlayerRowMapper:
+    """把 players 表的查询行直接转换为 Player
+
+    每种结果列组合（cursor.description）只编译一次转换计划：列索引 -> 字段槽位。
+    之后每行按位置取值写入槽位，不构造中间 dict，也不经过 __init__ 的逐字段变更追踪；
+    结果集中多余的列被忽略，缺失的列使用字段默认值。
+    """
+
+    def __init__(self):
+        self._plans: Dict[Tuple[str, ...], RowToPlayer] = {}
+
+    def compile(self, description: Sequence[Sequence[Any]]) -> RowToPlayer:
+        columns = tuple(d[0] for d in description)
+        plan = self._plans.get(columns)
+        if plan is None:
+            plan = self._plans[columns] = self._build(columns)
+        return plan
+
+    @staticmethod
+    def _build(columns: Tuple[str, ...]) -> RowToPlayer:
+        index = {name: i for i, name in enumerate(columns)}
+        direct: List[Tuple[Callable, int]] = []
+        with_default: List[Tuple[Callable, int, Any]] = []
+        missing: List[Tuple[Callable, Any]] = []
+        for f in fields(Player):
+            setter = getattr(Player, f.name).__set__
+            if f.name in index:
+                if f.name in NULL_DEFAULTS:
+                    with_default.append((setter, index[f.name], NULL_DEFAULTS[f.name]))
+                else:
+                    direct.append((setter, index[f.name]))
+            elif f.default is not MISSING:
+                missing.append((setter, f.default))
+            else:
+                raise ValueError(f"查询结果缺少 Player 必需字段: {f.name}")
+
+        new_player = Player.__new__
+
+        def row_to_player(row: Sequence[Any]) -> Player:
+            player = new_player(Player)
+            for setter, i in direct:
+                setter(player, row[i])
+            for setter, i, default in with_default:
+                value = row[i]
+                setter(player, default if value is None else value)
+            for setter, default in missing:
+                setter(player, default)
+            player.mark_clean()
+            return player
+
+        return row_to_player
+
+    def map_row(self, description: Sequence[Sequence[Any]], row: Sequence[Any]) -> Optional[Player]:
+        rows = self.map_rows(description, [row])
+        return rows[0] if rows else None
+
+    def map_rows(self, description: Sequence[Sequence[Any]], rows: Sequence[Sequence[Any]]) -> List[Player]:
+        """转换多行，无法转换的行记录错误后跳过"""
+        try:
+            plan = self.compile(description)
+        except Exception as e:
+            logger.error(f"创建Player对象失败: {e}")
+            return []
+        players = []
+        for row in rows:
+            try:
+                players.append(plan(row))
+            except Exception as e:
+                logger.error(f"创建Player对象失败: {e}, row: {tuple(row)[:1]}")
+        return players
@@ -0,0 +1,256 @@
+# data/shard_router.py
+
+import re
+import time
+import asyncio
+import inspect
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from astrbot.api import logger
+
+from ..config_manager import ConfigManager
+from .data_manager import DataBase
+from .migration import MigrationManager
+
+# 全局分片：原数据库文件，承载私聊与跨群共享的数据
+GLOBAL_SHARD = "global"
+
+# 跨群共享的数据固定读写全局分片：GM激活码定义，以及激活码的使用记录
+# （使用次数上限与每人限领一次针对整个服务器，不能按群分别计数）
+GLOBAL_METHODS = frozenset({
+    "add_gm_redeem_code", "get_gm_redeem_code", "get_all_gm_redeem_codes",
+    "delete_gm_redeem_code", "add_gm_redeem_code_item", "get_gm_redeem_code_items",
+    "has_used_redeem_code", "get_redeem_code_use_count", "record_redeem_code_use",
+})
+
+_current_shard: ContextVar[str] = ContextVar("xiuxian_shard", default=GLOBAL_SHARD)
+
+ShardHook = Callable[[str, DataBase], Awaitable[None]]
+
+class _Shard:
+    """一个已打开的分片及其使用情况"""
+
+    __slots__ = ("db", "active", "last_used")
+
+    def __init__(self, db: DataBase):
+        self.db = db
+        self.active = 0  # 正在执行的调用数
+        self.last_used = time.monotonic()
+
+class ShardRouter:
+    """位于 DataBase 之前的分片路由：按群把调用转发到各自的 SQLite 文件
+
+    未启用分片时所有调用都落在全局分片，行为与单库相同。启用后每个群使用独立的数据库，
+    各自拥有写连接、缓存与后台任务，群之间的写入互不阻塞；私聊与跨群共享的数据使用全局分片。
+    群分片在首次访问时打开并迁移，空闲超时或打开数量超过上限时关闭。
+
+    当前分片由 route(event) 写入 ContextVar，处理器与管理器照常调用 DataBase 的方法即可。
+    route 同时为当前任务占用该分片直到任务结束：一条指令的多次调用之间分片不会被回收或淘汰，
+    缓存与内存排行榜不会在指令执行中途被丢弃重建。
+    """
+
+    REAP_INTERVAL_SECONDS = 60
+
+    def __init__(self, factory: Callable[[str], DataBase], config_manager: ConfigManager,
+                 enabled: bool = False, idle_minutes: float = 30, max_open: int = 16,
+                 on_open: Optional[ShardHook] = None, on_close: Optional[ShardHook] = None):
+        self._factory = factory
+        self._config_manager = config_manager
+        self.enabled = enabled
+        self._idle_seconds = max(1.0, float(idle_minutes) * 60)
+        self._max_open = max(1, int(max_open))
+        self._on_open = on_open
+        self._on_close = on_close
+        self._shards: Dict[str, _Shard] = {}
+        # 指令占用：分片名 -> 占用中的任务数；任务 -> 其占用的分片名
+        self._leases: Dict[str, int] = {}
+        self._task_leases: Dict[asyncio.Task, str] = {}
+        # 打开与关闭分片互斥，避免同一文件同时存在两个 DataBase 实例
+        self._lock = asyncio.Lock()
+        self._reaper_task: Optional[asyncio.Task] = None
+        self.stats = {"opens": 0, "closes": 0}
+
+    # ========== 分片选择 ==========
+
+    def shard_key(self, group_id: Any) -> str:
+        if not self.enabled or not group_id:
+            return GLOBAL_SHARD
+        return "group_" + re.sub(r"[^0-9A-Za-z_-]", "_", str(group_id))
+
+    def route(self, event) -> str:
+        """把当前指令路由到事件所在群的分片，并在当前任务结束前占用该分片"""
+        key = self.shard_key(event.get_group_id())
+        _current_shard.set(key)
+        self._hold(key)
+        return key
+
+    def _hold(self, key: str):
+        task = asyncio.current_task()
+        if task is None:
+            return
+        previous = self._task_leases.get(task)
+        if previous == key:
+            return
+        if previous is None:
+            task.add_done_callback(self._on_task_done)
+        else:
+            # 同一任务处理下一条指令时改为占用新的分片
+            self._release(previous)
+        self._task_leases[task] = key
+        self._leases[key] = self._leases.get(key, 0) + 1
+
+    def _on_task_done(self, task: asyncio.Task):
+        key = self._task_leases.pop(task, None)
+        if key is not None:
+            self._release(key)
+
+    def _release(self, key: str):
+        count = self._leases.pop(key, 0) - 1
+        if count > 0:
+            self._leases[key] = count
+        shard = self._shards.get(key)
+        if shard is not None:
+            shard.last_used = time.monotonic()
+
+    def _in_use(self, key: str, shard: _Shard) -> bool:
+        """有进行中的调用，或有尚未结束的指令占用时不能关闭"""
+        return shard.active > 0 or self._leases.get(key, 0) > 0
+
+    async def current(self) -> DataBase:
+        """打开（如尚未打开）并返回当前指令所在的分片"""
+        shard = await self._acquire(_current_shard.get())
+        return shard.db
+
+    # ========== 生命周期 ==========
+
+    async def open(self):
+        """打开全局分片并启动空闲分片回收"""
+        await self._acquire(GLOBAL_SHARD)
+        if self.enabled and self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reap_loop())
+
+    async def close(self):
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            try:
+                await self._reaper_task
+            except asyncio.CancelledError:
+                pass
+            self._reaper_task = None
+        async with self._lock:
+            for key in list(self._shards):
+                await self._close_locked(key)
+
+    async def _acquire(self, key: str) -> _Shard:
+        shard = self._shards.get(key)
+        if shard is None:
+            async with self._lock:
+                shard = self._shards.get(key)
+                if shard is None:
+                    shard = await self._open_locked(key)
+        shard.last_used = time.monotonic()
+        return shard
+
+    async def _open_locked(self, key: str) -> _Shard:
+        db = self._factory(key)
+        await db.connect()
+        try:
+            await MigrationManager(db.conn, self._config_manager).migrate()
+            await db.load_leaderboards()
+        except BaseException:
+            await db.close()
+            raise
+        shard = self._shards[key] = _Shard(db)
+        self.stats["opens"] += 1
+        if self._on_open:
+            await self._on_open(key, db)
+        logger.info(f"数据分片已打开: {key} ({db.db_path})")
+        await self._evict_locked(keep=key)
+        return shard
+
+    async def _close_locked(self, key: str):
+        shard = self._shards.pop(key)
+        if self._on_close:
+            await self._on_close(key, shard.db)
+        await shard.db.close()
+        self.stats["closes"] += 1
+        logger.info(f"数据分片已关闭: {key}")
+
+    async def _evict_locked(self, keep: str):
+        """群分片数量超过上限时，关闭最久未使用且未被占用的分片"""
+        idle = sorted(
+            (shard.last_used, key) for key, shard in self._shards.items()
+            if key not in (GLOBAL_SHARD, keep) and not self._in_use(key, shard)
+        )
+        excess = sum(1 for key in self._shards if key != GLOBAL_SHARD) - self._max_open
+        for _, key in idle[:max(0, excess)]:
+            await self._close_locked(key)
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(self.REAP_INTERVAL_SECONDS)
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                logger.error(f"回收空闲数据分片失败: {e}")
+
+    async def reap_idle(self):
+        """关闭空闲超时且未被占用的群分片，以及打开时正忙而未能关闭的超额分片"""
+        async with self._lock:
+            now = time.monotonic()
+            for key, shard in list(self._shards.items()):
+                if key != GLOBAL_SHARD and not self._in_use(key, shard) and now - shard.last_used > self._idle_seconds:
+                    await self._close_locked(key)
+            await self._evict_locked(keep=GLOBAL_SHARD)
+
+    def get_shard_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["open_shards"] = sorted(self._shards)
+        return stats
+
+    # ========== 调用转发 ==========
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        attr = getattr(DataBase, name, None)
+        if inspect.iscoroutinefunction(attr):
+            routed = self._route_call(name)
+        elif inspect.isasyncgenfunction(getattr(attr, "__wrapped__", None)):
+            routed = self._route_context(name)
+        else:
+            # 普通属性读取当前分片（未打开时读取全局分片）
+            shard = self._shards.get(_current_shard.get()) or self._shards[GLOBAL_SHARD]
+            return getattr(shard.db, name)
+        # 转发函数与分片无关（调用时才解析分片），缓存后不再经过 __getattr__
+        setattr(self, name, routed)
+        return routed
+
+    def _target(self, name: str) -> str:
+        return GLOBAL_SHARD if name in GLOBAL_METHODS else _current_shard.get()
+
+    def _route_call(self, name: str):
+        async def call(*args, **kwargs):
+            shard = await self._acquire(self._target(name))
+            shard.active += 1
+            try:
+                return await getattr(shard.db, name)(*args, **kwargs)
+            finally:
+                shard.active -= 1
+        call.__name__ = name
+        return call
+
+    def _route_context(self, name: str):
+        @asynccontextmanager
+        async def context(*args, **kwargs):
+            shard = await self._acquire(self._target(name))
+            shard.active += 1
+            try:
+                async with getattr(shard.db, name)(*args, **kwargs) as value:
+                    yield value
+            finally:
+                shard.active -= 1
+        context.__name__ = name
+        return context
@@ -0,0 +1,155 @@
+# data/snapshot.py
+
+import time
+import sqlite3
+import asyncio
+import aiosqlite
+from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any
+
+from astrbot.api import logger
+
+class _BackupRestarting(Exception):
+    """增量备份因源库被写入而反复重启"""
+
+class _Snapshot:
+    __slots__ = ("conn", "path", "taken_at", "users")
+
+    def __init__(self, conn: aiosqlite.Connection, path: Path, taken_at: float):
+        self.conn = conn
+        self.path = path
+        self.taken_at = taken_at
+        self.users = 0
+
+def backup_database(src_path: Path, dst_path: Path, pages: int, sleep: float, max_restarts: int = 8):
+    """在线程中执行：用在线备份 API 按页分步把源库复制到 dst_path，每步之间释放源库的读锁"""
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        # 其他连接写入源库后备份从头开始，剩余页数会回升
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise _BackupRestarting()
+        last_remaining = remaining
+
+    src = sqlite3.connect(src_path)
+    try:
+        dst = sqlite3.connect(dst_path)
+        try:
+            try:
+                src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+            except _BackupRestarting:
+                # 写入过于频繁时改为一次性复制：WAL 模式下读事务不阻塞写入
+                logger.warning(f"增量备份 {dst_path.name} 连续重启 {restarts} 次，改为一次性复制")
+                src.backup(dst, pages=-1)
+            # 副本作为独立文件使用，不需要 WAL 的 -wal/-shm 文件
+            dst.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+class SnapshotStore:
+    """用 SQLite 在线备份 API 定期把主库复制为只读快照，供排行榜等重读查询使用
+
+    备份在后台线程中用独立连接进行，每次只复制 pages_per_step 页，步与步之间让出源库，
+    写连接最多等待一步的时间。快照在两个文件之间交替生成，完成后切换只读连接，
+    查询中的旧快照在下一次生成前关闭。
+    """
+
+    # 增量备份因写入重启超过该次数后改为一次性复制
+    MAX_RESTARTS = 8
+
+    def __init__(self, db_path: Path, interval_seconds: float = 60, max_staleness_seconds: float = 300,
+                 pages_per_step: int = 256, step_sleep_ms: float = 5):
+        self.db_path = db_path
+        self.interval = max(10.0, float(interval_seconds))
+        self.max_staleness = max(0.0, float(max_staleness_seconds))
+        self.pages_per_step = max(1, int(pages_per_step))
+        self.step_sleep = max(0.0, float(step_sleep_ms)) / 1000
+        self._paths = [db_path.with_name(f"{db_path.stem}.snapshot-{i}{db_path.suffix}") for i in range(2)]
+        self._generation = 0
+        self._current: Optional[_Snapshot] = None
+        self._previous: Optional[_Snapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"snapshots": 0, "failures": 0, "last_duration_ms": 0.0, "hits": 0, "stale": 0}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for snapshot in (self._previous, self._current):
+            if snapshot is not None:
+                await snapshot.conn.close()
+        self._previous = self._current = None
+
+    async def _loop(self):
+        while True:
+            # 先等待一个周期：启动时的迁移完成后再生成第一份快照
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.error(f"生成数据库快照失败: {e}")
+
+    async def refresh(self):
+        """生成一份新快照并切换读取连接"""
+        path = self._paths[self._generation % 2]
+        # 目标文件上是上上一代快照，等待其查询结束后关闭
+        previous = self._previous
+        if previous is not None:
+            while previous.users:
+                await asyncio.sleep(0.05)
+            await previous.conn.close()
+            self._previous = None
+
+        started = time.time()
+        await asyncio.to_thread(
+            backup_database, self.db_path, path, self.pages_per_step, self.step_sleep, self.MAX_RESTARTS
+        )
+        conn = await aiosqlite.connect(f"file:{path.as_posix()}?mode=ro", uri=True)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA query_only = ON")
+
+        self._previous = self._current
+        self._current = _Snapshot(conn, path, started)
+        self._generation += 1
+        self.stats["snapshots"] += 1
+        self.stats["last_duration_ms"] = (time.time() - started) * 1000
+
+    def age(self) -> Optional[float]:
+        """当前快照的年龄（秒），尚无快照时为 None"""
+        return None if self._current is None else time.time() - self._current.taken_at
+
+    @asynccontextmanager
+    async def acquire(self):
+        """获取快照读连接；没有快照或快照超出允许的陈旧时间时得到 None，由调用方回退到主库"""
+        snapshot = self._current
+        if snapshot is None or time.time() - snapshot.taken_at > self.max_staleness:
+            self.stats["stale"] += 1
+            yield None
+            return
+        self.stats["hits"] += 1
+        snapshot.users += 1
+        try:
+            yield snapshot.conn
+        finally:
+            snapshot.users -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["age_seconds"] = self.age()
+        return stats
@@ -70,7 +70,7 @@ class CombatHandler:
                     return str(comp.qq), name
         return None, None
 
-    @player_required
+    @player_required(lock_targets=lambda self, event: [self._get_mentioned_user(event)[0]])
     async def handle_spar(self, attacker: Player, event: AstrMessageEvent):
         """普通切磋 - 无赌注，仅记录胜负"""
         # 检查冷却
@@ -150,7 +150,7 @@ class CombatHandler:
         
         yield event.plain_result("\n".join(report_lines))
 
-    @player_required
+    @player_required(lock_targets=lambda self, event: [self._get_mentioned_user(event)[0]])
     async def handle_duel(self, attacker: Player, event: AstrMessageEvent):
         """奇斗 - 带灵石赌注的PVP"""
         # 从消息中解析赌注金额（格式：奇斗 @人 金额）
@@ -222,26 +222,31 @@ class CombatHandler:
         a_clone.last_pvp_time = now
         d_clone.last_pvp_time = now
         
-        # 灵石赌注结算
+        # 灵石赌注由败者转给胜者，与战绩在同一个事务内提交
+        bet_from = bet_to = None
         if winner and winner.user_id == attacker.user_id:
             a_clone.pvp_wins += 1
             d_clone.pvp_losses += 1
-            a_clone.gold += bet_amount
-            d_clone.gold -= bet_amount
-            report_lines.append(f"\n💰 {attacker_name} 赢得 {bet_amount} 灵石！")
+            bet_from, bet_to = defender.user_id, attacker.user_id
+            winner_name = attacker_name
         elif winner:
             d_clone.pvp_wins += 1
             a_clone.pvp_losses += 1
-            d_clone.gold += bet_amount
-            a_clone.gold -= bet_amount
-            report_lines.append(f"\n💰 {defender_name or '对方'} 赢得 {bet_amount} 灵石！")
+            bet_from, bet_to = attacker.user_id, defender.user_id
+            winner_name = defender_name or '对方'
         
         # 消耗buff
         a_clone.consume_buff_duration()
         d_clone.consume_buff_duration()
         
-        await self.db.update_player(a_clone)
-        await self.db.update_player(d_clone)
+        async with self.db.unit_of_work():
+            await self.db.update_player(a_clone)
+            await self.db.update_player(d_clone)
+            if bet_from:
+                if await self.db.move_gold(bet_from, bet_to, bet_amount, reason="duel"):
+                    report_lines.append(f"\n💰 {winner_name} 赢得 {bet_amount} 灵石！")
+                else:
+                    report_lines.append("\n💰 败者灵石不足，赌注未能结算。")
         
         # 完成每日任务（双方都完成）
         if self.daily_task_handler:
@@ -3,7 +3,7 @@
 
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api import AstrBotConfig, logger
-from ..data import DataBase
+from ..data import DataBase, BackupJob
 from ..models import Player
 from ..config_manager import ConfigManager
 from .utils import player_required
@@ -690,3 +690,25 @@ class GMHandler:
         
         logger.info(f"[GM] 管理员 {event.get_sender_id()} 为激活码「{code}」添加了 {quantity}x {item_name}")
         yield event.plain_result(f"✅ 已为激活码「{code}」添加奖励：{quantity}x「{item_name}」")
+
+    async def handle_gm_backup(self, event: AstrMessageEvent, job: BackupJob, db_name: str):
+        """GM立即热备份当前数据库，报告备份耗时"""
+        if job is None:
+            yield event.plain_result("当前数据库尚未打开，无法备份。")
+            return
+
+        yield event.plain_result(f"开始备份 {db_name}，请稍候……")
+        try:
+            report = await job.run_once()
+        except Exception as e:
+            logger.error(f"[GM] 管理员 {event.get_sender_id()} 触发的数据库备份失败: {e}")
+            yield event.plain_result(f"❌ 备份失败：{str(e)[:80]}")
+            return
+
+        logger.info(f"[GM] 管理员 {event.get_sender_id()} 手动备份了数据库 {db_name}")
+        yield event.plain_result(
+            f"✅ 备份完成：{report['path'].name}\n"
+            f"大小：{report['size_bytes'] / 1024 / 1024:.2f} MB\n"
+            f"耗时：{report['total_ms']:.0f}ms（复制 {report['copy_ms']:.0f}ms，校验 {report['check_ms']:.0f}ms）\n"
+            f"保留备份：{report['kept']} 份，清理旧备份 {report['removed']} 份"
+        )
@@ -1,11 +1,12 @@
 # handlers/ranking_handler.py
 """排行榜处理器 - 提供各类排行榜查询功能"""
 
+from typing import Union
 from astrbot.api.event import AstrMessageEvent
 from ..data import DataBase
 from ..config_manager import ConfigManager
 from .utils import player_required
-from ..models import Player
+from ..models import Player, PlayerSummary
 
 __all__ = ["RankingHandler"]
 
@@ -17,7 +18,7 @@ class RankingHandler:
         self.db = db
         self.config_manager = config_manager
 
-    def _get_display_name(self, player: Player) -> str:
+    def _get_display_name(self, player: Union[Player, PlayerSummary]) -> str:
         """获取玩家显示名称（优先昵称，否则显示ID后4位）"""
         if player.nickname:
             return player.nickname
@@ -25,7 +26,7 @@ class RankingHandler:
 
     async def handle_realm_ranking(self, event: AstrMessageEvent):
         """境界排行榜 - 按境界和修为排序"""
-        players = await self.db.get_top_players_by_realm(limit=10)
+        players = await self.db.get_ranking_summaries("realm", limit=10)
         if not players:
             yield event.plain_result("仙界尚无修士，道友可成为第一人！")
             return
@@ -42,7 +43,7 @@ class RankingHandler:
 
     async def handle_wealth_ranking(self, event: AstrMessageEvent):
         """财富排行榜 - 按灵石数量排序"""
-        players = await self.db.get_top_players_by_gold(limit=10)
+        players = await self.db.get_ranking_summaries("gold", limit=10)
         if not players:
             yield event.plain_result("仙界尚无修士，道友可成为第一人！")
             return
@@ -58,17 +59,17 @@ class RankingHandler:
 
     async def handle_combat_ranking(self, event: AstrMessageEvent):
         """战力排行榜 - 按综合战力排序"""
-        players = await self.db.get_top_players_by_combat(limit=10, config_manager=self.config_manager)
+        players = await self.db.get_ranking_summaries("combat", limit=10)
         if not players:
             yield event.plain_result("仙界尚无修士，道友可成为第一人！")
             return
 
         lines = ["━━ 战力排行榜 ━━"]
-        for i, (player, combat_power) in enumerate(players, 1):
+        for i, player in enumerate(players, 1):
             level_name = player.get_level(self.config_manager)
             medal = self._get_medal(i)
             name = self._get_display_name(player)
-            lines.append(f"{medal} {i}. {name} | {level_name} | 战力:{combat_power}")
+            lines.append(f"{medal} {i}. {name} | {level_name} | 战力:{player.combat_power}")
 
         lines.append("━━━━━━━━━━━━")
         yield event.plain_result("\n".join(lines))
@@ -78,7 +79,7 @@ class RankingHandler:
         """查看自己的排名"""
         realm_rank = await self.db.get_player_realm_rank(player.user_id)
         wealth_rank = await self.db.get_player_wealth_rank(player.user_id)
-        combat_rank = await self.db.get_player_combat_rank(player.user_id, self.config_manager)
+        combat_rank = await self.db.get_player_combat_rank(player.user_id)
 
         lines = [
             f"━━ 道友 {event.get_sender_name()} 的排名 ━━",
@@ -91,7 +92,7 @@ class RankingHandler:
 
     async def handle_pvp_ranking(self, event: AstrMessageEvent):
         """PVP排行榜 - 按胜场和胜率排序"""
-        players = await self.db.get_top_players_by_pvp(limit=10)
+        players = await self.db.get_ranking_summaries("pvp", limit=10)
         if not players:
             yield event.plain_result("尚无修士参与过切磋，快去挑战其他道友吧！")
             return
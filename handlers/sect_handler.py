@@ -75,7 +75,7 @@ class SectHandler:
         if leader_player and leader_player.sect_id == sect_info['id']:
             leader_info = f"宗主: {leader_player.user_id[-4:]}"
 
-        members = await self.db.get_sect_members(player.sect_id)
+        members = await self.db.get_sect_member_summaries(player.sect_id)
         member_list = [f"{m.get_level(self.config_manager)}-{m.user_id[-4:]}" for m in members]
 
         reply_msg = (
@@ -330,12 +330,18 @@ class ShopHandler:
                 yield event.plain_result(f"「{item_name}」似乎不是一件可穿戴的法器。")
                 return
 
-            # 更新数据库
-            await self.db.remove_item_from_inventory(player.user_id, target_item_id, 1)
-            if unequipped_item_id:
-                await self.db.add_items_to_inventory_in_transaction(player.user_id, {unequipped_item_id: 1})
-            
-            await self.db.update_player(p_clone)
+            # 更新数据库：扣除法器、归还旧装备、写回装备栏在同一个事务内完成
+            async with self.db.unit_of_work() as uow:
+                removed = await self.db.remove_item_from_inventory(player.user_id, target_item_id, 1)
+                if removed:
+                    if unequipped_item_id:
+                        await self.db.add_items_to_inventory_in_transaction(player.user_id, {unequipped_item_id: 1})
+                    await self.db.update_player(p_clone)
+                else:
+                    uow.rollback()
+            if not removed:
+                yield event.plain_result(f"装备失败！你的「{item_name}」数量不足。")
+                return
             msg = f"已成功装备【{item_name}】。"
             
             # 完成每日任务
@@ -365,8 +371,15 @@ class ShopHandler:
             p_clone.set_learned_skills_list(learned)
             
             # 消耗物品
-            await self.db.remove_item_from_inventory(player.user_id, target_item_id, 1)
-            await self.db.update_player(p_clone)
+            async with self.db.unit_of_work() as uow:
+                removed = await self.db.remove_item_from_inventory(player.user_id, target_item_id, 1)
+                if removed:
+                    await self.db.update_player(p_clone)
+                else:
+                    uow.rollback()
+            if not removed:
+                yield event.plain_result(f"修炼失败！你的「{item_name}」数量不足。")
+                return
             
             # 构建效果提示
             effect_lines = []
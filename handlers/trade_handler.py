@@ -35,7 +35,7 @@ class TradeHandler:
                     return str(comp.qq)
         return None
 
-    @player_required
+    @player_required(lock_targets=lambda self, event: [self._get_mentioned_user(event)])
     async def handle_transfer(self, player: Player, event: AstrMessageEvent):
         """转账灵石给其他玩家"""
         # 从消息中解析金额（格式：转账 @人 数量）
@@ -77,25 +77,23 @@ class TradeHandler:
             yield event.plain_result(f"灵石不足！你只有 {player.gold} 灵石，无法转账 {amount} 灵石。")
             return
         
-        # 执行转账
-        p_clone = player.clone()
-        t_clone = target_player.clone()
+        # 执行转账：双方余额、账本与交易日志在同一个事务内提交
+        async with self.db.unit_of_work():
+            success = await self.db.move_gold(player.user_id, target_user_id, amount, tax=tax, reason="transfer")
+            if success:
+                # 记录交易日志
+                await self.db.record_trade(player.user_id, target_user_id, "transfer", None, None, amount)
         
-        p_clone.gold -= amount
-        t_clone.gold += actual_amount
-        
-        await self.db.update_player(p_clone)
-        await self.db.update_player(t_clone)
-        
-        # 记录交易日志
-        await self.db.record_trade(player.user_id, target_user_id, "transfer", None, None, amount)
+        if not success:
+            yield event.plain_result("转账失败，灵石不足或对方数据异常，请稍后重试。")
+            return
         
         tax_info = f"（扣除{int(tax_rate*100)}%交易税{tax}灵石）" if tax > 0 else ""
         msg = (
             f"转账成功！\n"
             f"你向对方转账了 {amount} 灵石{tax_info}\n"
             f"对方实际收到 {actual_amount} 灵石\n"
-            f"你的余额：{p_clone.gold} 灵石"
+            f"你的余额：{player.gold - amount} 灵石"
         )
         
         # 完成每日任务
@@ -106,7 +104,7 @@ class TradeHandler:
         
         yield event.plain_result(msg)
 
-    @player_required
+    @player_required(lock_targets=lambda self, event: [self._get_mentioned_user(event)])
     async def handle_gift(self, player: Player, event: AstrMessageEvent):
         """赠送物品给其他玩家"""
         # 从消息中解析物品名和数量（格式：赠送 @人 物品名 [数量]）
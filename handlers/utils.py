@@ -1,8 +1,13 @@
 # handlers/utils.py
 # 通用工具函数和装饰器
 
+import time
+import asyncio
+import weakref
+from contextlib import asynccontextmanager, aclosing
+from contextvars import ContextVar
 from functools import wraps
-from typing import Callable, Coroutine, AsyncGenerator
+from typing import Callable, Coroutine, AsyncGenerator, Iterable, Optional, Dict, Any, FrozenSet
 
 from astrbot.api.event import AstrMessageEvent
 from ..models import Player
@@ -18,57 +23,165 @@ CMD_BACKPACK = "我的背包"
 CMD_START_XIUXIAN = "我要修仙"
 
 
-def player_required(func: Callable[..., Coroutine[any, any, AsyncGenerator[any, None]]]):
+# 当前任务已持有的用户锁，嵌套获取同一用户时直接放行
+_held_user_locks: ContextVar[FrozenSet[str]] = ContextVar("xiuxian_held_user_locks", default=frozenset())
+
+class UserLockRegistry:
+    """按用户划分的指令互斥锁
+
+    同一用户的指令依次执行，避免「读取-clone-修改-写回」交错导致后写覆盖先写。
+    锁对象以弱引用保存，没有指令持有或等待时自动回收。
+    """
+
+    # 等待超过该时长（毫秒）时记录日志
+    SLOW_WAIT_MS = 1000
+
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.stats: Dict[str, Any] = {"acquisitions": 0, "contended": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+
+    def _lock_for(self, user_id: str) -> asyncio.Lock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_id] = lock
+        return lock
+
+    @asynccontextmanager
+    async def hold(self, *user_ids: str):
+        """按 user_id 排序依次获取多个用户的锁，跨用户指令之间不会形成环形等待"""
+        held = _held_user_locks.get()
+        needed = sorted(set(user_ids) - held)
+        locks = [self._lock_for(user_id) for user_id in needed]
+        contended = any(lock.locked() for lock in locks)
+        start = time.perf_counter()
+        acquired = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            self._record_wait(needed, contended, (time.perf_counter() - start) * 1000)
+            _held_user_locks.set(held.union(needed))
+            try:
+                yield
+            finally:
+                # 指令生成器可能在另一个上下文中被关闭（如被回收时），不能用 token 还原
+                _held_user_locks.set(held)
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    async def stream(self, user_ids: Iterable[str], results: AsyncGenerator) -> AsyncGenerator:
+        """在用户锁内逐条产出 results 的输出，锁持有到 results 结束或被关闭
+
+        「已持有」标记只在推进 results 时生效，产出给调用方期间恢复原值，
+        不会让发送消息的代码（及其间创建的任务）误以为已持有这些锁而直接放行。
+        """
+        outside = _held_user_locks.get()
+        async with self.hold(*user_ids):
+            inside = _held_user_locks.get()
+            try:
+                async for result in results:
+                    _held_user_locks.set(outside)
+                    try:
+                        yield result
+                    finally:
+                        _held_user_locks.set(inside)
+            finally:
+                await results.aclose()
+
+    def _record_wait(self, user_ids: list, contended: bool, wait_ms: float):
+        stats = self.stats
+        stats["acquisitions"] += 1
+        if not contended:
+            return
+        stats["contended"] += 1
+        stats["total_wait_ms"] += wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+        if wait_ms >= self.SLOW_WAIT_MS:
+            from astrbot.api import logger
+            logger.warning(f"指令等待用户锁 {user_ids} 耗时 {wait_ms:.0f}ms")
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["avg_contended_wait_ms"] = stats["total_wait_ms"] / stats["contended"] if stats["contended"] else 0.0
+        stats["live_locks"] = len(self._locks)
+        return stats
+
+user_locks = UserLockRegistry()
+
+LockTargets = Callable[[Any, AstrMessageEvent], Iterable[Optional[str]]]
+
+def player_required(func: Optional[Callable[..., Coroutine[any, any, AsyncGenerator[any, None]]]] = None, *,
+                    lock_targets: Optional[LockTargets] = None):
     """
     一个装饰器，用于需要玩家登录才能执行的指令。
     它会自动检查玩家是否存在、状态是否空闲（特定指令除外），否则将玩家对象作为参数注入。
+
+    整个指令在该玩家的用户锁内执行；涉及其他玩家的指令（转账、切磋等）通过
+    lock_targets(handler, event) 返回对方的 user_id，与自己的锁一起按固定顺序获取。
+    输出逐条产出，锁一直持有到生成器结束或被关闭（发送消息期间也不释放），
+    多条消息的指令与之前一样边执行边发送。
     """
+    if func is None:
+        return lambda f: player_required(f, lock_targets=lock_targets)
+
     @wraps(func)
     async def wrapper(self, event: AstrMessageEvent, *args, **kwargs):
-        from astrbot.api import logger
-        # self 是 Handler 类的实例 (e.g., PlayerHandler)
-        try:
-            player = await self.db.get_player_by_id(event.get_sender_id())
-        except Exception as e:
-            logger.error(f"get_player_by_id异常: {e}")
-            yield event.plain_result(f"读取玩家数据时发生错误，请联系管理员。错误: {str(e)[:50]}")
-            return
+        user_ids = [event.get_sender_id()]
+        if lock_targets is not None:
+            user_ids.extend(user_id for user_id in lock_targets(self, event) if user_id)
+        commands = _run_player_command(func, self, event, *args, **kwargs)
+        # 显式关闭，提前结束迭代时立即释放锁而不是等到被回收
+        async with aclosing(user_locks.stream(user_ids, commands)) as results:
+            async for result in results:
+                yield result
+
+    return wrapper
+
+async def _run_player_command(func, self, event: AstrMessageEvent, *args, **kwargs):
+    from astrbot.api import logger
+    # self 是 Handler 类的实例 (e.g., PlayerHandler)
+    try:
+        player = await self.db.get_player_by_id(event.get_sender_id())
+    except Exception as e:
+        logger.error(f"get_player_by_id异常: {e}")
+        yield event.plain_result(f"读取玩家数据时发生错误，请联系管理员。错误: {str(e)[:50]}")
+        return
+    
+    if not player:
+        yield event.plain_result(f"道友尚未踏入仙途，请发送「{CMD_START_XIUXIAN}」开启你的旅程。")
+        return
+
+    # 状态检查
+    if player.state != "空闲":
+        # 允许特定指令在非空闲时执行
+        allowed_commands = [
+            CMD_END_CULTIVATION, 
+            CMD_LEAVE_REALM,
+            CMD_CHECK_IN,
+            CMD_PLAYER_INFO,
+            CMD_MY_EQUIPMENT,
+            CMD_BACKPACK
+        ]
+        message_text = event.get_message_str().strip()
         
-        if not player:
-            yield event.plain_result(f"道友尚未踏入仙途，请发送「{CMD_START_XIUXIAN}」开启你的旅程。")
+        is_allowed = False
+        for cmd in allowed_commands:
+            if message_text.startswith(cmd):
+                is_allowed = True
+                break
+        
+        if not is_allowed:
+            yield event.plain_result(f"道友当前正在「{player.state}」中，无法分心他顾。")
             return
 
-        # 状态检查
-        if player.state != "空闲":
-            # 允许特定指令在非空闲时执行
-            allowed_commands = [
-                CMD_END_CULTIVATION, 
-                CMD_LEAVE_REALM,
-                CMD_CHECK_IN,
-                CMD_PLAYER_INFO,
-                CMD_MY_EQUIPMENT,
-                CMD_BACKPACK
-            ]
-            message_text = event.get_message_str().strip()
-            
-            is_allowed = False
-            for cmd in allowed_commands:
-                if message_text.startswith(cmd):
-                    is_allowed = True
-                    break
-            
-            if not is_allowed:
-                yield event.plain_result(f"道友当前正在「{player.state}」中，无法分心他顾。")
-                return
-
-        # 将 player 对象作为第一个参数传递给原始函数
-        try:
-            async for result in func(self, player, event, *args, **kwargs):
-                yield result
-        except Exception as e:
-            logger.error(f"Handler执行异常 - 函数:{func.__name__}, 玩家:{player.user_id}, 错误:{e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            yield event.plain_result(f"执行指令时发生异常，请联系管理员。")
-            
-    return wrapper
\ No newline at end of file
+    # 将 player 对象作为第一个参数传递给原始函数
+    try:
+        async for result in func(self, player, event, *args, **kwargs):
+            yield result
+    except Exception as e:
+        logger.error(f"Handler执行异常 - 函数:{func.__name__}, 玩家:{player.user_id}, 错误:{e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        yield event.plain_result(f"执行指令时发生异常，请联系管理员。")
\ No newline at end of file
@@ -2,7 +2,7 @@ from pathlib import Path
 from astrbot.api import logger, AstrBotConfig
 from astrbot.api.star import Context, Star, register
 from astrbot.api.event import AstrMessageEvent, filter
-from .data import DataBase, MigrationManager
+from .data import DataBase, ShardRouter, GLOBAL_SHARD, RetentionJob, LogArchiver, BackupJob
 from .config_manager import ConfigManager
 from .handlers import (
     MiscHandler, PlayerHandler, ShopHandler, SectHandler, SectShopHandler, SectBuildingHandler,
@@ -108,6 +108,7 @@ CMD_GM_ADD_CODE = "GM添加激活码"
 CMD_GM_DEL_CODE = "GM删除激活码"
 CMD_GM_LIST_CODES = "GM激活码列表"
 CMD_GM_ADD_CODE_ITEM = "GM激活码加物品"
+CMD_GM_BACKUP = "GM备份"
 
 # v2.5.0 激活码系统
 CMD_REDEEM = "橘的恩赐"
@@ -128,7 +129,46 @@ class XiuXianPlugin(Star):
         
         files_config = self.config.get("FILES", {})
         db_file = files_config.get("DATABASE_FILE", "xiuxian_data.db")
-        self.db = DataBase(db_file)
+        storage_config = self.config.get("STORAGE", {})
+        self.storage_config = storage_config
+
+        def create_shard_db(shard_key: str) -> DataBase:
+            # 全局分片沿用原数据库文件；群分片各占 shards/<分片名>/ 目录，归档文件也互不混杂
+            shard_file = db_file if shard_key == GLOBAL_SHARD else str(Path("shards") / shard_key / db_file)
+            return DataBase(
+                shard_file,
+                player_cache_size=storage_config.get("PLAYER_CACHE_SIZE", 1024),
+                inventory_cache_size=storage_config.get("INVENTORY_CACHE_SIZE", 1024),
+                write_behind=storage_config.get("WRITE_BEHIND_ENABLED", False),
+                write_behind_interval_ms=storage_config.get("WRITE_BEHIND_INTERVAL_MS", 500),
+                write_behind_batch_size=storage_config.get("WRITE_BEHIND_BATCH_SIZE", 64),
+                storage_profile=storage_config.get("STORAGE_PROFILE", "balanced"),
+                read_pool_size=storage_config.get("READ_POOL_SIZE", 2),
+                group_commit_window_ms=storage_config.get("GROUP_COMMIT_WINDOW_MS", 5),
+                config_manager=self.config_manager,
+                leaderboard_enabled=storage_config.get("LEADERBOARD_ENABLED", True),
+                daily_counter_flush_interval_ms=storage_config.get("DAILY_COUNTER_FLUSH_INTERVAL_MS", 1000),
+                audit_log_batch_size=storage_config.get("AUDIT_LOG_BATCH_SIZE", 200),
+                audit_log_interval_ms=storage_config.get("AUDIT_LOG_INTERVAL_MS", 200),
+                audit_log_queue_size=storage_config.get("AUDIT_LOG_QUEUE_SIZE", 10000),
+                snapshot_interval_seconds=storage_config.get("SNAPSHOT_INTERVAL_SECONDS", 120),
+                snapshot_max_staleness_seconds=storage_config.get("SNAPSHOT_MAX_STALENESS_SECONDS", 300),
+                snapshot_pages_per_step=storage_config.get("SNAPSHOT_PAGES_PER_STEP", 256),
+                snapshot_rankings=storage_config.get("SNAPSHOT_RANKINGS", True)
+            )
+
+        # 分片路由：未启用按群分片时只有全局分片，与单库行为一致
+        self._shard_jobs = {}
+        self._backup_jobs = {}
+        self.db = ShardRouter(
+            create_shard_db,
+            self.config_manager,
+            enabled=storage_config.get("SHARD_BY_GROUP", False),
+            idle_minutes=storage_config.get("SHARD_IDLE_MINUTES", 30),
+            max_open=storage_config.get("SHARD_MAX_OPEN", 16),
+            on_open=self._start_shard_jobs,
+            on_close=self._stop_shard_jobs
+        )
 
         self.misc_handler = MiscHandler(self.db)
         self.player_handler = PlayerHandler(self.db, self.config, self.config_manager)
@@ -167,12 +207,13 @@ class XiuXianPlugin(Star):
         logger.info("【修仙插件】XiuXianPlugin __init__ 方法成功执行完毕。")
 
     def _check_access(self, event: AstrMessageEvent) -> bool:
-        """检查访问权限，支持群聊白名单控制
+        """检查访问权限，支持群聊白名单控制，并把本次指令路由到所在群的数据分片
         
         返回值:
         - True: 允许访问
         - False: 拒绝访问
         """
+        self.db.route(event)
         # 如果没有配置白名单，允许所有访问
         if not self.whitelist_groups:
             return True
@@ -198,13 +239,55 @@ class XiuXianPlugin(Star):
             # 如果发送失败，静默处理
             pass
 
+    async def _start_shard_jobs(self, shard_key: str, db: DataBase):
+        """分片打开后启动其后台维护任务"""
+        storage_config = self.storage_config
+        jobs = []
+        # 过期按日数据清理，保留天数为0时不启用
+        retention_days = storage_config.get("RETENTION_DAYS", 30)
+        if retention_days > 0:
+            jobs.append(RetentionJob(
+                db,
+                horizon_days=retention_days,
+                interval_hours=storage_config.get("RETENTION_INTERVAL_HOURS", 6),
+                chunk_size=storage_config.get("RETENTION_CHUNK_SIZE", 500),
+                convert_auto_vacuum=storage_config.get("RETENTION_CONVERT_AUTO_VACUUM", False)
+            ))
+        # 历史日志归档到数据库旁的 archive 目录，天数为0时不启用
+        archive_days = storage_config.get("ARCHIVE_AFTER_DAYS", 90)
+        if archive_days > 0:
+            jobs.append(LogArchiver(
+                db,
+                db.db_path.parent / "archive",
+                horizon_days=archive_days,
+                interval_hours=storage_config.get("RETENTION_INTERVAL_HOURS", 6)
+            ))
+        # 热备份到数据库旁的 backups 目录；间隔为0时只响应GM手动备份
+        backup_job = BackupJob(
+            db,
+            db.db_path.parent / "backups",
+            interval_hours=storage_config.get("BACKUP_INTERVAL_HOURS", 24),
+            keep=storage_config.get("BACKUP_KEEP", 7),
+            pages_per_step=storage_config.get("BACKUP_PAGES_PER_STEP", 256)
+        )
+        jobs.append(backup_job)
+        self._backup_jobs[shard_key] = backup_job
+        for job in jobs:
+            job.start()
+        self._shard_jobs[shard_key] = jobs
+
+    async def _stop_shard_jobs(self, shard_key: str, db: DataBase):
+        self._backup_jobs.pop(shard_key, None)
+        for job in self._shard_jobs.pop(shard_key, []):
+            await job.stop()
+
     async def initialize(self):
-        await self.db.connect()
-        migration_manager = MigrationManager(self.db.conn, self.config_manager)
-        await migration_manager.migrate()
+        # 打开全局分片（迁移、构建排行榜）；群分片在首次访问时打开
+        await self.db.open()
         logger.info("修仙插件已加载。")
 
     async def terminate(self):
+        # 关闭所有分片，关闭前会写回延迟数据并排空日志队列
         await self.db.close()
         logger.info("修仙插件已卸载。")
         
@@ -802,6 +885,17 @@ class XiuXianPlugin(Star):
             return
         async for r in self.gm_handler.handle_gm_add_code_item(event, code, item_name, quantity): yield r
 
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command(CMD_GM_BACKUP, "GM立即备份当前数据库")
+    async def handle_gm_backup(self, event: AstrMessageEvent):
+        if not self._check_access(event):
+            await self._send_access_denied_message(event)
+            return
+        # 确保当前群的分片已打开，其备份任务随分片一起创建
+        db = await self.db.current()
+        job = self._backup_jobs.get(self.db.shard_key(event.get_group_id()))
+        async for r in self.gm_handler.handle_gm_backup(event, job, db.db_path.name): yield r
+
     # --- v2.5.0 激活码系统 ---
     @filter.command(CMD_REDEEM, "使用激活码领取奖励")
     async def handle_redeem(self, event: AstrMessageEvent, code: str):
@@ -1,13 +1,13 @@
 # models.py
 
 import json
-from dataclasses import dataclass, field, replace, asdict
-from typing import Optional, List, Dict, Any, TYPE_CHECKING
+from dataclasses import dataclass, field, fields, replace, asdict
+from typing import Optional, List, Dict, Any, Callable, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .config_manager import ConfigManager
 
-@dataclass
+@dataclass(slots=True)
 class Item:
     """物品数据模型"""
 
@@ -23,7 +23,7 @@ class Item:
     skill_effects: Optional[Dict[str, Any]] = None  # 功法永久属性加成
     buff_effect: Optional[Dict[str, Any]] = None  # 丹药buff效果
 
-@dataclass
+@dataclass(slots=True)
 class FloorEvent:
     """秘境层级事件数据模型"""
 
@@ -33,7 +33,7 @@ class FloorEvent:
     description: str = ""  # 事件描述文本
     requires_choice: bool = False  # 是否需要玩家做出选择
 
-@dataclass
+@dataclass(slots=True)
 class RealmInstance:
     """秘境实例数据模型"""
 
@@ -43,9 +43,31 @@ class RealmInstance:
     realm_type: str = "trial"  # 秘境类型：trial(试炼), treasure(宝藏), beast(妖兽), ruin(遗迹), ghost(幽冥)
     difficulty: str = "normal"  # 难度：normal(普通), hard(困难), hell(地狱)
     theme_modifiers: Dict[str, Any] = field(default_factory=dict)  # 主题修正值
+    # 紧凑存储：楼层由种子按需重新生成，floors 为空；旧数据 seed 为 None，floors 保存全部楼层
+    seed: Optional[int] = None
+    level_index: int = 0  # 生成时的境界，重新生成楼层时使用
+    overrides: Dict[int, FloorEvent] = field(default_factory=dict)  # 不按种子生成的楼层（0-based 索引）
 
-@dataclass
-class Player:
+class _PlayerState:
+    """Player 的非列状态，以槽位保存，不属于 dataclass 字段
+
+    _original_values：变更追踪。None 表示新建对象（所有字段都视为已修改），
+    dict 表示从数据库加载后被修改过的字段及其原始值。
+    _decoded：JSON 列的解码缓存，字段名 -> (解码时的原始字符串, 解码结果)。
+    原始字符串被替换后按对象身份判定失效；解码结果在对象间共享，只读不写。
+    """
+
+    __slots__ = ("_original_values", "_decoded")
+
+    def __new__(cls, *args, **kwargs):
+        # 槽位没有类级默认值，需在 __init__ 逐字段赋值（经过 __setattr__）之前初始化
+        self = object.__new__(cls)
+        object.__setattr__(self, "_original_values", None)
+        object.__setattr__(self, "_decoded", None)
+        return self
+
+@dataclass(slots=True)
+class Player(_PlayerState):
     """玩家数据模型"""
 
     user_id: str
@@ -92,56 +114,100 @@ class Player:
     # v2.5.0 昵称
     nickname: str = ""          # 玩家昵称（群昵称）
 
+    # 综合战力（持久化，供排行榜按索引查询）
+    combat_power: int = 0
+
+    # 乐观并发版本号：每次写入由数据库递增，不参与变更追踪
+    row_version: int = 0
+
+    def __setattr__(self, name: str, value: Any):
+        original = self._original_values
+        if original is not None and name not in original and name in _PLAYER_FIELD_SET:
+            old = getattr(self, name)
+            if old != value:
+                original[name] = old
+        object.__setattr__(self, name, value)
+
+    def mark_clean(self):
+        """标记当前状态与数据库一致，之后的修改会被追踪"""
+        object.__setattr__(self, "_original_values", {})
+
+    def get_changed_fields(self) -> List[str]:
+        """返回自加载以来值发生变化的字段（按定义顺序）"""
+        original = self._original_values
+        if original is None:
+            return [name for name in PLAYER_FIELD_NAMES if name in _PLAYER_FIELD_SET]
+        return [name for name in PLAYER_FIELD_NAMES
+                if name in original and getattr(self, name) != original[name]]
+
     def get_level(self, config_manager: "ConfigManager") -> str:
         if 0 <= self.level_index < len(config_manager.level_data):
             return config_manager.level_data[self.level_index]["level_name"]
         return "未知境界"
 
+    def _decode(self, name: str, decoder: Callable[[str], Any], default: Any) -> Any:
+        """返回 JSON 列的解码结果，同一个原始字符串只解码一次"""
+        raw = getattr(self, name)
+        decoded = self._decoded
+        if decoded is None:
+            decoded = {}
+            object.__setattr__(self, "_decoded", decoded)
+        entry = decoded.get(name)
+        if entry is not None and entry[0] is raw:
+            return entry[1]
+        try:
+            value = decoder(raw) if raw else default
+        except (ValueError, TypeError):
+            value = default
+        decoded[name] = (raw, value)
+        return value
+
+    def _encode(self, name: str, value: Any, decoded_value: Any):
+        """编码并写入 JSON 列，同时记下解码结果，后续读取无需再解析"""
+        raw = json.dumps(value)
+        setattr(self, name, raw)
+        if self._decoded is None:
+            object.__setattr__(self, "_decoded", {})
+        self._decoded[name] = (raw, decoded_value)
+
     def get_learned_skills_list(self) -> List[str]:
         """获取已学习功法ID列表"""
-        try:
-            return json.loads(self.learned_skills) if self.learned_skills else []
-        except json.JSONDecodeError:
-            return []
+        return list(self._decode("learned_skills", json.loads, ()))
     
     def set_learned_skills_list(self, skills: List[str]):
         """设置已学习功法ID列表"""
-        self.learned_skills = json.dumps(skills)
+        self._encode("learned_skills", skills, tuple(skills))
 
     def get_active_buffs_list(self) -> List[Dict[str, Any]]:
         """获取当前激活的buff列表"""
-        try:
-            return json.loads(self.active_buffs) if self.active_buffs else []
-        except json.JSONDecodeError:
-            return []
+        return [dict(b) for b in self._decode("active_buffs", json.loads, ())]
     
     def set_active_buffs_list(self, buffs: List[Dict[str, Any]]):
         """设置当前激活的buff列表"""
-        self.active_buffs = json.dumps(buffs)
+        self._encode("active_buffs", buffs, tuple(dict(b) for b in buffs))
     
     def add_buff(self, buff_type: str, value: int, duration: int):
         """添加一个buff (duration为剩余战斗次数)"""
-        buffs = self.get_active_buffs_list()
+        # 直接基于解码缓存构造新列表，只替换发生变化的条目
+        buffs = list(self._decode("active_buffs", json.loads, ()))
         # 检查是否已有同类型buff，如果有则刷新
-        for b in buffs:
+        for i, b in enumerate(buffs):
             if b.get("type") == buff_type:
-                b["value"] = max(b["value"], value)
-                b["duration"] = max(b["duration"], duration)
-                self.set_active_buffs_list(buffs)
+                buffs[i] = {**b, "value": max(b["value"], value), "duration": max(b["duration"], duration)}
+                self._encode("active_buffs", buffs, tuple(buffs))
                 return
         # 添加新buff
         buffs.append({"type": buff_type, "value": value, "duration": duration})
-        self.set_active_buffs_list(buffs)
+        self._encode("active_buffs", buffs, tuple(buffs))
     
     def consume_buff_duration(self):
         """战斗后消耗buff持续次数，移除已过期的buff"""
-        buffs = self.get_active_buffs_list()
         new_buffs = []
-        for b in buffs:
-            b["duration"] -= 1
+        for b in self._decode("active_buffs", json.loads, ()):
+            b = {**b, "duration": b["duration"] - 1}
             if b["duration"] > 0:
                 new_buffs.append(b)
-        self.set_active_buffs_list(new_buffs)
+        self._encode("active_buffs", new_buffs, tuple(new_buffs))
 
     def get_combat_stats(self, config_manager: "ConfigManager") -> Dict[str, Any]:
         """计算并返回玩家的最终战斗属性（基础属性+装备加成+功法加成+buff加成）"""
@@ -163,7 +229,7 @@ class Player:
                             stats[key] += value
         
         # 功法永久加成
-        learned = self.get_learned_skills_list()
+        learned = self._decode("learned_skills", json.loads, ())
         for skill_id in learned:
             skill_item = config_manager.item_data.get(str(skill_id))
             if skill_item and hasattr(skill_item, 'skill_effects') and skill_item.skill_effects:
@@ -172,7 +238,7 @@ class Player:
                         stats[key] += value
         
         # Buff临时加成
-        for buff in self.get_active_buffs_list():
+        for buff in self._decode("active_buffs", json.loads, ()):
             buff_type = buff.get("type", "")
             buff_value = buff.get("value", 0)
             if buff_type == "attack_buff":
@@ -183,6 +249,20 @@ class Player:
                 stats["max_hp"] += buff_value
         
         return stats
+
+    def calculate_combat_power(self, config_manager: Optional["ConfigManager"] = None) -> int:
+        """计算综合战力：攻击*2 + 防御*1.5 + 生命上限*0.1（含装备/功法/buff加成）"""
+        stats = self.get_combat_stats(config_manager) if config_manager else {
+            "attack": self.attack, "defense": self.defense, "max_hp": self.max_hp
+        }
+        return int(stats["attack"] * 2 + stats["defense"] * 1.5 + stats["max_hp"] * 0.1)
+
+    def refresh_combat_power(self, config_manager: Optional["ConfigManager"] = None):
+        """新建对象或影响战力的字段发生变化时，重新计算 combat_power"""
+        original = self._original_values
+        if original is not None and COMBAT_POWER_FIELDS.isdisjoint(original):
+            return
+        self.combat_power = self.calculate_combat_power(config_manager)
     
     def get_pvp_win_rate(self) -> float:
         """获取PVP胜率"""
@@ -191,14 +271,11 @@ class Player:
 
     def get_unlocked_recipes_list(self) -> List[str]:
         """获取已解锁配方ID列表"""
-        try:
-            return json.loads(self.unlocked_recipes) if self.unlocked_recipes else []
-        except json.JSONDecodeError:
-            return []
+        return list(self._decode("unlocked_recipes", json.loads, ()))
     
     def set_unlocked_recipes_list(self, recipes: List[str]):
         """设置已解锁配方ID列表"""
-        self.unlocked_recipes = json.dumps(recipes)
+        self._encode("unlocked_recipes", recipes, tuple(recipes))
     
     def unlock_recipe(self, recipe_id: str) -> bool:
         """解锁一个配方，返回是否是新解锁"""
@@ -210,32 +287,129 @@ class Player:
         return True
 
     def get_realm_instance(self) -> Optional[RealmInstance]:
-        if not self.realm_data:
-            return None
-        try:
-            data = json.loads(self.realm_data)
-            floors = [FloorEvent(**f) for f in data.get("floors", [])]
-            data["floors"] = floors
-            return RealmInstance(**data)
-        except (json.JSONDecodeError, TypeError):
-            return None
+        """获取秘境实例（与其他副本共享，只读）"""
+        return self._decode("realm_data", _decode_realm_instance, None)
 
     def set_realm_instance(self, instance: Optional[RealmInstance]):
         if instance is None:
             self.realm_data = None
         else:
-            self.realm_data = json.dumps(asdict(instance))
+            self._encode("realm_data", _encode_realm_instance(instance), instance)
+
+    def merge_changes(self, other: "Player"):
+        """并入 other 中本对象未修改的变更列，并沿用 other 的原始值追踪
+
+        用于把尚未写回的脏快照并入当前对象：即使两者当前值相同（本对象由快照加载），这些列也会被写入。
+        """
+        original = self._original_values
+        other_original = other._original_values
+        for name in other.get_changed_fields():
+            if original is None or name in original:
+                continue
+            if other_original is not None:
+                original[name] = other_original[name]
+                object.__setattr__(self, name, getattr(other, name))
+            else:
+                setattr(self, name, getattr(other, name))
+
+    def rebase(self, latest: "Player"):
+        """写入冲突时把自加载以来的修改重放到数据库最新状态上
+
+        累加型字段按增量合并，其余修改过的字段以本对象为准，未修改的字段取最新值；
+        之后相对 latest 追踪变更。增量合并后出现负数（如并发消费导致灵石不足）时抛出 ValueError。
+        """
+        original = self._original_values
+        changes = {}
+        for name in self.get_changed_fields():
+            value = getattr(self, name)
+            if name in PLAYER_DELTA_FIELDS and original is not None:
+                merged = getattr(latest, name) + (value - original[name])
+                if merged < 0 <= value:
+                    raise ValueError(f"玩家 {self.user_id} 的 {name} 合并后为 {merged}")
+                value = merged
+            changes[name] = value
+        for name in PLAYER_FIELD_NAMES:
+            object.__setattr__(self, name, getattr(latest, name))
+        self.mark_clean()
+        for name, value in changes.items():
+            setattr(self, name, value)
 
     def clone(self) -> "Player":
-        return replace(self)
+        p = replace(self)
+        if self._original_values is not None:
+            object.__setattr__(p, "_original_values", dict(self._original_values))
+        if self._decoded is not None:
+            object.__setattr__(p, "_decoded", dict(self._decoded))
+        return p
+
+def _encode_realm_instance(instance: RealmInstance) -> Dict[str, Any]:
+    data = asdict(instance)
+    if instance.seed is not None:
+        del data["floors"]
+    if not instance.overrides:
+        del data["overrides"]
+    return data
+
+def _decode_realm_instance(raw: str) -> RealmInstance:
+    data = json.loads(raw)
+    data["floors"] = [FloorEvent(**f) for f in data.get("floors", [])]
+    data["overrides"] = {int(k): FloorEvent(**f) for k, f in data.get("overrides", {}).items()}
+    return RealmInstance(**data)
+
+# 按定义顺序排列的 Player 字段名（对应 players 表的列）
+PLAYER_FIELD_NAMES = tuple(f.name for f in fields(Player))
+# 参与变更追踪、由 UPDATE 写入的字段
+_PLAYER_FIELD_SET = frozenset(PLAYER_FIELD_NAMES) - {"user_id", "row_version"}
+# 累加型字段：并发写入冲突时按增量重放，而不是覆盖
+PLAYER_DELTA_FIELDS = frozenset({
+    "experience", "gold", "hp", "pvp_wins", "pvp_losses",
+    "sect_contribution", "alchemy_exp", "smithing_exp",
+})
+# 参与战力计算的字段（基础属性、装备、功法、buff）
+COMBAT_POWER_FIELDS = frozenset({
+    "max_hp", "attack", "defense",
+    "equipped_weapon", "equipped_armor", "equipped_accessory",
+    "learned_skills", "active_buffs",
+})
+
+@dataclass(slots=True)
+class PlayerSummary:
+    """排行榜、宗门成员列表使用的玩家投影，只包含展示所需的列"""
+
+    user_id: str
+    nickname: str = ""
+    level_index: int = 0
+    experience: int = 0
+    gold: int = 0
+    combat_power: int = 0
+    pvp_wins: int = 0
+    pvp_losses: int = 0
+    sect_id: Optional[int] = None
+
+    @classmethod
+    def from_player(cls, player: Player) -> "PlayerSummary":
+        return cls(*(getattr(player, name) for name in PLAYER_SUMMARY_FIELDS))
+
+    def get_level(self, config_manager: "ConfigManager") -> str:
+        if 0 <= self.level_index < len(config_manager.level_data):
+            return config_manager.level_data[self.level_index]["level_name"]
+        return "未知境界"
+
+    def get_pvp_win_rate(self) -> float:
+        """获取PVP胜率"""
+        total = self.pvp_wins + self.pvp_losses
+        return (self.pvp_wins / total * 100) if total > 0 else 0.0
+
+# PlayerSummary 对应的 players 表列（按字段顺序，可直接按位置构造）
+PLAYER_SUMMARY_FIELDS = tuple(f.name for f in fields(PlayerSummary))
 
-@dataclass
+@dataclass(slots=True)
 class PlayerEffect:
     experience: int = 0
     gold: int = 0
     hp: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class Boss:
     """世界Boss数据模型"""
 
@@ -248,7 +422,7 @@ class Boss:
     cooldown_minutes: int
     rewards: dict
 
-@dataclass
+@dataclass(slots=True)
 class ActiveWorldBoss:
     """当前活跃的世界Boss数据模型"""
 
@@ -259,7 +433,7 @@ class ActiveWorldBoss:
     level_index: int
     defeated_at: Optional[float] = None
 
-@dataclass
+@dataclass(slots=True)
 class Monster:
     """怪物数据模型"""
 
@@ -271,7 +445,7 @@ class Monster:
     defense: int
     rewards: dict
 
-@dataclass
+@dataclass(slots=True)
 class AttackResult:
     """战斗结果数据模型"""
 
@@ -0,0 +1,19 @@
+# scripts/_bootstrap.py
+# 基准脚本的公共入口：把仓库根目录注册为 xiuxian 包（插件模块使用相对导入），需已安装 astrbot 与 aiosqlite
+
+import os
+import sys
+import tempfile
+import importlib.util
+import importlib.machinery
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# AstrBot 导入时会在根目录下创建 data/，指向临时目录，避免写入仓库的 data 包
+os.environ.setdefault("ASTRBOT_ROOT", tempfile.mkdtemp(prefix="astrbot-bench-"))
+
+if "xiuxian" not in sys.modules:
+    _spec = importlib.machinery.ModuleSpec("xiuxian", None, is_package=True)
+    _spec.submodule_search_locations = [str(ROOT)]
+    sys.modules["xiuxian"] = importlib.util.module_from_spec(_spec)
@@ -0,0 +1,62 @@
+# scripts/bench_leaderboard.py
+"""内存排行榜基准：分块有序表与普通有序列表（insort）在不同玩家数下的构建、移动与求排名耗时
+
+用法: python scripts/bench_leaderboard.py [玩家数 ...]
+"""
+
+import sys
+import time
+import random
+from bisect import bisect_left, insort
+
+import _bootstrap  # noqa: F401
+from xiuxian.data.leaderboard import SortedBlockList
+
+class _PlainSortedList:
+    """基准对照：单个有序列表，插入与删除需要移动其后的全部元素"""
+
+    def __init__(self, values=()):
+        self._items = sorted(values)
+
+    def add(self, value):
+        insort(self._items, value)
+
+    def remove(self, value):
+        i = bisect_left(self._items, value)
+        del self._items[i]
+
+    def bisect_left(self, value):
+        return bisect_left(self._items, value)
+
+def _bench(container_cls, players: int, moves: int = 20000):
+    rng = random.Random(42)
+    keys = {f"u{i}": (-rng.randrange(10 ** 9),) for i in range(players)}
+    started = time.perf_counter()
+    container = container_cls([(key, user_id) for user_id, key in keys.items()])
+    build = time.perf_counter() - started
+
+    user_ids = rng.sample(list(keys), min(moves, players))
+    started = time.perf_counter()
+    for user_id in user_ids:
+        # 模拟一次灵石变化：从旧位置删除、插入到新位置
+        container.remove((keys[user_id], user_id))
+        keys[user_id] = (-rng.randrange(10 ** 9),)
+        container.add((keys[user_id], user_id))
+    move = (time.perf_counter() - started) / len(user_ids)
+
+    started = time.perf_counter()
+    for user_id in user_ids:
+        container.bisect_left((keys[user_id], ""))
+    rank = (time.perf_counter() - started) / len(user_ids)
+    return build, move, rank
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 50_000, 200_000, 1_000_000]
+    print(f"{'玩家数':>10} {'实现':<16} {'全量构建(s)':>12} {'移动(µs)':>10} {'求排名(µs)':>12}")
+    for players in sizes:
+        for name, cls in (("insort 列表", _PlainSortedList), ("SortedBlockList", SortedBlockList)):
+            build, move, rank = _bench(cls, players)
+            print(f"{players:>10} {name:<16} {build:>12.3f} {move * 1e6:>10.2f} {rank * 1e6:>12.2f}")
+
+if __name__ == "__main__":
+    main()
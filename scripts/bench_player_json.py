@@ -0,0 +1,75 @@
+# scripts/bench_player_json.py
+"""Player JSON 列解码缓存基准：每次调用都重新解码（冷）与命中解码缓存（热）的单次耗时
+
+冷路径在每次调用前清空 _decoded，相当于缓存引入之前每次读取都执行 json.loads 的做法。
+用法: python scripts/bench_player_json.py [每项调用次数]
+"""
+
+import sys
+import json
+import timeit
+import dataclasses
+
+import _bootstrap  # noqa: F401
+from _bootstrap import ROOT
+from xiuxian.config_manager import ConfigManager
+from xiuxian.core.realm_manager import RealmGenerator
+from xiuxian.models import Player
+
+REALM_CONFIG = {"REALM_RULES": {"REALM_BASE_FLOORS": 10, "REALM_FLOORS_PER_LEVEL_DIVISOR": 100}}
+
+def _make_player(config_manager: ConfigManager) -> Player:
+    """8 门功法、2 个 buff、10 层秘境（旧格式，楼层全部展开保存）"""
+    skills = [item_id for item_id, item in config_manager.item_data.items()
+              if getattr(item, "skill_effects", None)][:8]
+    player = Player(user_id="bench", level_index=5)
+    player.learned_skills = json.dumps(skills)
+    player.active_buffs = json.dumps([
+        {"type": "attack_buff", "value": 20, "duration": 3},
+        {"type": "defense_buff", "value": 10, "duration": 2},
+    ])
+    instance = RealmGenerator.generate_for_player(player, REALM_CONFIG, config_manager)
+    floors = [RealmGenerator.get_floor_event(instance, i, config_manager) for i in range(instance.total_floors)]
+    player.set_realm_instance(dataclasses.replace(instance, floors=floors, seed=None))
+    return player
+
+def _per_call_us(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    config_manager = ConfigManager(ROOT)
+    player = _make_player(config_manager)
+    buffs = player.active_buffs
+    player.get_combat_stats(config_manager)
+    buffs_entry = player._decoded["active_buffs"]
+
+    def cold(fn):
+        def run():
+            object.__setattr__(player, "_decoded", None)
+            fn()
+        return run
+
+    def add_buff():
+        # 恢复原始 buff 列表；热路径同时恢复其解码结果
+        player.active_buffs = buffs
+        if player._decoded is not None:
+            player._decoded["active_buffs"] = buffs_entry
+        player.add_buff("attack_buff", 20, 3)
+
+    cases = [
+        ("get_combat_stats", lambda: player.get_combat_stats(config_manager)),
+        ("get_realm_instance", player.get_realm_instance),
+        ("add_buff", add_buff),
+    ]
+    reset = _per_call_us(cold(lambda: None), number)
+    print(f"{'操作':<20} {'冷(µs)':>10} {'热(µs)':>10}")
+    for name, fn in cases:
+        fn()
+        # 冷路径扣除清空缓存本身的开销
+        cold_us = _per_call_us(cold(fn), number) - reset
+        warm_us = _per_call_us(fn, number)
+        print(f"{name:<20} {cold_us:>10.2f} {warm_us:>10.2f}")
+
+if __name__ == "__main__":
+    main()
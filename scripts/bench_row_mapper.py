@@ -0,0 +1,113 @@
+# scripts/bench_row_mapper.py
+"""players 行映射基准：全表 SELECT * 扫描后转换为 Player 的耗时与内存
+
+第一部分对照按行构造 dict、补默认值后调用 Player(**dict)（PlayerRowMapper 引入之前的做法）；
+两者都作用于当前的槽位化 Player，因此内存差异只反映转换路径本身。
+第二部分对照 slots=True 之前的 Player（字段存放在实例 __dict__），按每 10k 个实例统计常驻内存。
+用法: python scripts/bench_row_mapper.py [玩家数]
+"""
+
+import sys
+import time
+import sqlite3
+import tracemalloc
+from dataclasses import fields, asdict, field, make_dataclass
+
+import _bootstrap  # noqa: F401
+from xiuxian.data.row_mapper import PlayerRowMapper, NULL_DEFAULTS
+from xiuxian.models import Player, PLAYER_FIELD_NAMES
+
+def _legacy_create_player(row_dict: dict) -> Player:
+    """基准对照：每行重建字段集合与默认值字典，经 __init__ 逐字段构造"""
+    valid_fields = {f.name for f in fields(Player)}
+    filtered_dict = {k: v for k, v in row_dict.items() if k in valid_fields}
+    defaults = dict(NULL_DEFAULTS, equipped_weapon=None, equipped_armor=None, equipped_accessory=None,
+                    realm_id=None, realm_data=None)
+    for field, default in defaults.items():
+        if field not in filtered_dict or filtered_dict[field] is None:
+            filtered_dict[field] = default
+    player = Player(**filtered_dict)
+    player.mark_clean()
+    return player
+
+def _legacy_map(cursor):
+    return [_legacy_create_player(dict(row)) for row in cursor.fetchall()]
+
+def _mapper_map(cursor):
+    return PlayerRowMapper().map_rows(cursor.description, cursor.fetchall())
+
+def _pre_slots_player():
+    """slots=True 之前的 Player：同样的字段与变更追踪，字段存放在实例 __dict__，私有状态为类属性默认值"""
+    return make_dataclass(
+        "Player",
+        [(f.name, f.type, field(default=f.default)) for f in fields(Player)],
+        namespace={
+            "__setattr__": Player.__setattr__,
+            "mark_clean": Player.mark_clean,
+            "_original_values": None,
+            "_decoded": None,
+        },
+    )
+
+def _make_db(players: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"CREATE TABLE players ({', '.join(PLAYER_FIELD_NAMES)}, PRIMARY KEY (user_id))")
+    placeholders = ", ".join("?" for _ in PLAYER_FIELD_NAMES)
+    conn.executemany(
+        f"INSERT INTO players VALUES ({placeholders})",
+        (tuple(asdict(Player(user_id=f"u{i}", gold=i, experience=i * 3, nickname=f"道友{i}")).values())
+         for i in range(players)),
+    )
+    conn.commit()
+    return conn
+
+def _measure(conn: sqlite3.Connection, mapper):
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        result = mapper(conn.execute("SELECT * FROM players"))
+        best = min(best, time.perf_counter() - started)
+        del result
+    tracemalloc.start()
+    result = mapper(conn.execute("SELECT * FROM players"))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, retained, peak, result
+
+def _measure_instances(cls, rows: list, count: int = 10_000):
+    """构造 count 个已标记为干净的实例，返回最佳耗时与常驻内存"""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        instances = [cls(**rows[i % len(rows)]) for i in range(count)]
+        best = min(best, time.perf_counter() - started)
+        del instances
+    tracemalloc.start()
+    instances = [cls(**rows[i % len(rows)]) for i in range(count)]
+    for instance in instances:
+        instance.mark_clean()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, retained
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    conn = _make_db(players)
+    print(f"{'实现':<16} {'耗时(ms)':>10} {'峰值(MiB)':>10} {'常驻(MiB)':>10} {'每玩家(B)':>10}")
+    results = {}
+    for name, mapper in (("dict + __init__", _legacy_map), ("PlayerRowMapper", _mapper_map)):
+        elapsed, retained, peak, results[name] = _measure(conn, mapper)
+        print(f"{name:<16} {elapsed * 1000:>10.0f} {peak / 2 ** 20:>10.1f} "
+              f"{retained / 2 ** 20:>10.1f} {retained / players:>10.0f}")
+    legacy, mapped = results.values()
+    assert [asdict(p) for p in legacy] == [asdict(p) for p in mapped], "两种转换结果不一致"
+
+    rows = [asdict(p) for p in mapped[:1000]]
+    print(f"\n{'Player':<16} {'构造(ms)':>10} {'每10k(MiB)':>11} {'每实例(B)':>10}")
+    for name, cls in (("__dict__", _pre_slots_player()), ("slots=True", Player)):
+        elapsed, retained = _measure_instances(cls, rows)
+        print(f"{name:<16} {elapsed * 1000:>10.1f} {retained / 2 ** 20:>11.2f} {retained / 10_000:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# tests/conftest.py
+# 插件以包的形式由 AstrBot 加载（模块内使用相对导入），测试中把仓库根目录注册为 xiuxian 包后导入
+
+import os
+import sys
+import asyncio
+import tempfile
+import importlib.util
+import importlib.machinery
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# AstrBot 导入时会在根目录下创建 data/，测试中指向临时目录，避免写入仓库的 data 包
+os.environ.setdefault("ASTRBOT_ROOT", tempfile.mkdtemp(prefix="astrbot-test-"))
+
+if "xiuxian" not in sys.modules:
+    _spec = importlib.machinery.ModuleSpec("xiuxian", None, is_package=True)
+    _spec.submodule_search_locations = [str(ROOT)]
+    sys.modules["xiuxian"] = importlib.util.module_from_spec(_spec)
+
+
+@pytest.fixture
+def config_manager():
+    from xiuxian.config_manager import ConfigManager
+    return ConfigManager(ROOT)
+
+
+@pytest.fixture
+def open_db(tmp_path, monkeypatch, config_manager):
+    """返回一个协程工厂：在临时目录创建、迁移并打开 DataBase"""
+    from astrbot.api.star import StarTools
+    from xiuxian.data import DataBase, MigrationManager
+
+    monkeypatch.setattr(StarTools, "get_data_dir", classmethod(lambda cls, plugin_name=None: tmp_path))
+
+    async def factory(db_file_name: str = "xiuxian.db", **kwargs) -> DataBase:
+        kwargs.setdefault("config_manager", config_manager)
+        db = DataBase(db_file_name, **kwargs)
+        await db.connect()
+        # 与插件启动相同的全新安装路径
+        await MigrationManager(db.conn, config_manager).migrate()
+        await db.load_leaderboards()
+        return db
+
+    return factory
+
+
+@pytest.fixture
+def run_db(open_db):
+    """打开数据库执行 scenario(db) 并确保关闭，返回 scenario 的结果：run_db(scenario, **open_db 参数)"""
+    def run(scenario, **kwargs):
+        async def main():
+            db = await open_db(**kwargs)
+            try:
+                return await scenario(db)
+            finally:
+                await db.close()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,37 @@
+# tests/test_audit_logger.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+def test_bad_row_only_drops_itself(open_db):
+    async def scenario():
+        db = await open_db(audit_log_batch_size=100, audit_log_interval_ms=50)
+        try:
+            await db.create_player(Player(user_id="a"))
+            await db.create_player(Player(user_id="b"))
+            for i in range(30):
+                await db.record_trade("a", "b", "gift", gold_amount=i)
+            # 收款方不存在，违反 trade_log 的外键约束
+            await db.record_trade("a", "ghost", "gift", gold_amount=999)
+            for i in range(29):
+                await db.record_trade("b", "a", "gift", gold_amount=i)
+            await db.drain_audit_log()
+
+            async with db.conn.execute("SELECT COUNT(*), SUM(gold_amount = 999) FROM trade_log") as cursor:
+                count, ghosts = await cursor.fetchone()
+            assert (count, ghosts) == (59, 0)
+            stats = db.audit_log.get_stats()
+            assert stats["written"] == 59
+            assert stats["failed"] == 1
+            assert stats["split_batches"] > 0
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+# tests/test_backup.py
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.data import backup as backup_module
+from xiuxian.data.backup import BackupJob
+
+
+class _FrozenDateTime(datetime):
+    """时钟精度不足：每次 now() 都返回同一时刻"""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 3, 1, 12, 0, 0)
+
+
+def test_backups_within_same_clock_tick_do_not_overwrite(open_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(backup_module, "datetime", _FrozenDateTime)
+
+    async def scenario():
+        db = await open_db()
+        job = BackupJob(db, tmp_path / "backups", keep=3, step_sleep_ms=0)
+        try:
+            paths = []
+            for _ in range(4):
+                paths.append((await job.run_once())["path"])
+            return paths, job._backup_files()
+        finally:
+            await db.close()
+
+    paths, kept = asyncio.run(scenario())
+    assert len(set(paths)) == 4
+    # 按文件名排序即按创建顺序排序，轮换删除的是最早的一份
+    assert kept == paths[1:]
+    assert not paths[0].exists()
+    assert all(p.stat().st_size > 0 for p in kept)
@@ -0,0 +1,94 @@
+# tests/test_bulk_inventory.py
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+async def _inventory(db, user_id="u1"):
+    async with db.conn.execute(
+        "SELECT item_id, quantity FROM inventory WHERE user_id = ? ORDER BY item_id", (user_id,)
+    ) as cursor:
+        return {row[0]: row[1] for row in await cursor.fetchall()}
+
+
+async def _with_player(db, supports_returning):
+    # 旧版 SQLite 不支持 RETURNING 时走 UPSERT 后再查询的分支
+    db._SUPPORTS_RETURNING = supports_returning
+    await db.create_player(Player(user_id="u1"))
+
+
+@pytest.fixture(params=[True, False], ids=["returning", "select"])
+def supports_returning(request):
+    return request.param
+
+
+def test_insufficient_stock_rolls_back_whole_batch(run_db, supports_returning):
+    async def scenario(db):
+        await _with_player(db, supports_returning)
+        await db.update_inventory("u1", produce={"1": 5, "2": 1})
+
+        ok, missing = await db.update_inventory("u1", consume={"1": 2, "2": 3, "9": 1}, produce={"3": 4})
+
+        assert not ok and missing == {"2": 1, "9": 0}
+        assert await _inventory(db) == {"1": 5, "2": 1}
+        item = await db.get_item_from_inventory("u1", "1")
+        assert item["quantity"] == 5
+
+    run_db(scenario)
+
+
+def test_same_item_consumed_and_produced_nets_out(run_db, supports_returning):
+    async def scenario(db):
+        await _with_player(db, supports_returning)
+        await db.update_inventory("u1", produce={"1": 5, "2": 2})
+
+        ok, quantities = await db.update_inventory("u1", consume={"1": 3, "2": 2}, produce={"1": 1, "2": 2})
+
+        # 净变化为0的物品不写入；消耗需以原数量校验，不能先加后扣
+        assert ok and quantities == {"1": 3}
+        assert await _inventory(db) == {"1": 3, "2": 2}
+        ok, missing = await db.update_inventory("u1", consume={"2": 3}, produce={"2": 5})
+        assert not ok and missing == {"2": 2}
+
+    run_db(scenario)
+
+
+def test_quantity_reaching_zero_deletes_row(run_db, supports_returning):
+    async def scenario(db):
+        await _with_player(db, supports_returning)
+        await db.update_inventory("u1", produce={"1": 2, "2": 1})
+
+        ok, quantities = await db.update_inventory("u1", consume={"1": 2, "2": 1}, produce={"3": 1})
+
+        assert ok and quantities == {"1": 0, "2": 0, "3": 1}
+        assert await _inventory(db) == {"3": 1}
+        assert await db.get_item_from_inventory("u1", "1") is None
+
+    run_db(scenario)
+
+
+def test_batches_larger_than_chunk_size(run_db, supports_returning):
+    async def scenario(db):
+        await _with_player(db, supports_returning)
+        count = db.INVENTORY_BULK_ROWS * 2 + 17
+        produced = {str(i): i % 5 + 1 for i in range(count)}
+
+        ok, quantities = await db.update_inventory("u1", produce=produced)
+        assert ok and quantities == produced
+
+        # 不足的物品位于最后一块，前面的块同样不写入
+        shortage = dict(produced, **{str(count - 1): 99})
+        ok, missing = await db.update_inventory("u1", consume=shortage)
+        assert not ok and missing == {str(count - 1): produced[str(count - 1)]}
+        assert await _inventory(db) == produced
+
+        # 全部清空：跨块的删除都生效
+        ok, quantities = await db.update_inventory("u1", consume=produced, produce={"x": 1})
+        assert ok and len(quantities) == count + 1
+        assert await _inventory(db) == {"x": 1}
+
+    run_db(scenario)
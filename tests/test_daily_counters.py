@@ -0,0 +1,54 @@
+# tests/test_daily_counters.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.data.daily_counters import SCOPE_ADVENTURE
+
+
+async def _stored(db, date):
+    async with db.conn.execute(
+        "SELECT count FROM daily_counters WHERE scope = ? AND user_id = 'u1' AND counter_date = ?",
+        (SCOPE_ADVENTURE, date)
+    ) as cursor:
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+
+
+def test_late_increment_after_rollover_keeps_unflushed_value(open_db):
+    async def scenario():
+        # 写回间隔足够长，跨天时前一天的计数仍只在内存中
+        db = await open_db(daily_counter_flush_interval_ms=60000)
+        try:
+            assert await db.increment_daily_counter(SCOPE_ADVENTURE, "u1", "2026-01-01", 2) == 2
+            await db.increment_daily_counter(SCOPE_ADVENTURE, "u1", "2026-01-02")
+            # 跨天前开始的指令在新的一天才提交
+            assert await db.increment_daily_counter(SCOPE_ADVENTURE, "u1", "2026-01-01") == 3
+            assert await db.get_daily_counter(SCOPE_ADVENTURE, "u1", "2026-01-01") == 3
+
+            await db.flush_daily_counters()
+            assert await _stored(db, "2026-01-01") == 3
+            assert await _stored(db, "2026-01-02") == 1
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_late_set_after_rollover_is_not_overwritten(open_db):
+    async def scenario():
+        db = await open_db(daily_counter_flush_interval_ms=60000)
+        try:
+            await db.set_daily_counter(SCOPE_ADVENTURE, "u1", "2026-01-01", 1)
+            await db.get_daily_counter(SCOPE_ADVENTURE, "u1", "2026-01-02")
+            await db.set_daily_counter(SCOPE_ADVENTURE, "u1", "2026-01-01", 5)
+            await db.flush_daily_counters()
+            assert await _stored(db, "2026-01-01") == 5
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+# tests/test_gold_ledger.py
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+async def _ledger(db):
+    async with db.conn.execute(
+        "SELECT from_user_id, to_user_id, amount, tax, reason FROM gold_ledger ORDER BY id"
+    ) as cursor:
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+async def _gold(db, *user_ids):
+    return [(await db.get_player_by_id(user_id)).gold for user_id in user_ids]
+
+
+async def _setup(db):
+    await db.create_player(Player(user_id="a", gold=100))
+    await db.create_player(Player(user_id="b", gold=10))
+
+
+def test_transfer_moves_gold_and_records_ledger(run_db):
+    async def scenario(db):
+        await _setup(db)
+        # 先读入缓存，转移后缓存需失效
+        assert await _gold(db, "a", "b") == [100, 10]
+
+        assert await db.move_gold("a", "b", 60, tax=6, reason="交易")
+        assert await db.move_gold(None, "b", 5, reason="签到")
+        assert await db.move_gold("b", None, 9, reason="捐献")
+
+        assert await _gold(db, "a", "b") == [40, 60]
+        assert await _ledger(db) == [("a", "b", 60, 6, "交易"), (None, "b", 5, 0, "签到"), ("b", None, 9, 0, "捐献")]
+
+    run_db(scenario)
+
+
+def test_failed_transfer_changes_nothing(run_db):
+    async def scenario(db):
+        await _setup(db)
+        # 余额不足、收款方不存在时整体回滚，不记账
+        assert not await db.move_gold("b", "a", 11)
+        assert not await db.move_gold("a", "ghost", 50)
+        with pytest.raises(ValueError):
+            await db.move_gold("a", "b", 10, tax=11)
+
+        assert await _gold(db, "a", "b") == [100, 10]
+        assert await _ledger(db) == []
+
+    run_db(scenario)
+
+
+def test_transfer_sees_deferred_player_writes(run_db):
+    async def scenario(db):
+        await _setup(db)
+        player = await db.get_player_by_id("a")
+        player.gold = 500
+        player.experience = 3
+        await db.update_player(player)
+
+        # 尚未写回的灵石先刷新，再按数据库中的余额扣除
+        assert await db.move_gold("a", "b", 400, reason="交易")
+        latest = await db.get_player_by_id("a")
+        assert (latest.gold, latest.experience) == (100, 3)
+
+    run_db(scenario, write_behind=True, write_behind_interval_ms=60_000)
+
+
+def test_grant_gold_records_only_existing_players(run_db):
+    async def scenario(db):
+        await _setup(db)
+        granted = await db.grant_gold({"a": 7, "ghost": 7, "b": 0}, reason="世界Boss")
+
+        assert granted == 1
+        assert await _gold(db, "a", "b") == [107, 10]
+        assert await _ledger(db) == [(None, "a", 7, 0, "世界Boss")]
+
+    run_db(scenario)
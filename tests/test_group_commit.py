@@ -0,0 +1,70 @@
+# tests/test_group_commit.py
+
+import asyncio
+
+import pytest
+
+aiosqlite = pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+
+def _count_commits(db, fail: bool = False):
+    commits = []
+    real_commit = db.conn.commit
+
+    async def commit():
+        commits.append(1)
+        if fail:
+            raise OSError("disk I/O error")
+        await real_commit()
+
+    db.conn.commit = commit
+    return commits
+
+
+async def _committed_sects(db):
+    # 另开连接读取，只能看到已提交的数据
+    async with aiosqlite.connect(db.db_path) as conn, conn.execute("SELECT name FROM sects ORDER BY name") as cursor:
+        return [row[0] for row in await cursor.fetchall()]
+
+
+def test_concurrent_writes_share_one_commit(run_db):
+    async def scenario(db):
+        commits = _count_commits(db)
+        await asyncio.gather(db.create_sect("青云门", "u1"), db.create_sect("天音寺", "u2"))
+
+        # 两次写入都在同一次提交落盘之后才返回
+        assert len(commits) == 1
+        stats = db._committer.get_stats()
+        assert (stats["commits"], stats["writes"], stats["max_batch_size"]) == (1, 2, 2)
+        assert await _committed_sects(db) == ["天音寺", "青云门"]
+
+    run_db(scenario, group_commit_window_ms=50)
+
+
+def test_failed_group_commit_fails_every_writer(run_db):
+    async def scenario(db):
+        commits = _count_commits(db, fail=True)
+        results = await asyncio.gather(
+            db.create_sect("青云门", "u1"), db.create_sect("天音寺", "u2"), return_exceptions=True
+        )
+        assert len(commits) == 1
+        assert all(isinstance(result, OSError) for result in results)
+        del db.conn.commit
+
+        # 整批已回滚，之后的写入不会把它们一并提交
+        await db.create_sect("焚香谷", "u3")
+        assert await _committed_sects(db) == ["焚香谷"]
+
+    run_db(scenario, group_commit_window_ms=50)
+
+
+def test_zero_window_commits_each_write(run_db):
+    async def scenario(db):
+        commits = _count_commits(db)
+        await asyncio.gather(db.create_sect("青云门", "u1"), db.create_sect("天音寺", "u2"))
+        assert len(commits) == 2
+        assert db._committer.get_stats()["commits"] == 0
+        assert await _committed_sects(db) == ["天音寺", "青云门"]
+
+    run_db(scenario, group_commit_window_ms=0)
@@ -0,0 +1,100 @@
+# tests/test_inventory_cache.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+async def _stored(db, item_id):
+    async with db.conn.execute(
+        "SELECT quantity FROM inventory WHERE user_id = 'u1' AND item_id = ?", (item_id,)
+    ) as cursor:
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+
+
+async def _cached_quantity(db, item_id):
+    item = await db.get_item_from_inventory("u1", item_id)
+    return item["quantity"] if item else 0
+
+
+async def _setup(open_db):
+    db = await open_db()
+    await db.create_player(Player(user_id="u1"))
+    await db.update_inventory("u1", produce={"1": 5, "2": 3})
+    # 先整包读入缓存，之后的修改走增量同步
+    assert await _cached_quantity(db, "1") == 5
+    return db
+
+
+def test_unit_of_work_rollback_discards_cached_changes(open_db):
+    async def scenario():
+        db = await _setup(open_db)
+        try:
+            with pytest.raises(RuntimeError):
+                async with db.unit_of_work():
+                    assert await db.remove_item_from_inventory("u1", "1", 2)
+                    ok, _ = await db.transactional_craft_item("u1", {"2": 3}, "3", 1)
+                    assert ok
+                    # 块内读到自己的修改
+                    assert await _cached_quantity(db, "1") == 3
+                    assert await _cached_quantity(db, "3") == 1
+                    raise RuntimeError("boom")
+            assert [await _cached_quantity(db, i) for i in ("1", "2", "3")] == [5, 3, 0]
+            assert [await _stored(db, i) for i in ("1", "2", "3")] == [5, 3, 0]
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_savepoint_rollback_inside_unit_of_work_leaves_cache_untouched(open_db):
+    async def scenario():
+        db = await _setup(open_db)
+        try:
+            async with db.unit_of_work():
+                ok, missing = await db.update_inventory("u1", consume={"1": 1, "2": 9}, produce={"3": 1})
+                assert not ok and missing == {"2": 3}
+                assert await db.remove_item_from_inventory("u1", "1", 1)
+            assert [await _cached_quantity(db, i) for i in ("1", "2", "3")] == [4, 3, 0]
+            assert [await _stored(db, i) for i in ("1", "2", "3")] == [4, 3, 0]
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("in_unit_of_work", [False, True])
+def test_failed_commit_does_not_leave_rolled_back_quantities_cached(open_db, in_unit_of_work):
+    async def scenario():
+        db = await _setup(open_db)
+        real_commit = db.conn.commit
+
+        async def failing_commit():
+            raise OSError("disk I/O error")
+
+        try:
+            db.conn.commit = failing_commit
+            with pytest.raises(OSError):
+                if in_unit_of_work:
+                    async with db.unit_of_work():
+                        await db.update_inventory("u1", consume={"1": 2}, produce={"3": 4})
+                else:
+                    await db.update_inventory("u1", consume={"1": 2}, produce={"3": 4})
+            db.conn.commit = real_commit
+
+            assert await _cached_quantity(db, "1") == 5
+            assert await _cached_quantity(db, "3") == 0
+            # 失败的事务已回滚，之后的写入不会把它一并提交
+            assert await db.remove_item_from_inventory("u1", "2", 1)
+            assert [await _stored(db, i) for i in ("1", "2", "3")] == [5, 2, 0]
+        finally:
+            db.conn.commit = real_commit
+            await db.close()
+
+    asyncio.run(scenario())
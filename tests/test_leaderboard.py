@@ -0,0 +1,69 @@
+# tests/test_leaderboard.py
+
+import random
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from xiuxian.data.leaderboard import SortedBlockList, LeaderboardSet
+from xiuxian.models import Player
+
+
+def test_sorted_block_list_matches_sorted_list(monkeypatch):
+    # 用很小的块让分裂与清空频繁发生
+    monkeypatch.setattr(SortedBlockList, "BLOCK_SIZE", 4)
+    rng = random.Random(11)
+    blocks, model = SortedBlockList(), []
+    for _ in range(5000):
+        value = rng.randrange(300)
+        if model and rng.random() < 0.45:
+            value = rng.choice(model)
+            assert blocks.remove(value)
+            model.remove(value)
+        else:
+            blocks.add(value)
+            model.append(value)
+            model.sort()
+        probe = rng.randrange(-5, 305)
+        assert blocks.bisect_left(probe) == sum(1 for v in model if v < probe)
+        assert len(blocks) == len(model)
+    assert list(blocks) == model
+    assert blocks.head(7) == model[:7]
+    assert not blocks.remove(-1)
+
+
+def test_leaderboard_rank_matches_sql_semantics():
+    rng = random.Random(3)
+    boards = LeaderboardSet()
+    players = {}
+    for i in range(2000):
+        player = Player(user_id=f"u{i}", gold=rng.randrange(50), level_index=rng.randrange(5),
+                        experience=rng.randrange(20), pvp_wins=rng.randrange(3), pvp_losses=rng.randrange(3))
+        players[player.user_id] = player
+        boards.update(player)
+    for player in rng.sample(list(players.values()), 500):
+        player.gold = rng.randrange(50)
+        player.pvp_wins = rng.randrange(3)
+        boards.update(player)
+
+    for player in rng.sample(list(players.values()), 100):
+        assert boards.rank_of("gold", player.user_id) == 1 + sum(p.gold > player.gold for p in players.values())
+        assert boards.rank_of("realm", player.user_id) == 1 + sum(
+            (p.level_index, p.experience) > (player.level_index, player.experience) for p in players.values()
+        )
+        in_pvp = player.pvp_wins + player.pvp_losses > 0
+        expected = 1 + sum(
+            p.pvp_wins + p.pvp_losses > 0 and (p.pvp_wins, -p.pvp_losses) > (player.pvp_wins, -player.pvp_losses)
+            for p in players.values()
+        ) if in_pvp else 0
+        assert boards.rank_of("pvp", player.user_id) == expected
+    top = boards.top("gold", 10)
+    assert [players[u].gold for u in top] == sorted((p.gold for p in players.values()), reverse=True)[:10]
+
+    # 启动时的全量构建与逐个更新得到相同的榜单
+    loaded = LeaderboardSet()
+    loaded.load(players.values())
+    for dimension in ("realm", "gold", "combat", "pvp"):
+        assert loaded.top(dimension, 50) == boards.top(dimension, 50)
+        assert all(loaded.rank_of(dimension, u) == boards.rank_of(dimension, u) for u in players)
@@ -0,0 +1,144 @@
+# tests/test_log_archiver.py
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.data import LogArchiver
+from xiuxian.data import log_archiver as log_archiver_module
+
+JANUARY = datetime(2025, 1, 15, 12).timestamp()
+FEBRUARY = datetime(2025, 2, 10, 12).timestamp()
+
+
+async def _insert_ledger(db, rows):
+    await db.conn.executemany(
+        "INSERT INTO gold_ledger (from_user_id, to_user_id, amount, tax, reason, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    await db.conn.commit()
+
+
+async def _table_rows(db, table):
+    async with db.conn.execute(f"SELECT * FROM {table} ORDER BY id") as cursor:
+        return [dict(row) for row in await cursor.fetchall()]
+
+
+async def _streamed(archiver, table, **kwargs):
+    return [row async for row in archiver.stream_rows(table, batch_size=3, **kwargs)]
+
+
+def test_archived_rows_stream_back_unchanged(open_db, tmp_path):
+    async def scenario():
+        db = await open_db()
+        archiver = LogArchiver(db, tmp_path / "archive", horizon_days=30, chunk_size=4)
+        try:
+            await _insert_ledger(db, [
+                *[("u1", "u2", 100 + i, i, "交易", JANUARY + i) for i in range(5)],
+                *[(None, "u1", 7, 0, "奖励·灵石", FEBRUARY + i) for i in range(5)],
+                ("u2", None, 1, 0, "近期", time.time()),
+            ])
+            await db.conn.execute(
+                "INSERT INTO world_boss_kill_logs (boss_name, boss_id, defeated_at, top_contributors) VALUES (?, ?, ?, ?)",
+                ("妖王", "b1", JANUARY, '[["u1", 10]]'),
+            )
+            await db.conn.commit()
+            original = await _table_rows(db, "gold_ledger")
+
+            report = await archiver.run_once()
+
+            assert report["archived"] == {"gold_ledger": 10, "world_boss_kill_logs": 1}
+            assert [p.name for p in archiver.list_segments("gold_ledger")] == ["2025-01.jsonl.gz", "2025-02.jsonl.gz"]
+            assert await _streamed(archiver, "gold_ledger") == original[:10]
+            # 按时间范围读取只打开对应月份的分段
+            assert await _streamed(archiver, "gold_ledger", since=FEBRUARY) == original[5:10]
+            assert await _streamed(archiver, "gold_ledger", until=FEBRUARY) == original[:5]
+            assert [row["boss_name"] for row in archiver.iter_rows("world_boss_kill_logs")] == ["妖王"]
+            # 保留期内的行留在数据库中
+            assert await _table_rows(db, "gold_ledger") == original[10:]
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_rows_are_deleted_only_after_segment_is_durable(open_db, tmp_path, monkeypatch):
+    events = []
+    real_write_marker = log_archiver_module._write_marker
+
+    def write_marker(marker, size):
+        real_write_marker(marker, size)
+        if size:
+            events.append("committed")
+
+    def failing_write_marker(marker, size):
+        if size:
+            raise OSError("disk full")
+        real_write_marker(marker, size)
+
+    async def scenario():
+        db = await open_db()
+        archiver = LogArchiver(db, tmp_path / "archive", horizon_days=30)
+        real_delete = db.delete_log_rows
+
+        async def delete_log_rows(table, ids):
+            segment = archiver.list_segments(table)[-1]
+            # 删除时分段内容与已提交长度标记都已落盘且一致
+            assert int(log_archiver_module._marker_of(segment).read_text()) == segment.stat().st_size
+            events.append("delete")
+            await real_delete(table, ids)
+
+        db.delete_log_rows = delete_log_rows
+        try:
+            await _insert_ledger(db, [("u1", "u2", i, 0, "交易", JANUARY + i) for i in range(3)])
+            original = await _table_rows(db, "gold_ledger")
+
+            monkeypatch.setattr(log_archiver_module, "_write_marker", failing_write_marker)
+            with pytest.raises(OSError):
+                await archiver.run_once()
+            # 分段未提交时不删除数据库中的行
+            assert events == []
+            assert await _table_rows(db, "gold_ledger") == original
+
+            monkeypatch.setattr(log_archiver_module, "_write_marker", write_marker)
+            await archiver.run_once()
+            assert events == ["committed", "delete"]
+            assert await _table_rows(db, "gold_ledger") == []
+            # 失败那次写出的未提交内容被截掉，读回不会重复
+            assert await _streamed(archiver, "gold_ledger") == original
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_appends_to_existing_month_segment(open_db, tmp_path):
+    async def scenario():
+        db = await open_db()
+        archiver = LogArchiver(db, tmp_path / "archive", horizon_days=30)
+        try:
+            await _insert_ledger(db, [("u1", "u2", i, 0, "第一批", JANUARY + i) for i in range(3)])
+            first = await _table_rows(db, "gold_ledger")
+            await archiver.run_once()
+            segment, = archiver.list_segments("gold_ledger")
+
+            # 模拟上次追加中途退出：文件末尾留下半个 gzip 成员
+            with open(segment, "ab") as f:
+                f.write(b"\x1f\x8b\x08\x00partial")
+            assert await _streamed(archiver, "gold_ledger") == first
+
+            await _insert_ledger(db, [("u1", "u2", i, 0, "第二批", JANUARY + 100 + i) for i in range(3)])
+            second = await _table_rows(db, "gold_ledger")
+            await archiver.run_once()
+
+            assert archiver.list_segments("gold_ledger") == [segment]
+            assert await _streamed(archiver, "gold_ledger") == first + second
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,74 @@
+# tests/test_player_cache.py
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+def _count_selects(db):
+    calls = []
+    real_select = db._select_player
+
+    async def select_player(user_id):
+        calls.append(user_id)
+        return await real_select(user_id)
+
+    db._select_player = select_player
+    return calls
+
+
+def test_reads_are_served_from_cache_as_copies(run_db):
+    async def scenario(db):
+        await db.create_player(Player(user_id="u1", gold=10))
+        selects = _count_selects(db)
+
+        first = await db.get_player_by_id("u1")
+        first.gold = 999
+        second = await db.get_player_by_id("u1")
+
+        # 未写回的修改不会泄漏到缓存中，两次读取都没有查询数据库
+        assert second.gold == 10 and second is not first
+        assert selects == []
+        assert db.player_cache.stats()["hits"] == 2
+
+        await db.update_player(first)
+        assert (await db.get_player_by_id("u1")).gold == 999
+        assert selects == []
+
+    run_db(scenario)
+
+
+def test_least_recently_used_player_is_evicted(run_db):
+    async def scenario(db):
+        for user_id in ("u1", "u2"):
+            await db.create_player(Player(user_id=user_id))
+        await db.get_player_by_id("u1")
+        await db.create_player(Player(user_id="u3"))
+
+        assert "u2" not in db.player_cache
+        assert "u1" in db.player_cache and "u3" in db.player_cache
+        assert db.player_cache.stats()["evictions"] == 1
+
+        selects = _count_selects(db)
+        assert (await db.get_player_by_id("u2")).user_id == "u2"
+        assert selects == ["u2"]
+
+    run_db(scenario, player_cache_size=2)
+
+
+def test_database_side_changes_invalidate_cache(run_db):
+    async def scenario(db):
+        await db.create_player(Player(user_id="u1"))
+        sect_id = await db.create_sect("青云门", "u1")
+        await db.update_player_sect("u1", sect_id, "青云门")
+        assert (await db.get_player_by_id("u1")).sect_id == sect_id
+
+        # 删除宗门时外键把成员的 sect_id 置空，缓存中的成员随之失效
+        await db.delete_sect(sect_id)
+        assert "u1" not in db.player_cache
+        assert (await db.get_player_by_id("u1")).sect_id is None
+
+    run_db(scenario)
@@ -0,0 +1,98 @@
+# tests/test_player_required.py
+
+import asyncio
+import contextvars
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from xiuxian.handlers.utils import player_required, user_locks
+from xiuxian.models import Player
+
+
+class _Event:
+    def __init__(self, user_id: str, message: str = "测试"):
+        self.user_id = user_id
+        self.message = message
+
+    def get_sender_id(self):
+        return self.user_id
+
+    def get_message_str(self):
+        return self.message
+
+    def plain_result(self, text):
+        return text
+
+
+class _DB:
+    async def get_player_by_id(self, user_id):
+        return Player(user_id=user_id)
+
+
+class _Handler:
+    def __init__(self):
+        self.db = _DB()
+        self.sent = asyncio.Event()
+        self.steps = []
+
+    @player_required
+    async def two_messages(self, player, event):
+        yield "第一条"
+        # 第一条消息发出之后指令才继续执行
+        await self.sent.wait()
+        yield "第二条"
+
+    @player_required
+    async def record(self, player, event):
+        self.steps.append(event.message)
+        yield event.message
+
+
+def test_messages_are_yielded_as_they_come():
+    async def scenario():
+        handler = _Handler()
+        received = []
+        async for message in handler.two_messages(_Event("u1")):
+            received.append(message)
+            handler.sent.set()
+        return received
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 5)) == ["第一条", "第二条"]
+
+
+def test_lock_is_held_until_the_command_finishes():
+    async def scenario():
+        handler = _Handler()
+        first = handler.two_messages(_Event("u1"))
+        assert await first.__anext__() == "第一条"
+
+        # 第一条指令尚未结束，同一用户的下一条指令等待；其他用户不受影响
+        blocked = asyncio.create_task(_drain(handler.record(_Event("u1", "同一用户"))))
+        assert await _drain(handler.record(_Event("u2", "其他用户"))) == ["其他用户"]
+        await asyncio.sleep(0.05)
+        assert not blocked.done() and handler.steps == ["其他用户"]
+
+        handler.sent.set()
+        assert [message async for message in first] == ["第二条"]
+        assert await blocked == ["同一用户"]
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def test_lock_is_released_when_generator_is_closed_elsewhere():
+    async def scenario():
+        handler = _Handler()
+        command = handler.two_messages(_Event("u1"))
+        assert await command.__anext__() == "第一条"
+        # 未消费完的生成器在另一个上下文中被关闭（如回收时的 aclose）
+        await asyncio.create_task(command.aclose(), context=contextvars.Context())
+        assert await _drain(handler.record(_Event("u1", "之后"))) == ["之后"]
+        assert user_locks.get_stats()["live_locks"] == 0
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+async def _drain(generator):
+    return [message async for message in generator]
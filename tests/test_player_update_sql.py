@@ -0,0 +1,65 @@
+# tests/test_player_update_sql.py
+
+import re
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+async def _traced_player_updates(db, action):
+    """执行 action，返回期间写连接上执行的 UPDATE players 语句中 SET 的列"""
+    statements = []
+    real_execute = db.conn.execute
+
+    def execute(sql, *args, **kwargs):
+        statements.append(sql)
+        return real_execute(sql, *args, **kwargs)
+
+    db.conn.execute = execute
+    try:
+        await action()
+    finally:
+        db.conn.execute = real_execute
+    updates = [s for s in statements if s.lstrip().startswith("UPDATE players SET")]
+    return [re.findall(r"(\w+) = ", s.split(" WHERE ")[0]) for s in updates]
+
+
+def test_update_writes_only_changed_columns(run_db):
+    async def scenario(db):
+        await db.create_player(Player(user_id="u1", gold=10, nickname="道友"))
+        player = await db.get_player_by_id("u1")
+        player.gold += 5
+        player.nickname = "散修"
+        player.experience = 0  # 与原值相同，不算修改
+
+        async def update():
+            await db.update_player(player)
+
+        assert await _traced_player_updates(db, update) == [["gold", "nickname", "row_version"]]
+
+        # 没有修改时不发出 UPDATE
+        assert await _traced_player_updates(db, update) == []
+        stored = await db._select_player("u1")
+        assert (stored.gold, stored.nickname) == (15, "散修")
+
+    run_db(scenario)
+
+
+def test_combat_power_is_written_with_the_fields_it_depends_on(run_db):
+    async def scenario(db):
+        await db.create_player(Player(user_id="u1"))
+        player = await db.get_player_by_id("u1")
+        player.attack += 100
+
+        async def update():
+            await db.update_player(player)
+
+        columns, = await _traced_player_updates(db, update)
+        assert columns == ["attack", "combat_power", "row_version"]
+        assert (await db._select_player("u1")).combat_power == player.combat_power > 0
+
+    run_db(scenario)
@@ -0,0 +1,67 @@
+# tests/test_ranking_query_plans.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+async def _captured_player_queries(db, sect_id: int):
+    """关闭内存排行榜与读连接池后调用各排行榜方法，记录它们在 players 上执行的 SQL"""
+    captured = []
+    execute = db.conn.execute
+
+    def recording_execute(sql, params=()):
+        if "players" in sql and not sql.lstrip().upper().startswith(("INSERT", "UPDATE")):
+            captured.append((sql, params))
+        return execute(sql, params)
+
+    db.conn.execute = recording_execute
+    try:
+        for board in ("realm", "gold", "combat", "pvp"):
+            await db.get_ranking_summaries(board, 10)
+        await db.get_player_realm_rank("u1")
+        await db.get_player_wealth_rank("u1")
+        await db.get_player_combat_rank("u1")
+        await db.get_player_pvp_rank("u1")
+        await db.get_sect_members(sect_id)
+        await db.get_sect_member_summaries(sect_id)
+        await db.get_sect_info(sect_id)
+    finally:
+        db.conn.execute = execute
+    return captured
+
+
+def test_ranking_queries_use_indexes(open_db):
+    async def scenario():
+        db = await open_db(leaderboard_enabled=False, read_pool_size=0, player_cache_size=0)
+        try:
+            sect_ids = [await db.create_sect(f"宗门{i}", f"u{i}") for i in range(20)]
+            for i in range(200):
+                await db.create_player(Player(user_id=f"u{i}", gold=i, level_index=i % 7, experience=i,
+                                              pvp_wins=i % 5, pvp_losses=i % 3, sect_id=sect_ids[i % 20]))
+            await db.conn.execute("ANALYZE")
+            await db.conn.commit()
+
+            queries = await _captured_player_queries(db, sect_ids[0])
+            ranking_queries = [(sql, params) for sql, params in queries if "user_id = ?" not in sql
+                               or "COUNT" in sql]
+            assert len(ranking_queries) >= 11
+            # 快照与主库结构相同，快照上的排名查询同样需要走索引
+            ranking_queries += [(sql, ("u1",)) for sql in db._SNAPSHOT_RANK_SQL.values()]
+            for sql, params in ranking_queries:
+                async with db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params) as cursor:
+                    plan = [row[3] for row in await cursor.fetchall()]
+                for step in plan:
+                    # 允许按索引有序扫描（ORDER BY ... LIMIT），不允许全表扫描或临时排序
+                    assert not (step.startswith("SCAN ") and step != "SCAN CONSTANT ROW" and "INDEX" not in step), (sql, plan)
+                    assert "TEMP B-TREE" not in step, (sql, plan)
+                assert any("idx_players_" in step or "PRIMARY KEY" in step for step in plan), (sql, plan)
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
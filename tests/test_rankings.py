@@ -0,0 +1,129 @@
+# tests/test_rankings.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+async def _seed(db):
+    await db.create_player(Player(user_id="a", gold=300, pvp_wins=3, pvp_losses=1))
+    await db.create_player(Player(user_id="b", gold=200, pvp_wins=2, pvp_losses=0))
+    await db.create_player(Player(user_id="c", gold=100))
+
+
+async def _overtake(db):
+    """快照生成之后，c 的灵石与胜场超过所有人"""
+    player = await db.get_player_by_id("c")
+    player.gold = 1000
+    player.pvp_wins = 10
+    await db.update_player(player)
+
+
+def test_no_snapshot_copies_while_leaderboard_serves_rankings(open_db):
+    async def scenario():
+        # 默认配置：内存排行榜启用，快照间隔非0
+        db = await open_db(snapshot_interval_seconds=120)
+        try:
+            assert db.snapshot is None
+            await _seed(db)
+            await _overtake(db)
+
+            assert [p.user_id for p in await db.get_ranking_summaries("gold")] == ["c", "a", "b"]
+            assert await db.get_player_wealth_rank("c") == 1
+            assert await db.get_player_pvp_rank("c") == 1
+        finally:
+            await db.close()
+
+        # 排行榜不读快照时同样不生成
+        db = await open_db("other.db", snapshot_interval_seconds=120, leaderboard_enabled=False,
+                           snapshot_rankings=False)
+        try:
+            assert db.snapshot is None
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_ranking_calls_are_served_from_snapshot(open_db):
+    async def scenario():
+        db = await open_db(snapshot_interval_seconds=120, leaderboard_enabled=False)
+        try:
+            assert db.snapshot is not None
+            await _seed(db)
+            await db.snapshot.refresh()
+
+            acquired = []
+            acquire = db.snapshot.acquire
+
+            def counting_acquire():
+                acquired.append(1)
+                return acquire()
+
+            def no_live_reads():
+                raise AssertionError("排行榜查询不应读取主库")
+
+            db.snapshot.acquire = counting_acquire
+            db._reader = no_live_reads
+            for board in ("realm", "gold", "combat", "pvp"):
+                assert await db.get_ranking_summaries(board)
+            assert await db.get_player_realm_rank("a") == 1
+            assert await db.get_player_wealth_rank("b") == 2
+            assert await db.get_player_combat_rank("c") >= 1
+            assert await db.get_player_pvp_rank("a") == 1
+            assert len(acquired) == 8
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_snapshot_serves_every_board_without_leaderboard(open_db):
+    async def scenario():
+        db = await open_db(snapshot_interval_seconds=60, leaderboard_enabled=False)
+        try:
+            await _seed(db)
+            await db.snapshot.refresh()
+            await _overtake(db)
+
+            # 快照仍是超越之前的数据，PVP 与其他榜单行为一致
+            assert [p.user_id for p in await db.get_ranking_summaries("gold")] == ["a", "b", "c"]
+            assert [p.user_id for p in await db.get_ranking_summaries("pvp")] == ["a", "b"]
+            assert await db.get_player_wealth_rank("c") == 3
+            assert await db.get_player_pvp_rank("c") == 0
+            assert await db.get_player_pvp_rank("b") == 2
+
+            db.snapshot_rankings = False
+            assert [p.user_id for p in await db.get_ranking_summaries("gold")] == ["c", "a", "b"]
+            assert await db.get_player_wealth_rank("c") == 1
+            assert await db.get_player_pvp_rank("c") == 1
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_summary_reads_do_not_touch_player_cache(open_db):
+    async def scenario():
+        db = await open_db()
+        try:
+            await _seed(db)
+            sect_id = await db.create_sect("青云", "a")
+            await db.update_player_sect("a", sect_id, "青云")
+            await db.get_player_by_id("a")
+            stats = db.get_player_cache_stats()
+
+            assert [p.user_id for p in await db.get_ranking_summaries("gold")] == ["a", "b", "c"]
+            info = await db.get_sect_info(sect_id)
+            assert info["member_count"] == 1
+            assert [type(m).__name__ for m in info["members"]] == ["PlayerSummary"]
+            assert db.get_player_cache_stats() == stats
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+# tests/test_read_pool.py
+
+from dataclasses import astuple
+
+import pytest
+
+aiosqlite = pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player, PLAYER_FIELD_NAMES
+
+
+async def _journal_mode(conn):
+    async with conn.execute("PRAGMA journal_mode") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+def test_wal_profile_opens_read_only_pool(run_db):
+    async def scenario(db):
+        assert (await _journal_mode(db.conn)).lower() == "wal"
+        assert db.read_pool is not None and db.read_pool.size == 3
+        async with db._reader() as conn:
+            assert conn is not db.conn
+            with pytest.raises(aiosqlite.OperationalError):
+                await conn.execute("DELETE FROM players")
+
+    run_db(scenario, storage_profile="balanced", read_pool_size=3)
+
+
+def test_pool_reads_committed_data_while_writer_is_in_transaction(run_db):
+    async def scenario(db):
+        await db.create_player(Player(user_id="u1"))
+        async with db._transaction() as tx:
+            await db.conn.execute(
+                f"INSERT INTO players ({', '.join(PLAYER_FIELD_NAMES)}) VALUES ({', '.join('?' * len(PLAYER_FIELD_NAMES))})",
+                astuple(Player(user_id="u2")),
+            )
+            # 写事务未提交时，池中的读连接不被阻塞，读到的是已提交的数据
+            assert await db.get_all_players_count() == 1
+            tx.rollback()
+
+        async with db.unit_of_work():
+            await db.create_player(Player(user_id="u3"))
+            # 工作单元内改用写连接，读到自己尚未提交的写入
+            assert await db.get_all_players_count() == 2
+        assert await db.get_all_players_count() == 2
+
+    run_db(scenario)
+
+
+def test_legacy_profile_reads_through_writer(run_db):
+    async def scenario(db):
+        assert (await _journal_mode(db.conn)).lower() == "delete"
+        assert db.read_pool is None
+        await db.create_player(Player(user_id="u1"))
+        async with db._reader() as conn:
+            assert conn is db.conn
+        assert await db.get_all_players_count() == 1
+
+    run_db(scenario, storage_profile="legacy")
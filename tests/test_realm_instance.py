@@ -0,0 +1,83 @@
+# tests/test_realm_instance.py
+
+import random
+import dataclasses
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from xiuxian.core.realm_manager import RealmGenerator
+from xiuxian.models import Player, FloorEvent, RealmInstance
+
+REALM_CONFIG = {"REALM_RULES": {"REALM_BASE_FLOORS": 8, "REALM_FLOORS_PER_LEVEL_DIVISOR": 3}}
+
+
+def _all_floors(instance, config_manager):
+    return [RealmGenerator.get_floor_event(instance, i, config_manager) for i in range(instance.total_floors)]
+
+
+@pytest.mark.parametrize("realm_type", list(RealmGenerator.REALM_TYPES))
+def test_same_seed_and_floor_give_identical_event(config_manager, realm_type):
+    player = Player(user_id="u1", level_index=6)
+    instance = RealmGenerator.generate_for_player(player, REALM_CONFIG, config_manager, realm_type, "hard")
+    assert instance.seed is not None and instance.floors == []
+
+    first = _all_floors(instance, config_manager)
+    assert all(event is not None for event in first)
+    assert first[-1].type == "boss"
+
+    # 结果只取决于种子与楼层：打乱全局随机状态、倒序生成、用同种子的新实例都不影响
+    random.seed(12345)
+    assert [RealmGenerator.get_floor_event(instance, i, config_manager)
+            for i in reversed(range(instance.total_floors))] == first[::-1]
+    clone = dataclasses.replace(instance, theme_modifiers=dict(instance.theme_modifiers))
+    assert _all_floors(clone, config_manager) == first
+
+    # 经过 realm_data 的 JSON 往返后仍然一致
+    player.set_realm_instance(instance)
+    reloaded = Player(user_id="u1", level_index=6, realm_data=player.realm_data).get_realm_instance()
+    assert reloaded.seed == instance.seed and reloaded.floors == []
+    assert _all_floors(reloaded, config_manager) == first
+
+
+def test_different_seeds_diverge(config_manager):
+    base = RealmInstance(id="r", total_floors=12, floors=[], seed=1, level_index=4)
+    events = _all_floors(base, config_manager)
+    others = [_all_floors(dataclasses.replace(base, seed=seed), config_manager) for seed in range(2, 6)]
+    assert any(other != events for other in others)
+
+
+def test_overrides_win_over_regeneration(config_manager):
+    instance = RealmInstance(id="r", total_floors=6, floors=[], seed=42, level_index=3)
+    generated = _all_floors(instance, config_manager)
+
+    override = FloorEvent(type="treasure", data={"gold": 999}, description="被改写的楼层")
+    instance.overrides[2] = override
+    boss_override = FloorEvent(type="monster", data={"id": "custom"}, description="替换的最终层")
+    instance.overrides[5] = boss_override
+
+    floors = _all_floors(instance, config_manager)
+    assert floors[2] == override and floors[5] == boss_override
+    # 其余楼层仍由种子生成，不受覆盖项影响
+    assert [e for i, e in enumerate(floors) if i not in (2, 5)] == \
+        [e for i, e in enumerate(generated) if i not in (2, 5)]
+
+    # 覆盖项随 realm_data 持久化，键在 JSON 中变为字符串，解码后恢复为整数索引
+    player = Player(user_id="u1")
+    player.set_realm_instance(instance)
+    reloaded = Player(user_id="u1", realm_data=player.realm_data).get_realm_instance()
+    assert reloaded.overrides == {2: override, 5: boss_override}
+    assert _all_floors(reloaded, config_manager) == floors
+
+
+def test_legacy_instance_without_seed_uses_stored_floors(config_manager):
+    stored = [FloorEvent(type="trap", data={"damage": i}) for i in range(3)]
+    instance = RealmInstance(id="old", total_floors=3, floors=list(stored))
+
+    player = Player(user_id="u1")
+    player.set_realm_instance(instance)
+    reloaded = Player(user_id="u1", realm_data=player.realm_data).get_realm_instance()
+    assert reloaded.seed is None
+    assert _all_floors(reloaded, config_manager) == stored
+    assert RealmGenerator.get_floor_event(reloaded, 3, config_manager) is None
@@ -0,0 +1,145 @@
+# tests/test_retention.py
+
+import asyncio
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.data import RetentionJob
+from xiuxian.models import Player
+
+
+def _day(offset: int) -> str:
+    return (date.today() - timedelta(days=offset)).isoformat()
+
+
+async def _insert_counters(db, rows):
+    await db.conn.executemany(
+        "INSERT INTO daily_counters (scope, user_id, counter_key, counter_date, count) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+    await db.conn.commit()
+
+
+async def _counter_rows(db):
+    async with db.conn.execute(
+        "SELECT scope, user_id, counter_key, counter_date FROM daily_counters ORDER BY 1, 2, 3, 4"
+    ) as cursor:
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+def test_purges_rows_before_cutoff_by_composite_key(open_db):
+    async def scenario():
+        db = await open_db()
+        try:
+            await db.create_player(Player(user_id="u1"))
+            # 同一作用域/玩家/键的行只在日期上不同，删除必须按完整主键定位
+            rows = [
+                (scope, user_id, key, _day(offset), 1)
+                for scope in ("shop", "task")
+                for user_id in ("u1", "u2")
+                for key in ("", "1")
+                for offset in (0, 1, 2, 3, 40)
+            ]
+            await _insert_counters(db, rows)
+            for offset in (0, 5):
+                await db.complete_daily_task("u1", _day(offset), "t1")
+
+            report = await RetentionJob(db, horizon_days=2).run_once()
+
+            assert report["cutoff"] == _day(2)
+            # 截止日当天（含）之后的保留，之前的 3、40 天前的删除
+            assert report["deleted"] == {"daily_counters": 16, "daily_task_progress": 1}
+            assert report["deleted_rows"] == 17
+            expected = sorted(row[:4] for row in rows if row[3] >= _day(2))
+            assert await _counter_rows(db) == expected
+            assert await db.get_daily_task_progress("u1", _day(0)) == {"t1": True}
+            assert await db.get_daily_task_progress("u1", _day(5)) == {}
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_purges_in_chunks_of_at_most_chunk_size(open_db):
+    async def scenario():
+        db = await open_db()
+        deleted_per_call = []
+        real_purge = db.purge_rows_before
+
+        async def counting_purge(table, *args):
+            count = await real_purge(table, *args)
+            if table == "daily_counters":
+                deleted_per_call.append(count)
+            return count
+
+        db.purge_rows_before = counting_purge
+        try:
+            await _insert_counters(db, [("shop", f"u{i}", "", _day(10), 1) for i in range(10)]
+                                   + [("shop", "u0", "", _day(0), 1)])
+            report = await RetentionJob(db, horizon_days=2, chunk_size=3).run_once()
+
+            assert report["deleted"] == {"daily_counters": 10}
+            assert deleted_per_call == [3, 3, 3, 1]
+            assert await _counter_rows(db) == [("shop", "u0", "", _day(0))]
+            # 没有过期数据时只执行一次探测删除
+            deleted_per_call.clear()
+            assert (await RetentionJob(db, horizon_days=2, chunk_size=3).run_once())["deleted_rows"] == 0
+            assert deleted_per_call == [0]
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_new_database_returns_freed_pages(open_db):
+    async def scenario():
+        db = await open_db()
+        try:
+            assert await db.get_auto_vacuum_mode() == "incremental"
+            padding = "x" * 200
+            await _insert_counters(db, [("shop", f"u{i}", padding, _day(10), 1) for i in range(2000)])
+            report = await RetentionJob(db, horizon_days=2).run_once()
+            assert report["deleted_rows"] == 2000
+            assert report["freed_pages"] > 0
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("convert", [False, True])
+def test_legacy_database_is_converted_only_when_enabled(open_db, tmp_path, convert):
+    # 模拟 auto_vacuum 功能之前创建的数据库：文件已有内容，connect 不会再修改 auto_vacuum
+    legacy = sqlite3.connect(tmp_path / "legacy.db")
+    legacy.execute("CREATE TABLE legacy_marker (id INTEGER)")
+    legacy.commit()
+    legacy.close()
+
+    async def scenario():
+        db = await open_db("legacy.db")
+        try:
+            assert await db.get_auto_vacuum_mode() == "none"
+            padding = "x" * 200
+            await _insert_counters(db, [("shop", f"u{i}", padding, _day(10), 1) for i in range(2000)])
+            job = RetentionJob(db, horizon_days=2, convert_auto_vacuum=convert)
+            report = await job.run_once()
+            assert report["deleted_rows"] == 2000
+            mode = await db.get_auto_vacuum_mode()
+            async with db.conn.execute("PRAGMA freelist_count") as cursor:
+                free_pages = (await cursor.fetchone())[0]
+            # 只尝试一次转换
+            assert job.convert_auto_vacuum is False
+            return mode, free_pages
+        finally:
+            await db.close()
+
+    mode, free_pages = asyncio.run(scenario())
+    if convert:
+        assert mode == "incremental" and free_pages == 0
+    else:
+        assert mode == "none" and free_pages > 0
@@ -0,0 +1,71 @@
+# tests/test_schema.py
+
+import re
+import asyncio
+
+import pytest
+
+aiosqlite = pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.data import migration
+from xiuxian.data.migration import MigrationManager, LATEST_DB_VERSION
+
+
+async def _schema(conn):
+    """表、列、索引、外键与触发器的结构描述（列按名称排序，ALTER 追加的列顺序不同不算差异）"""
+    async with conn.execute(
+        "SELECT type, name, tbl_name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+    ) as cursor:
+        objects = await cursor.fetchall()
+    schema = {}
+    for kind, name, table, sql in objects:
+        if kind == "table":
+            async with conn.execute(f"PRAGMA table_info({name})") as cursor:
+                columns = sorted(tuple(row)[1:] for row in await cursor.fetchall())
+            async with conn.execute(f"PRAGMA foreign_key_list({name})") as cursor:
+                foreign_keys = sorted(tuple(row)[2:7] for row in await cursor.fetchall())
+            schema[(kind, name)] = (columns, foreign_keys)
+        elif kind == "index":
+            async with conn.execute(f"PRAGMA index_xinfo({name})") as cursor:
+                schema[(kind, name)] = (table, [tuple(row)[2:5] for row in await cursor.fetchall()])
+        else:
+            schema[(kind, name)] = (table, re.sub(r"\s+", " ", sql or "").strip())
+    return schema
+
+
+async def _migrated_schema(path, config_manager, baseline=None):
+    async with aiosqlite.connect(path) as conn:
+        conn.row_factory = aiosqlite.Row
+        if baseline is not None:
+            create_tables, version = baseline
+            await conn.execute("BEGIN")
+            await create_tables(conn)
+            await conn.execute("INSERT INTO db_info (version) VALUES (?)", (version,))
+            await conn.commit()
+        await MigrationManager(conn, config_manager).migrate()
+        async with conn.execute("SELECT version FROM db_info") as cursor:
+            assert (await cursor.fetchone())[0] == LATEST_DB_VERSION
+        return await _schema(conn)
+
+
+def test_fresh_install_matches_upgraded_schema(tmp_path, config_manager):
+    async def scenario():
+        fresh = await _migrated_schema(tmp_path / "fresh.db", config_manager)
+        upgraded = await _migrated_schema(
+            tmp_path / "upgraded.db", config_manager, (migration._create_all_tables_v9, 9)
+        )
+        return fresh, upgraded
+
+    fresh, upgraded = asyncio.run(scenario())
+    assert sorted(fresh) == sorted(upgraded)
+    for key in fresh:
+        assert fresh[key] == upgraded[key], key
+
+    # 后续版本新增的结构在全新安装中同样存在，旧的按日计数表已合并
+    players_columns = {column[0] for column in fresh[("table", "players")][0]}
+    assert {"nickname", "combat_power", "row_version"} <= players_columns
+    assert ("trigger", "trg_players_row_version") in fresh
+    assert ("table", "gold_ledger") in fresh and ("table", "daily_counters") in fresh
+    assert not any(kind == "table" and name.startswith("daily_") and name.endswith("_count")
+                   for kind, name in fresh)
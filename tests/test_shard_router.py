@@ -0,0 +1,136 @@
+# tests/test_shard_router.py
+
+import time
+import sqlite3
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.data import DataBase, ShardRouter, GLOBAL_SHARD
+from xiuxian.models import ActiveWorldBoss, Player
+
+
+class _GroupEvent:
+    def __init__(self, group_id):
+        self._group_id = group_id
+
+    def get_group_id(self):
+        return self._group_id
+
+
+def _rows(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def make_router(tmp_path, monkeypatch, config_manager):
+    """返回一个创建按群分片的 ShardRouter 的工厂，分片文件位于临时目录"""
+    from astrbot.api.star import StarTools
+    monkeypatch.setattr(StarTools, "get_data_dir", classmethod(lambda cls, plugin_name=None: tmp_path))
+
+    def factory(key):
+        name = "xiuxian.db" if key == GLOBAL_SHARD else f"shards/{key}/xiuxian.db"
+        return DataBase(name, config_manager=config_manager)
+
+    return lambda **kwargs: ShardRouter(factory, config_manager, enabled=True, **kwargs)
+
+
+def test_global_call_inside_shard_unit_of_work_uses_its_own_transaction(tmp_path, make_router):
+    async def scenario():
+        router = make_router()
+        await router.open()
+        try:
+            router.route(_GroupEvent("1001"))
+            async with router.unit_of_work() as uow:
+                await router.create_active_boss(ActiveWorldBoss("boss", 10, 10, time.time(), 0))
+                # GM激活码固定写入全局分片，不应并入群分片的工作单元
+                await router.add_gm_redeem_code("CODE", 1, 1, 1, "")
+                uow.rollback()
+        finally:
+            await router.close()
+
+        global_db = tmp_path / "xiuxian.db"
+        group_db = tmp_path / "shards" / "group_1001" / "xiuxian.db"
+        assert _rows(global_db, "SELECT code FROM gm_redeem_codes") == [("CODE",)]
+        assert _rows(group_db, "SELECT boss_id FROM active_world_bosses") == []
+
+    asyncio.run(scenario())
+
+
+def test_redeem_code_usage_is_counted_across_groups(tmp_path, make_router):
+    async def scenario():
+        router = make_router()
+        await router.open()
+        try:
+            await router.add_gm_redeem_code("ONCE", 100, 0, 2, "")
+            router.route(_GroupEvent("1001"))
+            await router.create_player(Player(user_id="u1"))
+            assert not await router.has_used_redeem_code("u1", "ONCE")
+            await router.record_redeem_code_use("u1", "ONCE")
+
+            # 换到另一个群：同一玩家已领取过，使用次数也包含其他群的领取
+            router.route(_GroupEvent("1002"))
+            await router.create_player(Player(user_id="u2"))
+            assert await router.has_used_redeem_code("u1", "ONCE")
+            assert await router.get_redeem_code_use_count("ONCE") == 1
+            await router.record_redeem_code_use("u2", "ONCE")
+
+            router.route(_GroupEvent("1001"))
+            assert await router.get_redeem_code_use_count("ONCE") == 2
+        finally:
+            await router.close()
+
+        global_db = tmp_path / "xiuxian.db"
+        assert sorted(_rows(global_db, "SELECT user_id FROM redeem_code_usage")) == [("u1",), ("u2",)]
+        for group in ("group_1001", "group_1002"):
+            assert _rows(tmp_path / "shards" / group / "xiuxian.db", "SELECT * FROM redeem_code_usage") == []
+
+    asyncio.run(scenario())
+
+
+def test_shard_is_held_for_the_whole_command(make_router):
+    async def scenario():
+        router = make_router(max_open=1)
+        await router.open()
+        router._idle_seconds = 0
+        between_calls, finish = asyncio.Event(), asyncio.Event()
+
+        async def command():
+            router.route(_GroupEvent("1001"))
+            await router.create_player(Player(user_id="u1"))
+            db = await router.current()
+            between_calls.set()
+            await finish.wait()
+            # 两次调用之间分片没有被关闭重开
+            assert await router.current() is db
+            assert await router.get_player_by_id("u1") is not None
+
+        async def other_group_command():
+            router.route(_GroupEvent("1002"))
+            await router.get_all_players_count()
+
+        try:
+            task = asyncio.create_task(command())
+            await between_calls.wait()
+            # 空闲回收与超过上限的淘汰都跳过被占用的分片
+            await router.reap_idle()
+            await asyncio.create_task(other_group_command())
+            assert "group_1001" in router.get_shard_stats()["open_shards"]
+
+            finish.set()
+            await task
+            await asyncio.sleep(0)
+            await router.reap_idle()
+            assert router.get_shard_stats()["open_shards"] == [GLOBAL_SHARD]
+            assert router.stats["opens"] == 3
+        finally:
+            await router.close()
+
+    asyncio.run(scenario())
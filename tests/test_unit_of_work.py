@@ -0,0 +1,87 @@
+# tests/test_unit_of_work.py
+
+import asyncio
+
+import pytest
+
+aiosqlite = pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+async def _committed(db, sql):
+    # 另开连接读取，只能看到已提交的数据
+    async with aiosqlite.connect(db.db_path) as conn, conn.execute(sql) as cursor:
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+async def _setup(db):
+    await db.create_player(Player(user_id="u1", gold=100))
+    await db.update_inventory("u1", produce={"1": 2})
+
+
+def test_calls_inside_unit_of_work_commit_once(run_db):
+    async def scenario(db):
+        await _setup(db)
+        commits = []
+        real_commit = db.conn.commit
+
+        async def commit():
+            commits.append(1)
+            await real_commit()
+
+        db.conn.commit = commit
+        async with db.unit_of_work():
+            player = await db.get_player_by_id("u1")
+            player.gold -= 30
+            await db.update_player(player)
+            assert await db.remove_item_from_inventory("u1", "1", 1)
+            # 嵌套的工作单元并入外层
+            async with db.unit_of_work():
+                await db.create_sect("青云门", "u1")
+            assert commits == []
+            assert await _committed(db, "SELECT gold FROM players") == [(100,)]
+        assert commits == [1]
+        assert await _committed(db, "SELECT gold FROM players") == [(70,)]
+        assert await _committed(db, "SELECT quantity FROM inventory") == [(1,)]
+        assert await _committed(db, "SELECT name FROM sects") == [("青云门",)]
+
+    run_db(scenario)
+
+
+def test_exception_rolls_back_every_call_and_cached_state(run_db):
+    async def scenario(db):
+        await _setup(db)
+        with pytest.raises(RuntimeError):
+            async with db.unit_of_work():
+                player = await db.get_player_by_id("u1")
+                player.gold -= 30
+                await db.update_player(player)
+                await db.update_inventory("u1", consume={"1": 2})
+                assert (await db.get_player_by_id("u1")).gold == 70
+                raise RuntimeError("boom")
+
+        assert (await db.get_player_by_id("u1")).gold == 100
+        assert (await db.get_item_from_inventory("u1", "1"))["quantity"] == 2
+        assert await _committed(db, "SELECT gold FROM players") == [(100,)]
+
+    run_db(scenario)
+
+
+def test_other_tasks_write_after_the_unit_of_work(run_db):
+    async def scenario(db):
+        await _setup(db)
+        other = None
+        with pytest.raises(RuntimeError):
+            async with db.unit_of_work():
+                await db.create_sect("青云门", "u1")
+                # 其他任务的写入排队等待，不会并入本工作单元
+                other = asyncio.create_task(db.create_sect("天音寺", "u2"))
+                await asyncio.sleep(0.05)
+                assert not other.done()
+                raise RuntimeError("boom")
+        await other
+        assert await _committed(db, "SELECT name FROM sects") == [("天音寺",)]
+
+    run_db(scenario)
@@ -0,0 +1,75 @@
+# tests/test_write_behind.py
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+# 后台刷新间隔足够长，测试中只由显式调用或关闭触发写回
+WRITE_BEHIND = {"write_behind": True, "write_behind_interval_ms": 60_000}
+
+
+async def _stored(db, user_id="u1"):
+    async with db.conn.execute("SELECT gold, experience, row_version FROM players WHERE user_id = ?", (user_id,)) as cursor:
+        return tuple(await cursor.fetchone())
+
+
+def test_deferred_updates_merge_into_one_row_write(run_db):
+    async def scenario(db):
+        await db.create_player(Player(user_id="u1"))
+        stored = await _stored(db)
+
+        gold = await db.get_player_by_id("u1")
+        exp = await db.get_player_by_id("u1")
+        gold.gold = 100
+        exp.experience = 7
+        await db.update_player(gold)
+        # 基于旧读取的另一条指令只修改了 experience，按列合并不会覆盖 gold
+        await db.update_player(exp)
+
+        assert await _stored(db) == stored
+        latest = await db.get_player_by_id("u1")
+        assert (latest.gold, latest.experience) == (100, 7)
+
+        await db.flush_dirty_players()
+        assert await _stored(db) == (100, 7, stored[2] + 1)
+        assert db.write_behind_stats == {"flushes": 1, "flushed_rows": 1, "deferred_writes": 2}
+
+    run_db(scenario, **WRITE_BEHIND)
+
+
+def test_dirty_player_is_flushed_on_close(run_db):
+    async def write(db):
+        await db.create_player(Player(user_id="u1"))
+        player = await db.get_player_by_id("u1")
+        player.gold = 42
+        await db.update_player(player)
+        assert (await _stored(db))[0] == 0
+
+    async def read(db):
+        return await _stored(db)
+
+    run_db(write, **WRITE_BEHIND)
+    assert run_db(read)[:2] == (42, 0)
+
+
+def test_flush_rebases_over_rows_changed_by_another_writer(run_db):
+    async def scenario(db):
+        await db.create_player(Player(user_id="u1", gold=10))
+        player = await db.get_player_by_id("u1")
+        player.experience = 5
+        await db.update_player(player)
+
+        # 另一个进程在快照产生之后写入了该玩家
+        await db.conn.execute("UPDATE players SET gold = gold + 50 WHERE user_id = 'u1'")
+        await db.conn.commit()
+        await db.flush_dirty_players()
+
+        assert (await _stored(db))[:2] == (60, 5)
+        assert db.write_conflict_stats["conflicts"] == 1
+        # 写回合并过的玩家不再信任缓存快照
+        assert (await db.get_player_by_id("u1")).gold == 60
+
+    run_db(scenario, **WRITE_BEHIND)
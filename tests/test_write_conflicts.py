@@ -0,0 +1,123 @@
+# tests/test_write_conflicts.py
+
+import random
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("astrbot")
+
+from xiuxian.models import Player
+
+
+async def _contended_gold_workload(db, rounds: int = 30) -> int:
+    """同一玩家上交错执行整行写回、购买、工作单元与灵石转移，返回预期的灵石净变化"""
+    rng = random.Random(7)
+
+    async def bump():
+        player = await db.get_player_by_id("u1")
+        await asyncio.sleep(rng.random() * 0.002)
+        player.gold += 1
+        await db.update_player(player)
+
+    async def buy():
+        await asyncio.sleep(rng.random() * 0.002)
+        ok, _ = await db.transactional_buy_item("u1", "1", 1, 1)
+        assert ok
+
+    async def in_unit_of_work():
+        await asyncio.sleep(rng.random() * 0.002)
+        async with db.unit_of_work():
+            player = await db.get_player_by_id("u1")
+            player.gold += 1
+            await db.update_player(player)
+
+    async def transfer():
+        await asyncio.sleep(rng.random() * 0.002)
+        assert await db.move_gold("bank", "u1", 1, reason="test")
+
+    calls = [call() for _ in range(rounds) for call in (bump, buy, in_unit_of_work, transfer)]
+    rng.shuffle(calls)
+    await asyncio.gather(*calls)
+    return rounds * (1 - 1 + 1 + 1)
+
+
+@pytest.mark.parametrize("group_commit_window_ms", [0, 5])
+def test_contended_same_player_writes_lose_no_updates(open_db, group_commit_window_ms):
+    async def scenario():
+        db = await open_db(group_commit_window_ms=group_commit_window_ms)
+        try:
+            await db.create_player(Player(user_id="u1", gold=3000))
+            await db.create_player(Player(user_id="bank", gold=100000))
+            expected = 3000 + await _contended_gold_workload(db)
+
+            assert db.get_write_conflict_stats()["failures"] == 0
+            assert (await db.get_player_by_id("u1")).gold == expected
+            async with db.conn.execute("SELECT gold FROM players WHERE user_id = 'u1'") as cursor:
+                assert (await cursor.fetchone())[0] == expected
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_conflict_from_another_connection_is_rebased(open_db):
+    async def scenario():
+        db = await open_db()
+        try:
+            await db.create_player(Player(user_id="u1", gold=100, experience=10))
+            player = await db.get_player_by_id("u1")
+            # 另一个进程在本对象读取之后写入了该玩家
+            await db.conn.execute("UPDATE players SET gold = gold + 50 WHERE user_id = 'u1'")
+            await db.conn.commit()
+            player.gold += 5
+            player.experience += 1
+            await db.update_player(player)
+
+            latest = await db._select_player("u1")
+            assert (latest.gold, latest.experience) == (155, 11)
+            assert db.get_write_conflict_stats()["conflicts"] == 1
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_raw_update_bumps_row_version_and_forces_retry(run_db):
+    async def row_version(db):
+        async with db.conn.execute("SELECT row_version FROM players WHERE user_id = 'u1'") as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def scenario(db):
+        await db.create_player(Player(user_id="u1", gold=100))
+        player = await db.get_player_by_id("u1")
+        assert await row_version(db) == player.row_version == 0
+
+        # 不知道版本号的写入由触发器递增版本；自行递增的写入不会被重复递增
+        await db.conn.execute("UPDATE players SET gold = gold + 1 WHERE user_id = 'u1'")
+        await db.conn.execute("UPDATE players SET gold = gold + 1, row_version = row_version + 1 WHERE user_id = 'u1'")
+        await db.conn.commit()
+        assert await row_version(db) == 2
+
+        attempts = []
+        real_write_row = db._write_player_row
+
+        async def write_player_row(target, execute):
+            async def counting_execute(sql, params):
+                if sql.startswith("UPDATE players"):
+                    attempts.append(params[-1])
+                return await execute(sql, params)
+            return await real_write_row(target, counting_execute)
+
+        db._write_player_row = write_player_row
+        player.gold += 5
+        await db.update_player(player)
+
+        # 第一次按旧版本比较失败，重载后按最新版本重试
+        assert attempts == [0, 2]
+        assert db.get_write_conflict_stats()["conflicts"] == 1
+        assert await row_version(db) == 3
+        assert (await db._select_player("u1")).gold == 107
+
+    run_db(scenario)